@@ -0,0 +1,141 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+Databases created before migrations existed already have some or all of these
+tables from Base.metadata.create_all, so tables that exist are left alone.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Types are created explicitly (and only if missing) rather than by each create_table
+job_stage = postgresql.ENUM(
+    "NOT_STARTED", "APPLIED", "IN_PROGRESS", "OFFER", "REJECTED", "NO_ANSWER",
+    name="jobstage", create_type=False
+)
+ai_job_status = postgresql.ENUM("PENDING", "RUNNING", "SUCCEEDED", "FAILED", name="aijobstatus", create_type=False)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = set(sa.inspect(bind).get_table_names())
+    job_stage.create(bind, checkfirst=True)
+    ai_job_status.create(bind, checkfirst=True)
+
+    if "resumes" not in existing:
+        op.create_table(
+            "resumes",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("file_name", sa.String(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_resumes_id", "resumes", ["id"])
+
+    if "job_applications" not in existing:
+        op.create_table(
+            "job_applications",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("company_name", sa.String(), nullable=False),
+            sa.Column("role_name", sa.String(), nullable=False),
+            sa.Column("stage", job_stage, nullable=False),
+            sa.Column("stage_date", sa.DateTime(), nullable=False),
+            sa.Column("job_ad_content", sa.Text(), nullable=True),
+            sa.Column("cover_letter", sa.Text(), nullable=True),
+            sa.Column("application_notes", sa.Text(), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("match_percentage", sa.Float(), nullable=True),
+            sa.Column("match_reasoning", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_job_applications_id", "job_applications", ["id"])
+        op.create_index("ix_job_applications_company_name", "job_applications", ["company_name"])
+
+    if "stage_history" not in existing:
+        op.create_table(
+            "stage_history",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("job_application_id", sa.Integer(), sa.ForeignKey("job_applications.id"), nullable=False),
+            sa.Column("previous_stage", job_stage, nullable=True),
+            sa.Column("new_stage", job_stage, nullable=False),
+            sa.Column("changed_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_stage_history_id", "stage_history", ["id"])
+
+    if "job_leads" not in existing:
+        op.create_table(
+            "job_leads",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("company_name", sa.String(), nullable=True),
+            sa.Column("role_name", sa.String(), nullable=True),
+            sa.Column("job_ad_content", sa.Text(), nullable=False),
+            sa.Column("job_url", sa.String(), nullable=True),
+            sa.Column("match_percentage", sa.Float(), nullable=True),
+            sa.Column("match_reasoning", sa.Text(), nullable=True),
+            sa.Column("is_promoted", sa.Boolean(), nullable=True),
+            sa.Column("promoted_to_application_id", sa.Integer(), sa.ForeignKey("job_applications.id"), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_job_leads_id", "job_leads", ["id"])
+        op.create_index("ix_job_leads_company_name", "job_leads", ["company_name"])
+
+    if "llm_cache" not in existing:
+        op.create_table(
+            "llm_cache",
+            sa.Column("cache_key", sa.String(length=64), primary_key=True),
+            sa.Column("model", sa.String(), nullable=False),
+            sa.Column("prompt_version", sa.String(), nullable=False),
+            sa.Column("result", sa.Text(), nullable=False),
+            sa.Column("hit_count", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("last_accessed_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_llm_cache_last_accessed_at", "llm_cache", ["last_accessed_at"])
+
+    if "ai_jobs" not in existing:
+        op.create_table(
+            "ai_jobs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("kind", sa.String(), nullable=False),
+            sa.Column("status", ai_job_status, nullable=False),
+            sa.Column("payload", sa.JSON(), nullable=False),
+            sa.Column("result", sa.JSON(), nullable=True),
+            sa.Column("error", sa.Text(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("max_attempts", sa.Integer(), nullable=False),
+            sa.Column("run_after", sa.DateTime(), nullable=False),
+            sa.Column("started_at", sa.DateTime(), nullable=True),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_ai_jobs_id", "ai_jobs", ["id"])
+        op.create_index("ix_ai_jobs_status_run_after", "ai_jobs", ["status", "run_after"])
+
+
+def downgrade() -> None:
+    op.drop_table("ai_jobs")
+    op.drop_table("llm_cache")
+    op.drop_table("job_leads")
+    op.drop_table("stage_history")
+    op.drop_table("job_applications")
+    op.drop_table("resumes")
+    ai_job_status.drop(op.get_bind(), checkfirst=True)
+    job_stage.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,81 @@
+"""indexes for list filters and sorts
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Trigram indexes let company_name ILIKE '%...%' use an index
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # list_leads: newest first, or best match first with NULLs last; batch analysis and
+    # the default view only look at leads that are not promoted yet
+    op.create_index(
+        "ix_job_leads_created_at_id", "job_leads",
+        [sa.text("created_at DESC"), sa.text("id DESC")]
+    )
+    op.create_index(
+        "ix_job_leads_match_percentage_id", "job_leads",
+        [sa.text("match_percentage DESC NULLS LAST"), sa.text("id DESC")]
+    )
+    op.create_index(
+        "ix_job_leads_unpromoted_created_at_id", "job_leads",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text("is_promoted = false")
+    )
+    op.create_index(
+        "ix_job_leads_company_name_trgm", "job_leads", ["company_name"],
+        postgresql_using="gin", postgresql_ops={"company_name": "gin_trgm_ops"}
+    )
+
+    # list_applications: newest first, optionally filtered by stage
+    op.create_index(
+        "ix_job_applications_created_at_id", "job_applications",
+        [sa.text("created_at DESC"), sa.text("id DESC")]
+    )
+    op.create_index(
+        "ix_job_applications_stage_created_at_id", "job_applications",
+        ["stage", sa.text("created_at DESC"), sa.text("id DESC")]
+    )
+    op.create_index(
+        "ix_job_applications_company_name_trgm", "job_applications", ["company_name"],
+        postgresql_using="gin", postgresql_ops={"company_name": "gin_trgm_ops"}
+    )
+
+    # Active resume lookup
+    op.create_index(
+        "ix_resumes_active", "resumes", ["id"],
+        postgresql_where=sa.text("is_active = true")
+    )
+
+    # History per application (also covers the foreign key for cascading deletes)
+    op.create_index(
+        "ix_stage_history_job_application_id_changed_at", "stage_history",
+        ["job_application_id", "changed_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stage_history_job_application_id_changed_at", table_name="stage_history")
+    op.drop_index("ix_resumes_active", table_name="resumes")
+    op.drop_index("ix_job_applications_company_name_trgm", table_name="job_applications")
+    op.drop_index("ix_job_applications_stage_created_at_id", table_name="job_applications")
+    op.drop_index("ix_job_applications_created_at_id", table_name="job_applications")
+    op.drop_index("ix_job_leads_company_name_trgm", table_name="job_leads")
+    op.drop_index("ix_job_leads_unpromoted_created_at_id", table_name="job_leads")
+    op.drop_index("ix_job_leads_match_percentage_id", table_name="job_leads")
+    op.drop_index("ix_job_leads_created_at_id", table_name="job_leads")
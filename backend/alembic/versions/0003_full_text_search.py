@@ -0,0 +1,51 @@
+"""full-text search columns on leads and applications
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JOB_LEAD_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(company_name, '') || ' ' || coalesce(role_name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(job_ad_content, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(match_reasoning, '')), 'D')"
+)
+
+JOB_APPLICATION_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(company_name, '') || ' ' || coalesce(role_name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(notes, '') || ' ' || coalesce(application_notes, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(job_ad_content, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(match_reasoning, '')), 'D')"
+)
+
+
+def upgrade() -> None:
+    op.add_column("job_leads", sa.Column(
+        "search_vector", postgresql.TSVECTOR(), sa.Computed(JOB_LEAD_DOCUMENT, persisted=True)
+    ))
+    op.create_index("ix_job_leads_search_vector", "job_leads", ["search_vector"], postgresql_using="gin")
+
+    op.add_column("job_applications", sa.Column(
+        "search_vector", postgresql.TSVECTOR(), sa.Computed(JOB_APPLICATION_DOCUMENT, persisted=True)
+    ))
+    op.create_index("ix_job_applications_search_vector", "job_applications", ["search_vector"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_applications_search_vector", table_name="job_applications")
+    op.drop_column("job_applications", "search_vector")
+    op.drop_index("ix_job_leads_search_vector", table_name="job_leads")
+    op.drop_column("job_leads", "search_vector")
@@ -0,0 +1,35 @@
+"""local prescore columns on leads and resumes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:03
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("resumes", sa.Column("prescore_vector", sa.LargeBinary(), nullable=True))
+    op.add_column("job_leads", sa.Column("prescore", sa.Float(), nullable=True))
+    op.add_column("job_leads", sa.Column("prescore_vector", sa.LargeBinary(), nullable=True))
+    op.create_index(
+        "ix_job_leads_prescore_id", "job_leads",
+        [sa.text("prescore DESC NULLS LAST"), sa.text("id DESC")]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_leads_prescore_id", table_name="job_leads")
+    op.drop_column("job_leads", "prescore_vector")
+    op.drop_column("job_leads", "prescore")
+    op.drop_column("resumes", "prescore_vector")
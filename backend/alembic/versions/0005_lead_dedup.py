@@ -0,0 +1,41 @@
+"""near-duplicate lead detection
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:04
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("job_leads", sa.Column("minhash", sa.LargeBinary(), nullable=True))
+    op.add_column("job_leads", sa.Column(
+        "duplicate_of_id", sa.Integer(), sa.ForeignKey("job_leads.id", ondelete="SET NULL"), nullable=True
+    ))
+    op.create_index("ix_job_leads_duplicate_of_id", "job_leads", ["duplicate_of_id"])
+
+    op.create_table(
+        "lead_lsh_bands",
+        sa.Column("band", sa.SmallInteger(), primary_key=True),
+        sa.Column("bucket", sa.BigInteger(), primary_key=True),
+        sa.Column("lead_id", sa.Integer(), sa.ForeignKey("job_leads.id", ondelete="CASCADE"), primary_key=True),
+    )
+    op.create_index("ix_lead_lsh_bands_lead_id", "lead_lsh_bands", ["lead_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("lead_lsh_bands")
+    op.drop_index("ix_job_leads_duplicate_of_id", table_name="job_leads")
+    op.drop_column("job_leads", "duplicate_of_id")
+    op.drop_column("job_leads", "minhash")
@@ -0,0 +1,65 @@
+"""materialized views for pipeline analytics
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:05
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One row per stage change, with the stage it left and how long it was in it
+    op.execute("""
+        CREATE MATERIALIZED VIEW stage_transitions AS
+        SELECT t.id, t.job_application_id, a.company_name, t.from_stage, t.to_stage, t.entered_at, t.changed_at,
+               EXTRACT(EPOCH FROM t.changed_at - t.entered_at) AS seconds_in_stage
+        FROM (
+            SELECT h.id, h.job_application_id,
+                   LAG(h.new_stage) OVER w AS from_stage,
+                   h.new_stage AS to_stage,
+                   LAG(h.changed_at) OVER w AS entered_at,
+                   h.changed_at
+            FROM stage_history h
+            WINDOW w AS (PARTITION BY h.job_application_id ORDER BY h.changed_at, h.id)
+        ) t
+        JOIN job_applications a ON a.id = t.job_application_id
+        WITH DATA
+    """)
+    op.create_index("ux_stage_transitions_id", "stage_transitions", ["id"], unique=True)
+    op.create_index("ix_stage_transitions_from_stage", "stage_transitions", ["from_stage"])
+
+    # One row per application, flagging every stage it has ever been in
+    op.execute("""
+        CREATE MATERIALIZED VIEW application_funnel AS
+        SELECT a.id AS job_application_id, a.company_name, a.stage AS current_stage,
+               bool_or(s.stage <> 'NOT_STARTED') AS reached_applied,
+               bool_or(s.stage IN ('IN_PROGRESS', 'OFFER')) AS reached_in_progress,
+               bool_or(s.stage = 'OFFER') AS reached_offer,
+               bool_or(s.stage = 'REJECTED') AS reached_rejected,
+               bool_or(s.stage = 'NO_ANSWER') AS reached_no_answer
+        FROM job_applications a
+        CROSS JOIN LATERAL (
+            SELECT a.stage
+            UNION ALL
+            SELECT h.new_stage FROM stage_history h WHERE h.job_application_id = a.id
+        ) s(stage)
+        GROUP BY a.id, a.company_name, a.stage
+        WITH DATA
+    """)
+    op.create_index("ux_application_funnel_job_application_id", "application_funnel", ["job_application_id"], unique=True)
+    op.create_index("ix_application_funnel_company_name", "application_funnel", ["company_name"])
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW application_funnel")
+    op.execute("DROP MATERIALIZED VIEW stage_transitions")
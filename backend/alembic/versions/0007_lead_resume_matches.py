@@ -0,0 +1,35 @@
+"""per-resume match results for leads
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:06
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lead_resume_matches",
+        sa.Column("lead_id", sa.Integer(), sa.ForeignKey("job_leads.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("resume_id", sa.Integer(), sa.ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("match_percentage", sa.Float(), nullable=False),
+        sa.Column("match_reasoning", sa.Text(), nullable=False),
+        sa.Column("resume_updated_at", sa.DateTime(), nullable=True),
+        sa.Column("analyzed_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_lead_resume_matches_resume_id", "lead_resume_matches", ["resume_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("lead_resume_matches")
@@ -0,0 +1,59 @@
+"""per-table change counters for conditional GETs
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 00:00:07
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = ("job_leads", "job_applications", "stage_history", "resumes")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "table_versions",
+        sa.Column("table_name", sa.String(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("changed_at", sa.DateTime(), nullable=False, server_default=sa.text("(now() AT TIME ZONE 'utc')")),
+    )
+    op.execute(
+        "INSERT INTO table_versions (table_name) VALUES "
+        + ", ".join(f"('{table}')" for table in TRACKED_TABLES)
+    )
+
+    # Statement-level, so a multi-row write bumps the counter once. The row update only
+    # becomes visible when the writing transaction commits, together with the data.
+    op.execute("""
+        CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE table_versions
+            SET version = version + 1, changed_at = now() AT TIME ZONE 'utc'
+            WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TRACKED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_bump_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+        """)
+
+
+def downgrade() -> None:
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER {table}_bump_version ON {table}")
+    op.execute("DROP FUNCTION bump_table_version()")
+    op.drop_table("table_versions")
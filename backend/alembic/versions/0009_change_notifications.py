@@ -0,0 +1,61 @@
+"""NOTIFY triggers for the change feed
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 00:00:08
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHANNEL = "prospector_changes"
+NOTIFIED_TABLES = ("job_leads", "job_applications", "stage_history")
+
+
+def upgrade() -> None:
+    # Row-level so subscribers learn which row changed. NOTIFY is delivered on commit
+    # and identical payloads within one transaction are sent once.
+    op.execute(f"""
+        CREATE FUNCTION notify_change() RETURNS trigger AS $$
+        DECLARE
+            changed record;
+            payload jsonb;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed := OLD;
+            ELSE
+                changed := NEW;
+            END IF;
+            payload := jsonb_build_object('type', 'change', 'table', TG_TABLE_NAME, 'op', lower(TG_OP), 'id', changed.id);
+            IF TG_TABLE_NAME = 'stage_history' THEN
+                -- Stages are stored by enum name; the API speaks the lower-case values
+                payload := payload || jsonb_build_object(
+                    'job_application_id', changed.job_application_id,
+                    'new_stage', lower(changed.new_stage::text)
+                );
+            END IF;
+            PERFORM pg_notify('{CHANNEL}', payload::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in NOTIFIED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_change
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION notify_change()
+        """)
+
+
+def downgrade() -> None:
+    for table in NOTIFIED_TABLES:
+        op.execute(f"DROP TRIGGER {table}_notify_change ON {table}")
+    op.execute("DROP FUNCTION notify_change()")
@@ -0,0 +1,29 @@
+"""key stored resume matches by resume content hash
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 00:00:09
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows get no hash and are re-analyzed once on next use
+    op.add_column("lead_resume_matches", sa.Column("resume_content_hash", sa.String(64), nullable=True))
+    op.drop_column("lead_resume_matches", "resume_updated_at")
+
+
+def downgrade() -> None:
+    op.add_column("lead_resume_matches", sa.Column("resume_updated_at", sa.DateTime(), nullable=True))
+    op.drop_column("lead_resume_matches", "resume_content_hash")
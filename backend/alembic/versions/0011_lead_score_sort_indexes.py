@@ -0,0 +1,37 @@
+"""index lead scores with NULL as -Infinity for keyset pagination
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 00:00:10
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCORE_COLUMNS = (("ix_job_leads_match_percentage_id", "match_percentage"), ("ix_job_leads_prescore_id", "prescore"))
+
+
+def upgrade() -> None:
+    # A cursor filter over "DESC NULLS LAST" needs an OR for the NULL tail, which Postgres
+    # cannot use as an index range start; coalescing NULL to -Infinity keeps it one row comparison
+    for name, column in SCORE_COLUMNS:
+        op.drop_index(name, table_name="job_leads")
+        op.create_index(
+            name, "job_leads",
+            [sa.text(f"coalesce({column}, '-Infinity'::float8) DESC"), sa.text("id DESC")]
+        )
+
+
+def downgrade() -> None:
+    for name, column in SCORE_COLUMNS:
+        op.drop_index(name, table_name="job_leads")
+        op.create_index(name, "job_leads", [sa.text(f"{column} DESC NULLS LAST"), sa.text("id DESC")])
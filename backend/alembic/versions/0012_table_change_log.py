@@ -0,0 +1,60 @@
+"""append-only change log behind table_versions
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17 00:00:11
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "table_changes",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False, server_default=sa.text("(now() AT TIME ZONE 'utc')")),
+    )
+    op.create_index("ix_table_changes_table_name_changed_at", "table_changes", ["table_name", "changed_at"])
+
+    # Updating the single counter row serialized every writer of a table on its row lock.
+    # Each write statement now appends a row instead, which never waits on other writers;
+    # a table's version is its folded counter plus its rows still in the log.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_changes (table_name) VALUES (TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        UPDATE table_versions v
+        SET version = v.version + c.n, changed_at = greatest(v.changed_at, c.changed_at)
+        FROM (SELECT table_name, count(*) AS n, max(changed_at) AS changed_at FROM table_changes GROUP BY table_name) c
+        WHERE v.table_name = c.table_name
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE table_versions
+            SET version = version + 1, changed_at = now() AT TIME ZONE 'utc'
+            WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.drop_table("table_changes")
@@ -0,0 +1,135 @@
+"""statement-level NOTIFY triggers for the change feed
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17 00:00:12
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0013"
+down_revision: Union[str, None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHANNEL = "prospector_changes"
+NOTIFIED_TABLES = ("job_leads", "job_applications", "stage_history")
+
+# Columns only the server maintains; updates touching nothing else are not sent
+IGNORED_COLUMNS = {"job_leads": ("prescore", "prescore_vector", "minhash", "updated_at")}
+
+# Larger statements send the count only, which keeps payloads far below NOTIFY's 8000 bytes
+MAX_LISTED_IDS = 200
+
+
+def upgrade() -> None:
+    for table in NOTIFIED_TABLES:
+        op.execute(f"DROP TRIGGER {table}_notify_change ON {table}")
+
+    # One notification per statement instead of one per row, so bulk ingest, bulk stage
+    # changes and prescore refreshes no longer flood listeners. A trigger WHEN clause
+    # cannot see rows at statement level, so updates are filtered here instead: a row
+    # counts only if it differs outside the columns passed as trigger arguments.
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION notify_change() RETURNS trigger AS $$
+        DECLARE
+            ids bigint[];
+            stages jsonb;
+            payload jsonb;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT array_agg(id ORDER BY id) INTO ids FROM new_rows;
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT array_agg(id ORDER BY id) INTO ids FROM old_rows;
+            ELSE
+                SELECT array_agg(n.id ORDER BY n.id) INTO ids
+                FROM new_rows n JOIN old_rows o ON o.id = n.id
+                WHERE to_jsonb(n) - coalesce(TG_ARGV, '{{}}') IS DISTINCT FROM to_jsonb(o) - coalesce(TG_ARGV, '{{}}');
+            END IF;
+            IF ids IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            payload := jsonb_build_object(
+                'type', 'change', 'table', TG_TABLE_NAME, 'op', lower(TG_OP), 'count', cardinality(ids)
+            );
+            IF cardinality(ids) <= {MAX_LISTED_IDS} THEN
+                payload := payload || jsonb_build_object('ids', to_jsonb(ids));
+                IF TG_TABLE_NAME = 'stage_history' THEN
+                    -- Application ids by the stage they moved to, in the API's lower-case values
+                    IF TG_OP = 'DELETE' THEN
+                        SELECT jsonb_object_agg(stage, application_ids) INTO stages FROM (
+                            SELECT lower(new_stage::text) AS stage, jsonb_agg(DISTINCT job_application_id) AS application_ids
+                            FROM old_rows GROUP BY 1
+                        ) s;
+                    ELSE
+                        SELECT jsonb_object_agg(stage, application_ids) INTO stages FROM (
+                            SELECT lower(new_stage::text) AS stage, jsonb_agg(DISTINCT job_application_id) AS application_ids
+                            FROM new_rows WHERE id = ANY(ids) GROUP BY 1
+                        ) s;
+                    END IF;
+                    payload := payload || jsonb_build_object('stages', stages);
+                END IF;
+            END IF;
+            PERFORM pg_notify('{CHANNEL}', payload::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in NOTIFIED_TABLES:
+        ignored = ", ".join(f"'{column}'" for column in IGNORED_COLUMNS.get(table, ()))
+        # Transition tables need one trigger per event
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_insert
+            AFTER INSERT ON {table} REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_change()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_update
+            AFTER UPDATE ON {table} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_change({ignored})
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_delete
+            AFTER DELETE ON {table} REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_change()
+        """)
+
+
+def downgrade() -> None:
+    for table in NOTIFIED_TABLES:
+        for event in ("insert", "update", "delete"):
+            op.execute(f"DROP TRIGGER {table}_notify_{event} ON {table}")
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION notify_change() RETURNS trigger AS $$
+        DECLARE
+            changed record;
+            payload jsonb;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed := OLD;
+            ELSE
+                changed := NEW;
+            END IF;
+            payload := jsonb_build_object('type', 'change', 'table', TG_TABLE_NAME, 'op', lower(TG_OP), 'id', changed.id);
+            IF TG_TABLE_NAME = 'stage_history' THEN
+                payload := payload || jsonb_build_object(
+                    'job_application_id', changed.job_application_id,
+                    'new_stage', lower(changed.new_stage::text)
+                );
+            END IF;
+            PERFORM pg_notify('{CHANNEL}', payload::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in NOTIFIED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_change
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION notify_change()
+        """)
@@ -0,0 +1,28 @@
+"""heartbeat for running AI jobs
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-17 00:00:13
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0014"
+down_revision: Union[str, None] = "0013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("ai_jobs", sa.Column("heartbeat_at", sa.DateTime(), nullable=True))
+    # Jobs running during the upgrade are judged by when they started, as before
+    op.execute("UPDATE ai_jobs SET heartbeat_at = started_at WHERE status = 'RUNNING'")
+
+
+def downgrade() -> None:
+    op.drop_column("ai_jobs", "heartbeat_at")
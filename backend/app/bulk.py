@@ -0,0 +1,34 @@
+"""
+Set-based writes of many rows.
+
+A list of parameter dicts passed to execute() runs as executemany, which with psycopg2
+is one UPDATE per row: one round trip, and one firing of every statement-level trigger
+(table change log, change feed), per row. update_by_id sends the whole batch as a single
+UPDATE ... FROM (VALUES ...) instead.
+"""
+from typing import Any, Dict, Iterable, List
+from sqlalchemy import cast, column, func, update, values
+from sqlalchemy.orm import Session
+
+
+def update_by_id(db: Session, model, rows: List[Dict[str, Any]], keep_when_null: Iterable[str] = ()):
+    """
+    Update rows of model by id with one statement. Every row dict has the same keys,
+    "id" among them; columns in keep_when_null keep their stored value where a row has None.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    names = list(rows[0])
+    data = values(*(column(name, table.c[name].type) for name in names), name="v").data(
+        [tuple(row[name] for name in names) for row in rows]
+    )
+    keep_when_null = set(keep_when_null)
+    assignments = {}
+    for name in names:
+        if name == "id":
+            continue
+        # A VALUES column that is NULL in every row would otherwise be typed as text
+        value = cast(data.c[name], table.c[name].type)
+        assignments[name] = func.coalesce(value, table.c[name]) if name in keep_when_null else value
+    db.execute(update(table).where(table.c.id == data.c.id).values(assignments))
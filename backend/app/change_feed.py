@@ -0,0 +1,162 @@
+"""
+Change feed from Postgres LISTEN/NOTIFY.
+
+Triggers on job_leads, job_applications and stage_history NOTIFY a small JSON
+payload per write statement, listing the changed ids, when the writing transaction
+commits. Updates of server-maintained lead columns (prescores, MinHash signatures)
+are not sent. Each API process
+holds one dedicated LISTEN connection, read from the event loop without a thread,
+and fans every notification out to the subscribers of /api/events.
+
+Notifications are not stored: a subscriber that falls behind, or any subscriber
+while the connection is being re-established, gets a resync event instead and
+should refetch what it shows.
+"""
+import asyncio
+import json
+import logging
+from typing import Optional, Set
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy.engine import make_url
+from app.config import Settings
+
+logger = logging.getLogger("app.change_feed")
+
+CHANNEL = "prospector_changes"
+
+# Tables with notify_change triggers (migrations 0009 and 0013)
+TABLES = ("job_leads", "job_applications", "stage_history")
+
+RESYNC = json.dumps({"type": "resync"})
+
+
+def _connect(database_url: str):
+    url = make_url(database_url)
+    conn = psycopg2.connect(**url.translate_connect_args(username="user", database="dbname"), **url.query)
+    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    with conn.cursor() as cursor:
+        cursor.execute(f"LISTEN {CHANNEL}")
+    return conn
+
+
+class Subscription:
+    """Queue of encoded events for one client, optionally limited to some tables"""
+
+    def __init__(self, tables: Optional[Set[str]], max_size: int):
+        self.tables = tables
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(max_size)
+
+    def offer(self, table: Optional[str], data: str):
+        if table is not None and self.tables is not None and table not in self.tables:
+            return
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            # Too far behind to catch up event by event; tell it to refetch instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self, timeout: float) -> Optional[str]:
+        """The next event, or None if nothing arrived within timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ChangeFeed:
+    """The process-wide LISTEN connection and its subscribers"""
+
+    def __init__(self, settings: Settings):
+        self.database_url = settings.change_feed_database_url or settings.database_url
+        self.queue_size = settings.change_feed_queue_size
+        self.reconnect_seconds = settings.change_feed_reconnect_seconds
+        self.subscribers: Set[Subscription] = set()
+        self.received = 0
+        self._conn = None
+        self._fd: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lost: Optional[asyncio.Event] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._lost = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._disconnect()
+
+    def subscribe(self, tables: Optional[Set[str]] = None) -> Subscription:
+        subscription = Subscription(tables, self.queue_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def stats(self):
+        return {"connected": self.connected, "subscribers": len(self.subscribers), "notifications": self.received}
+
+    async def _run(self):
+        """Keep one LISTEN connection open, reconnecting with a pause after failures"""
+        while True:
+            try:
+                # Connecting blocks, so it happens off the event loop
+                self._conn = await asyncio.to_thread(_connect, self.database_url)
+            except Exception:
+                logger.exception("Change feed could not connect; retrying in %ss", self.reconnect_seconds)
+                await asyncio.sleep(self.reconnect_seconds)
+                continue
+            self._lost.clear()
+            self._fd = self._conn.fileno()
+            self._loop.add_reader(self._fd, self._read)
+            # Anything committed while we were not listening was missed
+            self._broadcast(None, RESYNC)
+            await self._lost.wait()
+            self._disconnect()
+            await asyncio.sleep(self.reconnect_seconds)
+
+    def _read(self):
+        try:
+            self._conn.poll()
+        except psycopg2.Error:
+            logger.warning("Change feed connection lost", exc_info=True)
+            self._lost.set()
+            return
+        notifies = self._conn.notifies
+        while notifies:
+            payload = notifies.pop(0).payload
+            try:
+                table = json.loads(payload).get("table")
+            except ValueError:
+                continue
+            self._broadcast(table, payload)
+
+    def _broadcast(self, table: Optional[str], data: str):
+        for subscription in list(self.subscribers):
+            subscription.offer(table, data)
+        if table is not None:
+            self.received += 1
+
+    def _disconnect(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        self._loop.remove_reader(self._fd)
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
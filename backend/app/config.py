@@ -1,12 +1,107 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List, Literal
 
 
 class Settings(BaseSettings):
     database_url: str = "postgresql://prospector:prospector_dev_password@db:5432/prospector"
+
+    # Database connection pool
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 30000
+    db_pgbouncer_mode: bool = False
+
     openrouter_api_key: str = ""
     openrouter_model: str = "anthropic/claude-3.5-sonnet"
     openrouter_base_url: str = "https://openrouter.ai/api/v1"
+    # Tried in order when the primary model keeps failing, e.g. ["openai/gpt-4o-mini"]
+    openrouter_fallback_models: List[str] = []
+
+    # Retries, shared rate limit and circuit breaker around every OpenRouter call
+    openrouter_max_retries: int = 3
+    openrouter_retry_base_seconds: float = 0.5
+    openrouter_retry_max_seconds: float = 20.0
+    openrouter_rate_per_second: float = 5.0
+    openrouter_rate_burst: int = 10
+    openrouter_circuit_failure_threshold: int = 5
+    openrouter_circuit_reset_seconds: float = 30.0
+
+    # Shared HTTP client used for all OpenRouter calls
+    openrouter_http2: bool = True
+    openrouter_max_connections: int = 100
+    openrouter_max_keepalive_connections: int = 20
+    openrouter_keepalive_expiry: float = 30.0
+    openrouter_connect_timeout: float = 10.0
+    openrouter_read_timeout: float = 60.0
+    openrouter_write_timeout: float = 10.0
+    openrouter_pool_timeout: float = 10.0
+
+    # Content-addressed cache of LLM results
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_seconds: int = 30 * 24 * 3600
+    llm_cache_max_entries: int = 10000
+    llm_cache_memory_entries: int = 256
+    # Database hits refresh an entry's access time (and hit count) at most this often
+    llm_cache_touch_interval_seconds: int = 3600
+    # Expired and least recently used rows are evicted by at most one set per interval
+    llm_cache_evict_interval_seconds: float = 300.0
+
+    # Job ads and resumes are stripped of boilerplate and cut to these estimated token budgets before prompting
+    prompt_compaction_enabled: bool = True
+    prompt_job_ad_token_budget: int = 1500
+    prompt_resume_token_budget: int = 2500
+
+    # Bulk lead analysis
+    batch_analyze_concurrency: int = 8
+    batch_analyze_rate_per_second: float = 2.0
+    batch_analyze_commit_size: int = 25
+
+    # Bulk lead ingestion (POST /api/leads/bulk and python -m app.ingest)
+    bulk_ingest_chunk_size: int = 500
+    bulk_ingest_max_errors: int = 1000
+
+    # Conditional GETs: how long this process serves a cached response without checking the
+    # table change counters, and how many responses it keeps
+    response_cache_ttl_seconds: float = 2.0
+    response_cache_max_entries: int = 256
+    # How often the worker folds the table change log into the per-table counters
+    table_changes_fold_interval_seconds: float = 30.0
+
+    # Change feed (GET /api/events) over one LISTEN connection per process. Behind PgBouncer in
+    # transaction mode, point change_feed_database_url at Postgres directly, since LISTEN needs a session.
+    change_feed_enabled: bool = True
+    change_feed_database_url: str = ""
+    change_feed_heartbeat_seconds: float = 15.0
+    change_feed_queue_size: int = 1000
+    change_feed_reconnect_seconds: float = 5.0
+
+    # Rows fetched per server-side cursor round trip in /api/export
+    export_chunk_size: int = 1000
+
+    # Near-duplicate lead detection: off, link, merge or reject
+    lead_dedup_action: Literal["off", "link", "merge", "reject"] = "link"
+    lead_dedup_threshold: float = 0.85
+
+    # Background AI job worker (python -m app.worker)
+    ai_worker_concurrency: int = 4
+    ai_worker_poll_interval: float = 1.0
+    ai_job_max_attempts: int = 3
+    ai_job_retry_base_seconds: float = 5.0
+    # Running jobs refresh a heartbeat; one silent for ai_job_stale_after_seconds belongs
+    # to a dead worker and is claimed again, so keep it several heartbeats long
+    ai_job_heartbeat_seconds: float = 30.0
+    ai_job_stale_after_seconds: int = 300
+
+    # How often the worker checks whether the analytics views need a refresh
+    analytics_refresh_interval_seconds: float = 60.0
+
+    # The worker moves applications left in "applied" this many days to "no_answer"; 0 disables
+    auto_ghost_after_days: int = 0
+    auto_ghost_interval_seconds: float = 3600.0
 
     class Config:
         env_file = ".env"
@@ -1,15 +1,55 @@
-from sqlalchemy import create_engine
+from typing import Any, Callable, Dict, TypeVar
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.config import get_settings
+from sqlalchemy.pool import NullPool, QueuePool
+from starlette.concurrency import run_in_threadpool
+from app.config import Settings, get_settings
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url)
+
+def _engine_options(settings: Settings) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if settings.db_pgbouncer_mode:
+        # PgBouncer owns the pooling; keeping our own pool on top just pins server connections
+        options["poolclass"] = NullPool
+        return options
+
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    if settings.db_statement_timeout_ms and make_url(settings.database_url).get_backend_name() == "postgresql":
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    return options
+
+
+def create_db_engine(settings: Settings) -> Engine:
+    engine = create_engine(settings.database_url, **_engine_options(settings))
+    if settings.db_pgbouncer_mode and settings.db_statement_timeout_ms:
+        timeout_ms = int(settings.db_statement_timeout_ms)
+
+        # PgBouncer rejects startup options and may hand each transaction a different
+        # server connection, so the timeout is set per transaction instead
+        @event.listens_for(engine, "begin")
+        def _set_statement_timeout(conn):
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+    return engine
+
+
+engine = create_db_engine(settings)
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+T = TypeVar("T")
+
 
 def get_db():
     db = SessionLocal()
@@ -17,3 +57,33 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def run_db(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run func(db, *args, **kwargs) with its own Session in the threadpool.
+    Async code must go through this so blocking database I/O never runs on the event loop.
+    """
+    def call() -> T:
+        db = SessionLocal()
+        try:
+            return func(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    return await run_in_threadpool(call)
+
+
+def pool_status() -> Dict[str, Any]:
+    """Connection pool usage of this process, for sizing the pool per replica"""
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=settings.db_max_overflow,
+        )
+    return status
@@ -0,0 +1,99 @@
+"""
+Deduplicate existing job leads in one streaming pass and rebuild the LSH band index.
+
+Leads are read oldest first through a server-side cursor, so the first copy of a
+posting stays canonical and memory holds only signatures, not ads. Merging keeps a
+deleted copy's match analysis on the original when the original has none.
+
+Run with: python -m app.dedup [--action link|merge] [--threshold 0.85]
+"""
+import argparse
+import logging
+from sqlalchemy import case, delete, func, insert, select, update
+from app.config import get_settings
+from app.database import SessionLocal
+from app import models
+from app.services.dedup import (
+    ANALYSIS_FIELDS, LSHIndex, MERGE_FIELDS, band_buckets, carry_over_resume_matches, from_bytes, signature, to_bytes
+)
+
+logger = logging.getLogger("app.dedup")
+
+
+def dedupe_leads(action: str, threshold: float, chunk_size: int = 1000) -> dict:
+    """Link or merge every near-duplicate lead into its oldest copy"""
+    index = LSHIndex()
+    scanned = duplicates = 0
+    read_db = SessionLocal()
+    write_db = SessionLocal()
+    try:
+        write_db.execute(delete(models.LeadLSHBand))
+        columns = [models.JobLead.id, models.JobLead.job_ad_content, models.JobLead.minhash, *(
+            getattr(models.JobLead, field) for field in MERGE_FIELDS + ANALYSIS_FIELDS
+        )]
+        result = read_db.execute(
+            select(*columns).order_by(models.JobLead.id).execution_options(yield_per=chunk_size)
+        )
+        for rows in result.partitions():
+            lead_updates, band_rows, merged = [], [], []
+            for row in rows:
+                sig = from_bytes(row.minhash) if row.minhash is not None else signature(row.job_ad_content)
+                buckets = band_buckets(sig)
+                match = index.best_match(sig, buckets, threshold)
+                if match and action == "merge":
+                    # Fill gaps on the original, then drop the copy
+                    values = {
+                        field: func.coalesce(getattr(models.JobLead, field), getattr(row, field))
+                        for field in MERGE_FIELDS if getattr(row, field) is not None
+                    }
+                    if row.match_percentage is not None:
+                        unanalyzed = models.JobLead.match_percentage.is_(None)
+                        values.update({
+                            field: case((unanalyzed, getattr(row, field)), else_=getattr(models.JobLead, field))
+                            for field in ANALYSIS_FIELDS
+                        })
+                    if values:
+                        write_db.execute(update(models.JobLead).where(models.JobLead.id == match[0]).values(values))
+                    merged.append((row.id, match[0]))
+                elif match:
+                    lead_updates.append({"id": row.id, "minhash": to_bytes(sig), "duplicate_of_id": match[0]})
+                else:
+                    index.add(row.id, sig, buckets)
+                    lead_updates.append({"id": row.id, "minhash": to_bytes(sig), "duplicate_of_id": None})
+                    band_rows.extend({"band": band, "bucket": bucket, "lead_id": row.id} for band, bucket in buckets)
+                duplicates += match is not None
+            scanned += len(rows)
+
+            if lead_updates:
+                write_db.execute(update(models.JobLead), lead_updates)
+            if band_rows:
+                write_db.execute(insert(models.LeadLSHBand), band_rows)
+            if merged:
+                carry_over_resume_matches(write_db, merged)
+                write_db.execute(delete(models.JobLead).where(models.JobLead.id.in_([lead_id for lead_id, _ in merged])))
+            write_db.commit()
+            logger.info("Scanned %d leads, %d duplicates", scanned, duplicates)
+        write_db.commit()
+    finally:
+        read_db.close()
+        write_db.close()
+    return {"scanned": scanned, "duplicates": duplicates}
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Deduplicate existing job leads")
+    parser.add_argument("--action", choices=("link", "merge"), default="link",
+                        help="link duplicates to the original, or merge them into it and delete them")
+    parser.add_argument("--threshold", type=float, default=settings.lead_dedup_threshold,
+                        help="Minimum estimated Jaccard similarity of two ads to count as duplicates")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    counts = dedupe_leads(args.action, args.threshold, args.chunk_size)
+    logger.info("Done: %(scanned)d leads scanned, %(duplicates)d duplicates", counts)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    main()
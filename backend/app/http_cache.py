@@ -0,0 +1,238 @@
+"""
+Conditional GETs for the JSON API.
+
+Every write statement on a table behind the API appends a row to table_changes
+(a statement-level trigger), visible once the writing transaction commits. A table's
+version is its counter in table_versions plus its rows still in the log; the worker
+periodically folds the log into the counters, which leaves versions unchanged.
+Appending never waits on other writers, unlike updating one counter row would.
+
+A GET's ETag hashes its URL with the versions of the tables it reads, so answering
+If-None-Match costs one small query instead of loading and serializing rows.
+
+Responses are also kept in a small in-process cache. Within the TTL they are served
+without touching the database; after it they are reused as long as the versions
+still match. Every commit made by this process clears the cache, as does the end of
+every write request.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event, func, select, text
+from sqlalchemy.orm import Session
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from app import models
+from app.config import get_settings
+from app.database import SessionLocal, run_db
+
+# Path prefix -> tables whose changes can alter the response
+CACHED_PATHS = (
+    ("/api/leads", ("job_leads",)),
+    ("/api/applications", ("job_applications", "stage_history")),
+    ("/api/resumes", ("resumes",)),
+    ("/api/search", ("job_leads", "job_applications")),
+)
+
+# Browsers and nginx must revalidate every time; a 304 is the cheap path
+CACHE_CONTROL = "no-cache"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def tables_for(path: str) -> Optional[Tuple[str, ...]]:
+    for prefix, tables in CACHED_PATHS:
+        if path == prefix or path.startswith(prefix + "/"):
+            return tables
+    return None
+
+
+def read_versions(db: Session, tables: Tuple[str, ...]) -> Tuple[Tuple[int, ...], Optional[datetime]]:
+    """Versions of the given tables, in order, and when the latest change happened"""
+    counter, log = models.TableVersion, models.TableChange
+    same_table = log.table_name == counter.table_name
+    # One statement, so a concurrent fold is seen either entirely or not at all
+    rows = {
+        row.table_name: row
+        for row in db.execute(
+            select(
+                counter.table_name,
+                (counter.version + select(func.count()).where(same_table).scalar_subquery()).label("version"),
+                # greatest() ignores the NULL max of an empty log
+                func.greatest(
+                    counter.changed_at, select(func.max(log.changed_at)).where(same_table).scalar_subquery()
+                ).label("changed_at"),
+            ).where(counter.table_name.in_(tables))
+        )
+    }
+    versions = tuple(rows[table].version if table in rows else 0 for table in tables)
+    changed_at = max((row.changed_at for row in rows.values()), default=None)
+    return versions, changed_at
+
+
+def fold_table_changes(db: Session) -> int:
+    """Move logged changes into the per-table counters; returns how many were folded"""
+    folded = db.execute(text("""
+        WITH moved AS (
+            DELETE FROM table_changes RETURNING table_name, changed_at
+        ), totals AS (
+            SELECT table_name, count(*) AS changes, max(changed_at) AS changed_at FROM moved GROUP BY table_name
+        )
+        UPDATE table_versions v
+        SET version = v.version + totals.changes, changed_at = greatest(v.changed_at, totals.changed_at)
+        FROM totals
+        WHERE v.table_name = totals.table_name
+        RETURNING totals.changes
+    """)).scalars().all()
+    db.commit()
+    return sum(folded)
+
+
+def make_etag(key: str, versions: Tuple[int, ...]) -> str:
+    digest = hashlib.sha1(f"{key}|{versions}".encode("utf-8")).hexdigest()[:20]
+    # Weak, since nginx gzips the body on the way out
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" are the same validator
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (candidate[2:] if candidate.startswith("W/") else candidate) == opaque
+        for candidate in (part.strip() for part in header.split(","))
+    )
+
+
+class _Entry:
+    def __init__(self, etag: str, body: bytes, headers: Dict[str, str], expires_at: float):
+        self.etag = etag
+        self.body = body
+        self.headers = headers
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """LRU of recent GET responses by URL, dropped wholesale whenever this process handles a write"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fresh(self, key: str) -> Optional[_Entry]:
+        """The cached response if it is within its TTL"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at < time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def revalidate(self, key: str, etag: str) -> Optional[_Entry]:
+        """The cached response if it is still current, renewing its TTL"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.etag != etag:
+                return None
+            entry.expires_at = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, etag: str, body: bytes, headers: Dict[str, str], generation: int):
+        with self._lock:
+            # A write finished while this response was built; it may already be stale
+            if generation != self.generation:
+                return
+            self._entries[key] = _Entry(etag, body, headers, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+@lru_cache()
+def get_response_cache() -> ResponseCache:
+    settings = get_settings()
+    return ResponseCache(settings.response_cache_ttl_seconds, settings.response_cache_max_entries)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_on_commit(session):
+    # Streams, background tasks and threadpool jobs commit after their response has started
+    get_response_cache().invalidate()
+
+
+class ConditionalGetMiddleware(BaseHTTPMiddleware):
+    """Adds ETag, Last-Modified and Cache-Control to API reads and answers If-None-Match with 304"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.cache = get_response_cache()
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        path = request.url.path
+        if request.method not in SAFE_METHODS:
+            response = await call_next(request)
+            if path.startswith("/api/"):
+                self.cache.invalidate()
+                response.body_iterator = self._invalidate_when_done(response.body_iterator)
+            return response
+
+        tables = tables_for(path)
+        if request.method != "GET" or tables is None:
+            return await call_next(request)
+
+        key = f"{path}?{request.url.query}"
+        generation = self.cache.generation
+        entry = self.cache.fresh(key)
+        if entry is not None:
+            etag = entry.etag
+            validators = {
+                name: value for name, value in entry.headers.items() if name in ("etag", "last-modified", "cache-control")
+            }
+        else:
+            versions, changed_at = await run_db(read_versions, tables)
+            etag = make_etag(key, versions)
+            validators = {"etag": etag, "cache-control": CACHE_CONTROL}
+            if changed_at is not None:
+                validators["last-modified"] = format_datetime(changed_at.replace(tzinfo=timezone.utc), usegmt=True)
+            entry = self.cache.revalidate(key, etag)
+
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=validators)
+        if entry is not None:
+            return Response(entry.body, headers=entry.headers)
+
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+        headers.update(validators)
+        self.cache.put(key, etag, body, headers, generation)
+        return Response(body, headers=headers)
+
+    async def _invalidate_when_done(self, body):
+        """Pass a write's body through, clearing the cache again once it has been sent"""
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            self.cache.invalidate()
@@ -0,0 +1,56 @@
+"""
+Import job leads from an NDJSON or CSV file without going through the API.
+
+Run with: python -m app.ingest leads.ndjson [--format csv] [--chunk-size 500]
+Use - as the path to read from stdin.
+"""
+import argparse
+import json
+import logging
+import sys
+from app.database import SessionLocal
+from app.services.ingest import FORMATS, IngestFormatError, ingest_leads, iter_lines
+
+logger = logging.getLogger("app.ingest")
+
+READ_SIZE = 64 * 1024
+
+
+def read_chunks(stream):
+    while True:
+        chunk = stream.read(READ_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import job leads")
+    parser.add_argument("path", help="NDJSON or CSV file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults from the file extension, else ndjson")
+    parser.add_argument("--chunk-size", type=int, help="Rows per INSERT and transaction")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    db = SessionLocal()
+    try:
+        result = ingest_leads(db, iter_lines(read_chunks(stream)), fmt, args.chunk_size)
+    except IngestFormatError as e:
+        parser.error(str(e))
+    finally:
+        db.close()
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+    for error in result["errors"]:
+        print(json.dumps(error), file=sys.stderr)
+    logger.info(
+        "Received %(received)d rows: %(inserted)d inserted, %(duplicates)d duplicates, %(failed)d failed", result
+    )
+    sys.exit(1 if result["failed"] else 0)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    main()
@@ -1,17 +1,51 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routers import job_applications, job_leads, resumes
+from sqlalchemy import text
+from app.change_feed import ChangeFeed
+from app.config import get_settings
+from app.database import engine, pool_status
+from app.http_cache import ConditionalGetMiddleware
+from app.pagination import NEXT_CURSOR_HEADER
+from app.routers import ai_jobs, analytics, events, export, job_applications, job_leads, resumes, search
+from app.services.http_client import create_http_client
+from app.services.llm_cache import get_llm_cache
+from app.services.prompt_compaction import compaction_stats
+from app.services.resilience import ResiliencePolicy
+
+# Database schema is managed by Alembic: run `alembic upgrade head` before starting
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP client for the whole app lifetime
+    app.state.http_client = create_http_client(get_settings())
+    # Shared so the rate limit and circuit breakers cover all concurrent requests
+    app.state.openrouter_resilience = ResiliencePolicy(get_settings())
+    # One LISTEN connection per process, shared by every /api/events subscriber
+    app.state.change_feed = ChangeFeed(get_settings()) if get_settings().change_feed_enabled else None
+    if app.state.change_feed is not None:
+        app.state.change_feed.start()
+    try:
+        yield
+    finally:
+        if app.state.change_feed is not None:
+            await app.state.change_feed.stop()
+        await app.state.http_client.aclose()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Prospector API",
     description="AI-powered job application management system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# ETags and 304s for API reads; added first so CORS wraps it
+app.add_middleware(ConditionalGetMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -19,12 +53,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
 app.include_router(resumes.router)
 app.include_router(job_applications.router)
 app.include_router(job_leads.router)
+app.include_router(ai_jobs.router)
+app.include_router(search.router)
+app.include_router(export.router)
+app.include_router(analytics.router)
+app.include_router(events.router)
 
 
 @app.get("/")
@@ -39,3 +79,42 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/health/db")
+def db_health_check():
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {str(e)}")
+    return {"status": "healthy", "pool": pool_status()}
+
+
+@app.get("/health/llm-cache")
+def llm_cache_stats():
+    return get_llm_cache().stats()
+
+
+@app.get("/health/prompt-compaction")
+def prompt_compaction_stats():
+    """Estimated prompt tokens saved by compacting job ads and resumes"""
+    return compaction_stats.stats()
+
+
+@app.get("/health/change-feed")
+def change_feed_health():
+    """Whether the LISTEN connection is up, and how many clients follow /api/events"""
+    if app.state.change_feed is None:
+        return {"enabled": False}
+    return {"enabled": True, **app.state.change_feed.stats()}
+
+
+@app.get("/health/openrouter")
+def openrouter_health():
+    """Circuit breaker state per model used so far"""
+    breakers = app.state.openrouter_resilience.breakers
+    return {
+        model: {"state": breaker.state, "consecutive_failures": breaker.failures}
+        for model, breaker in breakers.items()
+    }
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Boolean, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import func, literal_column, Column, Integer, BigInteger, SmallInteger, String, Text, DateTime, Float, ForeignKey, Boolean, JSON, Index, Computed, Identity, LargeBinary, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 import enum
 from app.database import Base
@@ -14,6 +15,13 @@ class JobStage(str, enum.Enum):
     NO_ANSWER = "no_answer"
 
 
+class AIJobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
 class Resume(Base):
     __tablename__ = "resumes"
 
@@ -24,6 +32,13 @@ class Resume(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Hashed term vector (float32 bytes) used to pre-score leads; cleared when content changes
+    prescore_vector = deferred(Column(LargeBinary, nullable=True))
+
+    __table_args__ = (
+        Index("ix_resumes_active", id, postgresql_where=(is_active == True)),
+    )
+
 
 class JobApplication(Base):
     __tablename__ = "job_applications"
@@ -42,8 +57,27 @@ class JobApplication(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Full-text search document maintained by Postgres; deferred so it is never loaded with the row
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('english', coalesce(company_name, '') || ' ' || coalesce(role_name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(notes, '') || ' ' || coalesce(application_notes, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(job_ad_content, '')), 'C') || "
+        "setweight(to_tsvector('english', coalesce(match_reasoning, '')), 'D')",
+        persisted=True
+    )))
+
     stage_history = relationship("StageHistory", back_populates="job_application", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_job_applications_search_vector", search_vector, postgresql_using="gin"),
+        Index("ix_job_applications_created_at_id", created_at.desc(), id.desc()),
+        Index("ix_job_applications_stage_created_at_id", stage, created_at.desc(), id.desc()),
+        Index(
+            "ix_job_applications_company_name_trgm", company_name,
+            postgresql_using="gin", postgresql_ops={"company_name": "gin_trgm_ops"}
+        ),
+    )
+
 
 class StageHistory(Base):
     __tablename__ = "stage_history"
@@ -56,6 +90,18 @@ class StageHistory(Base):
 
     job_application = relationship("JobApplication", back_populates="stage_history")
 
+    __table_args__ = (
+        Index("ix_stage_history_job_application_id_changed_at", job_application_id, changed_at),
+    )
+
+
+def score_sort_key(column):
+    """
+    column with NULL read as -Infinity. Sorting on it DESC puts unscored rows last, and
+    unlike NULLS LAST a single row comparison can continue a keyset page into them.
+    """
+    return func.coalesce(column, literal_column("'-Infinity'::float8"))
+
 
 class JobLead(Base):
     __tablename__ = "job_leads"
@@ -67,7 +113,112 @@ class JobLead(Base):
     job_url = Column(String, nullable=True)
     match_percentage = Column(Float, nullable=True)
     match_reasoning = Column(Text, nullable=True)
+    prescore = Column(Float, nullable=True)  # Local similarity to the active resume, 0-100
+    prescore_vector = deferred(Column(LargeBinary, nullable=True))
+    minhash = deferred(Column(LargeBinary, nullable=True))  # MinHash signature of job_ad_content
+    duplicate_of_id = Column(Integer, ForeignKey("job_leads.id", ondelete="SET NULL"), nullable=True, index=True)
     is_promoted = Column(Boolean, default=False)
     promoted_to_application_id = Column(Integer, ForeignKey("job_applications.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Full-text search document maintained by Postgres; deferred so it is never loaded with the row
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('english', coalesce(company_name, '') || ' ' || coalesce(role_name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(job_ad_content, '')), 'C') || "
+        "setweight(to_tsvector('english', coalesce(match_reasoning, '')), 'D')",
+        persisted=True
+    )))
+
+    __table_args__ = (
+        Index("ix_job_leads_search_vector", search_vector, postgresql_using="gin"),
+        Index("ix_job_leads_created_at_id", created_at.desc(), id.desc()),
+        Index("ix_job_leads_match_percentage_id", score_sort_key(match_percentage).desc(), id.desc()),
+        Index("ix_job_leads_prescore_id", score_sort_key(prescore).desc(), id.desc()),
+        Index(
+            "ix_job_leads_unpromoted_created_at_id", created_at.desc(), id.desc(),
+            postgresql_where=(is_promoted == False)
+        ),
+        Index(
+            "ix_job_leads_company_name_trgm", company_name,
+            postgresql_using="gin", postgresql_ops={"company_name": "gin_trgm_ops"}
+        ),
+    )
+
+
+class LeadLSHBand(Base):
+    """One LSH band bucket of a canonical lead's MinHash signature"""
+    __tablename__ = "lead_lsh_bands"
+
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    lead_id = Column(Integer, ForeignKey("job_leads.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+
+class LeadResumeMatch(Base):
+    """A lead's match analysis against one resume, valid while the resume is unchanged"""
+    __tablename__ = "lead_resume_matches"
+
+    lead_id = Column(Integer, ForeignKey("job_leads.id", ondelete="CASCADE"), primary_key=True)
+    resume_id = Column(Integer, ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True, index=True)
+    match_percentage = Column(Float, nullable=False)
+    match_reasoning = Column(Text, nullable=False)
+    resume_content_hash = Column(String(64), nullable=True)  # Version of the resume that was analyzed
+    analyzed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    prompt_version = Column(String, nullable=False)
+    result = Column(Text, nullable=False)  # JSON-encoded model output
+    hit_count = Column(Integer, default=0, nullable=False)  # Approximate: counted once per touch interval
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class TableVersion(Base):
+    """Change counter per table, folded from table_changes by the worker"""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class TableChange(Base):
+    """One row per write statement on a tracked table, appended by a trigger"""
+    __tablename__ = "table_changes"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    table_name = Column(String, nullable=False)
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_table_changes_table_name_changed_at", table_name, changed_at),
+    )
+
+
+class AIJob(Base):
+    __tablename__ = "ai_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(SQLEnum(AIJobStatus), nullable=False, default=AIJobStatus.PENDING)
+    payload = Column(JSON, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # Refreshed by the worker while the job runs
+    finished_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_ai_jobs_status_run_after", "status", "run_after"),
+    )
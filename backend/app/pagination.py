@@ -0,0 +1,62 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Pack the sort key of the last row on a page into an opaque URL-safe token"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """Unpack a cursor token, rejecting anything that was not produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def parse_cursor_datetime(value: Any) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_cursor_id(value: Any) -> int:
+    # bool is an int subclass, but never a row id
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value
+
+
+def parse_cursor_score(value: Any) -> float:
+    """A score from a cursor; None (an unscored row) sorts as -Infinity, see models.score_sort_key"""
+    if value is None:
+        return float("-inf")
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return float(value)
+
+
+def parse_cursor_str(value: Any) -> str:
+    if not isinstance(value, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value
+
+
+def after_desc(column, id_column, value, last_id):
+    """Rows after (value, last_id) when ordering by column DESC, id DESC"""
+    return tuple_(column, id_column) < tuple_(value, last_id)
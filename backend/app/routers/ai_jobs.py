@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app import models, schemas
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=schemas.AIJob)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    """Get the status and result of a background AI job"""
+    job = db.query(models.AIJob).filter(models.AIJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app import models, schemas
+from app.services import ai_jobs, analytics
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+
+@router.get("/funnel", response_model=List[schemas.FunnelStats])
+def get_funnel(
+    company: Optional[str] = Query(None, description="Only companies whose name contains this"),
+    by_company: bool = Query(False, description="One row per company instead of a single total"),
+    db: Session = Depends(get_db)
+):
+    """Stage funnel and conversion rates, from the periodically refreshed rollup"""
+    return analytics.funnel(db, company, by_company)
+
+
+@router.get("/stage-durations", response_model=List[schemas.StageDuration])
+def get_stage_durations(
+    company: Optional[str] = Query(None, description="Only companies whose name contains this"),
+    db: Session = Depends(get_db)
+):
+    """Average, median and 90th percentile time spent in each stage before moving on"""
+    return analytics.stage_durations(db, company)
+
+
+@router.post("/refresh", response_model=schemas.AIJob, status_code=202)
+def refresh_analytics(db: Session = Depends(get_db)):
+    """Queue a rebuild of the analytics rollups for the worker and return the job to poll"""
+    # A refresh that has not started yet will see everything committed so far
+    queued = db.query(models.AIJob).filter(
+        models.AIJob.kind == ai_jobs.REFRESH_ANALYTICS, models.AIJob.status == models.AIJobStatus.PENDING
+    ).order_by(models.AIJob.id).first()
+    return queued or ai_jobs.enqueue_job(db, ai_jobs.REFRESH_ANALYTICS, {})
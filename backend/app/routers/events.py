@@ -0,0 +1,46 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.change_feed import RESYNC, TABLES
+from app.config import get_settings
+from app.streaming import STREAM_HEADERS
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+
+@router.get("")
+async def stream_events(
+    request: Request,
+    tables: Optional[str] = Query(None, description="Comma-separated tables to follow; all of them if not specified")
+):
+    """
+    Server-sent change events, one per statement that inserted, updated or deleted leads,
+    applications or stage history rows, with their ids unless there were too many. A resync
+    event means events may have been missed and lists should be refetched.
+    """
+    feed = getattr(request.app.state, "change_feed", None)
+    if feed is None:
+        raise HTTPException(status_code=503, detail="Change feed is disabled")
+
+    wanted = None
+    if tables:
+        wanted = {table.strip() for table in tables.split(",") if table.strip()}
+        unknown = wanted.difference(TABLES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown tables: {', '.join(sorted(unknown))}")
+
+    heartbeat = get_settings().change_feed_heartbeat_seconds
+
+    async def event_stream():
+        subscription = feed.subscribe(wanted)
+        try:
+            # Only changes from now on are delivered, so the client loads its lists first
+            yield f"retry: 3000\ndata: {RESYNC}\n\n"
+            while True:
+                data = await subscription.get(heartbeat)
+                # A comment line keeps proxies from closing an idle stream
+                yield f"data: {data}\n\n" if data is not None else ": keep-alive\n\n"
+        finally:
+            feed.unsubscribe(subscription)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=STREAM_HEADERS)
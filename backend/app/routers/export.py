@@ -0,0 +1,26 @@
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.config import get_settings
+from app.services.export import export_headers, export_media_type, pq, stream_export
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+
+@router.get("/{table}")
+def export_table(
+    table: str = Path(..., pattern="^(leads|applications|history)$"),
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson|parquet)$"),
+    gzip: bool = Query(False, description="gzip CSV/NDJSON; Parquet uses gzip column compression instead of snappy"),
+    since: Optional[datetime] = Query(None, description="Only rows updated (history: changed) at or after this time"),
+):
+    """Stream a whole table for warehouse loads, in constant memory"""
+    if fmt == "parquet" and pq is None:
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+
+    return StreamingResponse(
+        stream_export(table, fmt, gzip=gzip, since=since, chunk_size=get_settings().export_chunk_size),
+        media_type=export_media_type(fmt, gzip),
+        headers=export_headers(table, fmt, gzip)
+    )
@@ -1,9 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
+from typing import List, Optional, Union
+from datetime import datetime, timedelta
 from app.database import get_db
 from app import models, schemas
+from app.pagination import (
+    NEXT_CURSOR_HEADER, after_desc, decode_cursor, encode_cursor, parse_cursor_datetime, parse_cursor_id
+)
+from app.serializers import APPLICATION_COLUMNS, APPLICATION_SUMMARY_COLUMNS, attach_stage_history, rows_to_dicts
+from app.services.applications import bulk_change_stage
 
 router = APIRouter(prefix="/api/applications", tags=["applications"])
 
@@ -11,43 +17,89 @@ router = APIRouter(prefix="/api/applications", tags=["applications"])
 @router.post("/", response_model=schemas.JobApplication)
 def create_application(application: schemas.JobApplicationCreate, db: Session = Depends(get_db)):
     """Create a new job application"""
-    db_application = models.JobApplication(**application.model_dump())
-    db.add(db_application)
-    db.commit()
-    db.refresh(db_application)
-
-    # Create initial stage history entry
-    history_entry = models.StageHistory(
-        job_application_id=db_application.id,
+    now = datetime.utcnow()
+    db_application = models.JobApplication(**application.model_dump(), created_at=now)
+    # Initial stage history entry, inserted with the application in one flush
+    db_application.stage_history = [models.StageHistory(
         previous_stage=None,
         new_stage=db_application.stage,
-        changed_at=db_application.created_at
-    )
-    db.add(history_entry)
+        changed_at=now
+    )]
+    db.add(db_application)
+    db.flush()
+
+    # Serialized before commit expires the instance, so no reload is needed
+    result = schemas.JobApplication.model_validate(db_application)
     db.commit()
-    db.refresh(db_application)
+    return result
 
-    return db_application
+
+@router.post("/bulk-stage", response_model=schemas.BulkStageChangeResult)
+def bulk_change_application_stage(change: schemas.BulkStageChangeRequest, db: Session = Depends(get_db)):
+    """Move many applications to a stage at once, by ID and/or filter, recording history for each"""
+    stage_date_before = change.stage_date_before
+    if change.stale_days is not None:
+        stale_before = datetime.utcnow() - timedelta(days=change.stale_days)
+        stage_date_before = min(stage_date_before, stale_before) if stage_date_before else stale_before
+    if change.application_ids is None and change.stage is None and stage_date_before is None and not change.company:
+        raise HTTPException(status_code=400, detail="Give application_ids or at least one filter")
+
+    moved = bulk_change_stage(
+        db, change.new_stage, change.application_ids, change.stage, stage_date_before, change.company
+    )
+    return schemas.BulkStageChangeResult(
+        new_stage=change.new_stage,
+        updated=len(moved),
+        transitions=[
+            schemas.StageTransition(job_application_id=application_id, previous_stage=previous_stage)
+            for application_id, previous_stage in moved
+        ]
+    )
 
 
-@router.get("/", response_model=List[schemas.JobApplication])
+@router.get("/", response_model=Union[
+    List[schemas.JobApplication],
+    List[schemas.JobApplicationWithoutHistory],
+    List[schemas.JobApplicationSummary]
+])
 def list_applications(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header of the previous page"),
     stage: Optional[str] = Query(None),
     company: Optional[str] = Query(None),
+    fields: str = Query("full", pattern="^(full|summary)$", description="summary omits job ad, cover letter, notes and reasoning text"),
+    include_history: bool = Query(True, description="Include stage_history for each application (ignored for fields=summary)"),
     db: Session = Depends(get_db)
 ):
-    """List all job applications with optional filters"""
-    query = db.query(models.JobApplication)
+    """List all job applications with optional filters, newest first"""
+    # Plain column rows; serialized below without building ORM objects or validating each row
+    query = db.query(*(APPLICATION_SUMMARY_COLUMNS if fields == "summary" else APPLICATION_COLUMNS))
 
     if stage:
         query = query.filter(models.JobApplication.stage == stage)
     if company:
         query = query.filter(models.JobApplication.company_name.ilike(f"%{company}%"))
 
-    applications = query.offset(skip).limit(limit).all()
-    return applications
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, 2)
+        query = query.filter(after_desc(models.JobApplication.created_at, models.JobApplication.id, parse_cursor_datetime(created_at), parse_cursor_id(last_id)))
+    query = query.order_by(models.JobApplication.created_at.desc(), models.JobApplication.id.desc())
+    if not cursor:
+        query = query.offset(skip)
+
+    # Fetch one extra row to know whether there is a next page
+    applications = query.limit(limit + 1).all()
+    headers = {}
+    if len(applications) > limit:
+        applications = applications[:limit]
+        last = applications[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+
+    items = rows_to_dicts(applications)
+    if fields == "full" and include_history:
+        attach_stage_history(db, items)
+    return ORJSONResponse(items, headers=headers)
 
 
 @router.get("/{application_id}", response_model=schemas.JobApplication)
@@ -1,49 +1,150 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+import anyio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
-from app.database import get_db
+from typing import List, Optional, Union
+from app.config import get_settings
+from app.database import get_db, run_db
 from app import models, schemas
-from app.services.openrouter import OpenRouterService
+from app.pagination import (
+    NEXT_CURSOR_HEADER,
+    after_desc,
+    decode_cursor,
+    encode_cursor,
+    parse_cursor_datetime,
+    parse_cursor_id,
+    parse_cursor_score,
+)
+from app.serializers import LEAD_COLUMNS, LEAD_SUMMARY_COLUMNS, rows_to_dicts
+from app.services import ai_jobs
+from app.services.ai_jobs import enqueue_job
+from app.services.batch_analysis import analyze_against_resumes, analyze_leads
+from app.services.dedup import DuplicateLeadError, register_lead, reindex_lead
+from app.services.ingest import IngestFormatError, ingest_leads, iter_lines
+from app.services.leads import (
+    NotFoundError,
+    clear_resume_matches,
+    get_lead_or_raise,
+    get_resume_content,
+    load_analysis_inputs,
+    load_lead_ad,
+    load_resume_match_inputs,
+    promote_lead_to_application,
+    save_match_result,
+    save_resume_matches,
+    select_leads_for_analysis,
+)
+from app.services.openrouter import OpenRouterService, get_openrouter_service
+from app.services.prescore import apply_prescore, refresh_prescores
+from app.services.rate_limit import TokenBucket
+from app.services.resilience import UpstreamError
+from app.streaming import STREAM_HEADERS
 
 router = APIRouter(prefix="/api/leads", tags=["leads"])
 
 
 @router.post("/", response_model=schemas.JobLead)
 def create_lead(lead: schemas.JobLeadCreate, db: Session = Depends(get_db)):
-    """Create a new job lead"""
+    """Create a new job lead, linking, merging or rejecting near-duplicates of existing leads"""
     db_lead = models.JobLead(**lead.model_dump())
-    db.add(db_lead)
+    apply_prescore(db, db_lead)
+    try:
+        db_lead = register_lead(db, db_lead)
+    except DuplicateLeadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     db.commit()
     db.refresh(db_lead)
     return db_lead
 
 
-@router.get("/", response_model=List[schemas.JobLead])
+@router.post("/bulk", response_model=schemas.BulkIngestResult)
+async def bulk_create_leads(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$", description="Defaults from Content-Type"),
+):
+    """
+    Create many job leads from an NDJSON or CSV request body.
+    The body is parsed as it streams in and inserted in chunks; invalid rows are reported, not fatal.
+    """
+    if fmt is None:
+        fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    body = request.stream().__aiter__()
+
+    def chunks():
+        # Runs in the ingest thread, pulling the body from the event loop one chunk at a time
+        while True:
+            try:
+                yield anyio.from_thread.run(body.__anext__)
+            except StopAsyncIteration:
+                return
+
+    try:
+        return await run_db(ingest_leads, iter_lines(chunks()), fmt)
+    except IngestFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/", response_model=Union[List[schemas.JobLead], List[schemas.JobLeadSummary]])
 def list_leads(
     skip: int = 0,
     limit: int = 100,
-    sort_by_match: bool = Query(False, description="Sort by match percentage descending"),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header of the previous page"),
+    sort_by: str = Query("created_at", pattern="^(created_at|match|prescore)$", description="Sort key, newest or highest first"),
+    sort_by_match: bool = Query(False, description="Sort by match percentage descending (same as sort_by=match)"),
     company: Optional[str] = Query(None),
     promoted: Optional[bool] = Query(None),
+    include_duplicates: bool = Query(True, description="Include leads detected as near-duplicates of another lead"),
+    fields: str = Query("full", pattern="^(full|summary)$", description="summary omits job ad and reasoning text"),
     db: Session = Depends(get_db)
 ):
     """List all job leads with optional filters and sorting"""
-    query = db.query(models.JobLead)
+    # Plain column rows; serialized below without building ORM objects or validating each row
+    query = db.query(*(LEAD_SUMMARY_COLUMNS if fields == "summary" else LEAD_COLUMNS))
 
     if company:
         query = query.filter(models.JobLead.company_name.ilike(f"%{company}%"))
     if promoted is not None:
         query = query.filter(models.JobLead.is_promoted == promoted)
+    if not include_duplicates:
+        query = query.filter(models.JobLead.duplicate_of_id.is_(None))
 
     if sort_by_match:
-        # Sort by match_percentage descending, nulls last
-        query = query.order_by(models.JobLead.match_percentage.desc().nullslast())
+        sort_by = "match"
+    score_column = {"match": models.JobLead.match_percentage, "prescore": models.JobLead.prescore}.get(sort_by)
+
+    if score_column is not None:
+        # Sort by match_percentage or prescore descending, unscored leads last
+        score_key = models.score_sort_key(score_column)
+        if cursor:
+            score, last_id = decode_cursor(cursor, 2)
+            query = query.filter(after_desc(score_key, models.JobLead.id, parse_cursor_score(score), parse_cursor_id(last_id)))
+        query = query.order_by(score_key.desc(), models.JobLead.id.desc())
     else:
-        query = query.order_by(models.JobLead.created_at.desc())
+        if cursor:
+            created_at, last_id = decode_cursor(cursor, 2)
+            query = query.filter(after_desc(models.JobLead.created_at, models.JobLead.id, parse_cursor_datetime(created_at), parse_cursor_id(last_id)))
+        query = query.order_by(models.JobLead.created_at.desc(), models.JobLead.id.desc())
+
+    if not cursor:
+        query = query.offset(skip)
+    # Fetch one extra row to know whether there is a next page
+    leads = query.limit(limit + 1).all()
+    headers = {}
+    if len(leads) > limit:
+        leads = leads[:limit]
+        last = leads[-1]
+        sort_value = getattr(last, score_column.key) if score_column is not None else last.created_at
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(sort_value, last.id)
+
+    return ORJSONResponse(rows_to_dicts(leads), headers=headers)
 
-    leads = query.offset(skip).limit(limit).all()
-    return leads
+
+@router.post("/prescore", status_code=202)
+def prescore_leads(background_tasks: BackgroundTasks):
+    """Recompute the local prescore of every lead against the active resume"""
+    background_tasks.add_task(run_db, refresh_prescores)
+    return {"message": "Prescore refresh started"}
 
 
 @router.get("/{lead_id}", response_model=schemas.JobLead)
@@ -65,6 +166,10 @@ def update_lead(lead_id: int, lead: schemas.JobLeadUpdate, db: Session = Depends
     update_data = lead.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_lead, field, value)
+    if "job_ad_content" in update_data:
+        apply_prescore(db, db_lead)
+        reindex_lead(db, db_lead)
+        clear_resume_matches(db, lead_id)
 
     db.commit()
     db.refresh(db_lead)
@@ -83,116 +188,216 @@ def delete_lead(lead_id: int, db: Session = Depends(get_db)):
     return {"message": "Job lead deleted successfully"}
 
 
+def _sse(event: dict) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+
+def _wants_event_stream(request: Request) -> bool:
+    return "text/event-stream" in request.headers.get("accept", "")
+
+
+def _upstream_http_error(error: UpstreamError, action: str) -> HTTPException:
+    """502 when OpenRouter rejected the call, 503 (with Retry-After if known) when it is unavailable"""
+    headers = {"Retry-After": str(int(error.retry_after + 0.999))} if error.retry_after else None
+    return HTTPException(status_code=error.status_code, detail=f"Error {action}: {str(error)}", headers=headers)
+
+
 @router.post("/{lead_id}/analyze", response_model=schemas.JobMatchResponse)
 async def analyze_lead(
     lead_id: int,
+    request: Request,
     resume_id: Optional[int] = Query(None, description="Resume ID to use, or active resume if not specified"),
-    db: Session = Depends(get_db)
+    force: bool = Query(False, description="Bypass the LLM result cache"),
+    openrouter: OpenRouterService = Depends(get_openrouter_service)
 ):
-    """Analyze how well a job lead matches a resume using AI"""
-    # Get the job lead
-    lead = db.query(models.JobLead).filter(models.JobLead.id == lead_id).first()
-    if not lead:
-        raise HTTPException(status_code=404, detail="Job lead not found")
-
-    # Get the resume
-    if resume_id:
-        resume = db.query(models.Resume).filter(models.Resume.id == resume_id).first()
-        if not resume:
-            raise HTTPException(status_code=404, detail="Resume not found")
-    else:
-        resume = db.query(models.Resume).filter(models.Resume.is_active == True).first()
-        if not resume:
-            raise HTTPException(status_code=404, detail="No active resume found")
+    """
+    Analyze how well a job lead matches a resume using AI.
+    With Accept: text/event-stream, streams match_percentage and reasoning deltas as the model writes them.
+    """
+    # Get the job lead and resume; the session is released before calling the model
+    try:
+        job_ad, resume_content = await run_db(load_analysis_inputs, lead_id, resume_id)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    if _wants_event_stream(request):
+        async def event_stream():
+            try:
+                async for event in openrouter.stream_job_match(job_ad, resume_content, force=force):
+                    if event.get("status") == "done":
+                        # Persisted only once the whole answer is in
+                        await run_db(save_match_result, lead_id, event)
+                    yield _sse(event)
+            except Exception as e:
+                yield _sse({"status": "error", "error": f"Error analyzing job match: {str(e)}"})
+        return StreamingResponse(event_stream(), media_type="text/event-stream", headers=STREAM_HEADERS)
 
     # Analyze the match using OpenRouter
-    openrouter = OpenRouterService()
     try:
-        result = await openrouter.analyze_job_match(lead.job_ad_content, resume.content)
+        result = await openrouter.analyze_job_match(job_ad, resume_content, force=force)
 
         # Update the lead with the analysis
-        lead.match_percentage = result["match_percentage"]
-        lead.match_reasoning = result["reasoning"]
-        db.commit()
+        await run_db(save_match_result, lead_id, result)
 
         return schemas.JobMatchResponse(
             match_percentage=result["match_percentage"],
             reasoning=result["reasoning"]
         )
+    except UpstreamError as e:
+        raise _upstream_http_error(e, "analyzing job match")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing job match: {str(e)}")
 
 
-@router.post("/{lead_id}/promote", response_model=schemas.PromoteLeadResponse)
-async def promote_lead(lead_id: int, db: Session = Depends(get_db)):
-    """Promote a job lead to a job application using AI to extract fields"""
-    # Get the job lead
+@router.post("/{lead_id}/analyze-all-resumes", response_model=schemas.ResumeMatchRanking)
+async def analyze_lead_all_resumes(
+    lead_id: int,
+    comparison: Optional[schemas.AnalyzeAllResumesRequest] = None,
+    openrouter: OpenRouterService = Depends(get_openrouter_service)
+):
+    """
+    Analyze a job lead against every resume (or the given ones) concurrently and rank them.
+    Results are stored per resume and reused until the resume changes; the lead's own
+    match_percentage is left alone.
+    """
+    comparison = comparison or schemas.AnalyzeAllResumesRequest()
+    try:
+        job_ad, resumes = await run_db(load_resume_match_inputs, lead_id, comparison.resume_ids)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    results = await analyze_against_resumes(
+        openrouter, job_ad, resumes, get_settings().batch_analyze_concurrency, force=comparison.force
+    )
+    fresh = [result for result in results if result["status"] == "ok" and not result["reused"]]
+    await run_db(save_resume_matches, lead_id, fresh)
+
+    best = results[0] if results[0]["status"] == "ok" else None
+    return schemas.ResumeMatchRanking(
+        lead_id=lead_id,
+        best_resume_id=best["resume_id"] if best else None,
+        results=results
+    )
+
+
+@router.post("/{lead_id}/analyze-async", response_model=schemas.AIJob, status_code=202)
+def analyze_lead_async(
+    lead_id: int,
+    resume_id: Optional[int] = Query(None, description="Resume ID to use, or active resume if not specified"),
+    force: bool = Query(False, description="Bypass the LLM result cache"),
+    db: Session = Depends(get_db)
+):
+    """Queue an AI match analysis and return the job to poll"""
     lead = db.query(models.JobLead).filter(models.JobLead.id == lead_id).first()
     if not lead:
         raise HTTPException(status_code=404, detail="Job lead not found")
 
-    # Extract fields using OpenRouter
-    openrouter = OpenRouterService()
+    return enqueue_job(db, ai_jobs.ANALYZE_LEAD, {"lead_id": lead_id, "resume_id": resume_id, "force": force})
+
+
+@router.post("/analyze-batch")
+async def analyze_leads_batch(
+    batch: schemas.BatchAnalyzeRequest,
+    request: Request,
+    openrouter: OpenRouterService = Depends(get_openrouter_service)
+):
+    """
+    Analyze many job leads against one resume, streaming per-lead progress.
+    Responds with NDJSON, or server-sent events if the client accepts text/event-stream.
+    """
+    # Get the resume once for the whole batch
     try:
-        extracted = await openrouter.extract_job_application_fields(lead.job_ad_content)
-
-        # Handle extracted_content - convert to string if it's a dict
-        extracted_content = extracted.get("extracted_content", lead.job_ad_content)
-        if isinstance(extracted_content, dict):
-            import json
-            extracted_content = json.dumps(extracted_content, indent=2)
-
-        # Create the job application
-        # Use extracted company name only if it's valid (not "Unknown" or empty)
-        extracted_company = extracted.get("company_name", "")
-        # Determine company_name with clear logic
-        if lead.company_name:
-            if not extracted_company or extracted_company == "Unknown":
-                company_name = lead.company_name
-            else:
-                company_name = extracted_company
-        elif extracted_company and extracted_company != "Unknown":
-            company_name = extracted_company
-        else:
-            company_name = "Unknown"
-
-        # Use extracted role name only if it's valid
-        extracted_role = extracted.get("role_name", "")
-        role_name = lead.role_name if lead.role_name and (not extracted_role or extracted_role == "Unknown") else extracted_role or "Unknown"
-
-        application_data = {
-            "company_name": company_name,
-            "role_name": role_name,
-            "stage": models.JobStage.NOT_STARTED,
-            "job_ad_content": lead.job_ad_content,
-            "match_percentage": lead.match_percentage,
-            "match_reasoning": lead.match_reasoning,
-        }
-
-        db_application = models.JobApplication(**application_data)
-        db.add(db_application)
-        db.commit()
-        db.refresh(db_application)
-
-        # Create initial stage history
-        history_entry = models.StageHistory(
-            job_application_id=db_application.id,
-            previous_stage=None,
-            new_stage=models.JobStage.NOT_STARTED,
-            changed_at=datetime.utcnow()
-        )
-        db.add(history_entry)
-        db.commit()
+        resume_content = await run_db(get_resume_content, batch.resume_id)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    leads = await run_db(select_leads_for_analysis, batch.lead_ids, batch.unscored_only, batch.top_n)
+
+    settings = get_settings()
+    events = analyze_leads(
+        openrouter,
+        resume_content,
+        leads,
+        concurrency=settings.batch_analyze_concurrency,
+        limiter=TokenBucket(settings.batch_analyze_rate_per_second),
+        commit_size=settings.batch_analyze_commit_size,
+        force=batch.force
+    )
+
+    if _wants_event_stream(request):
+        async def event_stream():
+            async for event in events:
+                yield _sse(event)
+        return StreamingResponse(event_stream(), media_type="text/event-stream", headers=STREAM_HEADERS)
+
+    async def ndjson_stream():
+        async for event in events:
+            yield json.dumps(event) + "\n"
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson", headers=STREAM_HEADERS)
 
-        # Delete the lead after successful promotion
-        db.delete(lead)
-        db.commit()
 
-        db.refresh(db_application)
+@router.post("/{lead_id}/promote", response_model=schemas.PromoteLeadResponse)
+async def promote_lead(
+    lead_id: int,
+    request: Request,
+    force: bool = Query(False, description="Bypass the LLM result cache"),
+    openrouter: OpenRouterService = Depends(get_openrouter_service)
+):
+    """
+    Promote a job lead to a job application using AI to extract fields.
+    With Accept: text/event-stream, streams the extracted fields as the model writes them.
+    """
+    # Get the job lead
+    try:
+        job_ad = await run_db(load_lead_ad, lead_id)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    if _wants_event_stream(request):
+        async def event_stream():
+            try:
+                async for event in openrouter.stream_job_application_fields(job_ad, force=force):
+                    if event.get("status") == "done":
+                        extracted = {key: value for key, value in event.items() if key != "status"}
+                        db_application = await run_db(_promote, lead_id, extracted)
+                        event = {"status": "done", "job_application": db_application.model_dump(mode="json")}
+                    yield _sse(event)
+            except Exception as e:
+                yield _sse({"status": "error", "error": f"Error promoting lead: {str(e)}"})
+        return StreamingResponse(event_stream(), media_type="text/event-stream", headers=STREAM_HEADERS)
+
+    # Extract fields using OpenRouter
+    try:
+        extracted = await openrouter.extract_job_application_fields(job_ad, force=force)
+
+        db_application = await run_db(_promote, lead_id, extracted)
 
         return schemas.PromoteLeadResponse(
             job_application=db_application,
             message="Job lead successfully promoted to application"
         )
+    except UpstreamError as e:
+        raise _upstream_http_error(e, "promoting lead")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error promoting lead: {str(e)}")
+
+
+def _promote(db: Session, lead_id: int, extracted: dict) -> schemas.JobApplication:
+    # One transaction; serialized from the flushed rows before commit expires them
+    lead = get_lead_or_raise(db, lead_id)
+    application = schemas.JobApplication.model_validate(promote_lead_to_application(db, lead, extracted))
+    db.commit()
+    return application
+
+
+@router.post("/{lead_id}/promote-async", response_model=schemas.AIJob, status_code=202)
+def promote_lead_async(
+    lead_id: int,
+    force: bool = Query(False, description="Bypass the LLM result cache"),
+    db: Session = Depends(get_db)
+):
+    """Queue a lead promotion and return the job to poll"""
+    lead = db.query(models.JobLead).filter(models.JobLead.id == lead_id).first()
+    if not lead:
+        raise HTTPException(status_code=404, detail="Job lead not found")
+
+    return enqueue_job(db, ai_jobs.PROMOTE_LEAD, {"lead_id": lead_id, "force": force})
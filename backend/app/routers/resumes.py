@@ -1,22 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from app.database import get_db, run_db
 from app import models, schemas
+from app.services.prescore import refresh_prescores
 
 router = APIRouter(prefix="/api/resumes", tags=["resumes"])
 
 
+def _deactivate_resumes(db: Session, except_id: Optional[int] = None):
+    """Set the other active resumes inactive, leaving updated_at alone since their content did not change"""
+    query = db.query(models.Resume).filter(models.Resume.is_active == True)
+    if except_id is not None:
+        query = query.filter(models.Resume.id != except_id)
+    query.update({"is_active": False, "updated_at": models.Resume.updated_at}, synchronize_session=False)
+
+
 @router.post("/", response_model=schemas.Resume)
-def create_resume(resume: schemas.ResumeCreate, db: Session = Depends(get_db)):
+def create_resume(resume: schemas.ResumeCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Create a new resume"""
-    # Set all other resumes to inactive
-    db.query(models.Resume).update({"is_active": False})
+    _deactivate_resumes(db)
 
     db_resume = models.Resume(**resume.model_dump(), is_active=True)
     db.add(db_resume)
     db.commit()
     db.refresh(db_resume)
+
+    # Lead prescores are relative to the active resume
+    background_tasks.add_task(run_db, refresh_prescores)
     return db_resume
 
 
@@ -46,7 +57,12 @@ def get_resume(resume_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{resume_id}", response_model=schemas.Resume)
-def update_resume(resume_id: int, resume: schemas.ResumeUpdate, db: Session = Depends(get_db)):
+def update_resume(
+    resume_id: int,
+    resume: schemas.ResumeUpdate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
     """Update a resume"""
     db_resume = db.query(models.Resume).filter(models.Resume.id == resume_id).first()
     if not db_resume:
@@ -56,13 +72,18 @@ def update_resume(resume_id: int, resume: schemas.ResumeUpdate, db: Session = De
 
     # If setting this resume as active, deactivate all others
     if update_data.get("is_active") is True:
-        db.query(models.Resume).update({"is_active": False})
+        _deactivate_resumes(db, except_id=resume_id)
 
     for field, value in update_data.items():
         setattr(db_resume, field, value)
+    if "content" in update_data:
+        db_resume.prescore_vector = None
 
     db.commit()
     db.refresh(db_resume)
+
+    if db_resume.is_active and ("content" in update_data or update_data.get("is_active") is True):
+        background_tasks.add_task(run_db, refresh_prescores)
     return db_resume
 
 
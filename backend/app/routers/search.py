@@ -0,0 +1,88 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import Double, cast, func, literal, select, tuple_, union_all
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from app.database import get_db
+from app import models, schemas
+from app.pagination import (
+    NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, parse_cursor_id, parse_cursor_score, parse_cursor_str
+)
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+SEARCH_CONFIG = "english"
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=25, MinWords=8, StartSel=<mark>, StopSel=</mark>"
+
+SEARCHABLE = {
+    "lead": models.JobLead,
+    "application": models.JobApplication,
+}
+
+
+def _matches(model, kind: str, tsquery):
+    return select(
+        literal(kind).label("type"),
+        model.id.label("id"),
+        model.company_name.label("company_name"),
+        model.role_name.label("role_name"),
+        # float8 so the rank survives the round trip through the cursor exactly
+        cast(func.ts_rank_cd(model.search_vector, tsquery), Double).label("rank"),
+    ).where(model.search_vector.op("@@")(tsquery))
+
+
+def _snippets(db: Session, model, ids: List[int], tsquery) -> Dict[int, str]:
+    """Highlight matches for one page of rows; ts_headline is too costly to run on every match"""
+    if not ids:
+        return {}
+    document = func.concat_ws(" ... ", model.job_ad_content, model.match_reasoning)
+    if model is models.JobApplication:
+        document = func.concat_ws(" ... ", model.notes, model.application_notes, model.job_ad_content, model.match_reasoning)
+    rows = db.execute(
+        select(model.id, func.ts_headline(SEARCH_CONFIG, document, tsquery, HEADLINE_OPTIONS))
+        .where(model.id.in_(ids))
+    ).all()
+    return dict(rows)
+
+
+@router.get("/", response_model=List[schemas.SearchResult])
+def search(
+    response: Response,
+    q: str = Query(..., min_length=1, description="Search terms; supports quoted phrases, OR and -exclusions"),
+    kind: Optional[str] = Query(None, alias="type", pattern="^(lead|application)$", description="Limit results to leads or applications"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header of the previous page"),
+    db: Session = Depends(get_db)
+):
+    """Full-text search across job leads and applications, best matches first"""
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    kinds = [kind] if kind else list(SEARCHABLE)
+    matches = union_all(*(_matches(SEARCHABLE[kind], kind, tsquery) for kind in kinds)).subquery()
+
+    query = select(matches)
+    if cursor:
+        last_rank, last_type, last_id = decode_cursor(cursor, 3)
+        last_rank, last_type, last_id = parse_cursor_score(last_rank), parse_cursor_str(last_type), parse_cursor_id(last_id)
+        query = query.where(tuple_(matches.c.rank, matches.c.type, matches.c.id) < tuple_(last_rank, last_type, last_id))
+    query = query.order_by(matches.c.rank.desc(), matches.c.type.desc(), matches.c.id.desc()).limit(limit + 1)
+
+    rows = db.execute(query).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.rank, last.type, last.id)
+
+    snippets = {
+        row_type: _snippets(db, SEARCHABLE[row_type], [row.id for row in rows if row.type == row_type], tsquery)
+        for row_type in kinds
+    }
+    return [
+        schemas.SearchResult(
+            type=row.type,
+            id=row.id,
+            company_name=row.company_name,
+            role_name=row.role_name,
+            rank=row.rank,
+            snippet=snippets[row.type].get(row.id, "")
+        )
+        for row in rows
+    ]
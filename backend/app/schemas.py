@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
-from app.models import JobStage
+from typing import Optional, List, Dict, Any
+from app.models import JobStage, AIJobStatus
 
 
 # Resume Schemas
@@ -74,17 +74,55 @@ class JobApplicationUpdate(BaseModel):
     match_reasoning: Optional[str] = None
 
 
-class JobApplication(JobApplicationBase):
+class JobApplicationWithoutHistory(JobApplicationBase):
     id: int
     stage_date: datetime
     created_at: datetime
     updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class JobApplication(JobApplicationWithoutHistory):
     stage_history: List[StageHistory] = []
 
+
+class JobApplicationSummary(BaseModel):
+    """List projection without the large text columns"""
+    id: int
+    company_name: str
+    role_name: str
+    stage: JobStage
+    stage_date: datetime
+    match_percentage: Optional[float] = None
+    created_at: datetime
+    updated_at: datetime
+
     class Config:
         from_attributes = True
 
 
+class BulkStageChangeRequest(BaseModel):
+    new_stage: JobStage
+    application_ids: Optional[List[int]] = Field(None, description="Applications to move; combined with any filters below")
+    stage: Optional[JobStage] = Field(None, description="Only applications currently in this stage")
+    stage_date_before: Optional[datetime] = Field(None, description="Only applications whose stage last changed before this time")
+    stale_days: Optional[int] = Field(None, ge=0, description="Only applications whose stage has not changed for this many days")
+    company: Optional[str] = None
+
+
+class StageTransition(BaseModel):
+    job_application_id: int
+    previous_stage: JobStage
+
+
+class BulkStageChangeResult(BaseModel):
+    new_stage: JobStage
+    updated: int
+    transitions: List[StageTransition]
+
+
 # Job Lead Schemas
 class JobLeadBase(BaseModel):
     company_name: Optional[str] = None
@@ -110,6 +148,26 @@ class JobLead(JobLeadBase):
     id: int
     match_percentage: Optional[float] = None
     match_reasoning: Optional[str] = None
+    prescore: Optional[float] = None
+    duplicate_of_id: Optional[int] = None
+    is_promoted: bool
+    promoted_to_application_id: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class JobLeadSummary(BaseModel):
+    """List projection without the large text columns"""
+    id: int
+    company_name: Optional[str] = None
+    role_name: Optional[str] = None
+    job_url: Optional[str] = None
+    match_percentage: Optional[float] = None
+    prescore: Optional[float] = None
+    duplicate_of_id: Optional[int] = None
     is_promoted: bool
     promoted_to_application_id: Optional[int] = None
     created_at: datetime
@@ -119,6 +177,19 @@ class JobLead(JobLeadBase):
         from_attributes = True
 
 
+class BulkIngestError(BaseModel):
+    row: int
+    error: str
+
+
+class BulkIngestResult(BaseModel):
+    received: int
+    inserted: int
+    duplicates: int
+    failed: int
+    errors: List[BulkIngestError] = Field(description="Per-row errors, capped at bulk_ingest_max_errors")
+
+
 # AI Analysis Schemas
 class JobMatchRequest(BaseModel):
     job_lead_id: int
@@ -130,6 +201,36 @@ class JobMatchResponse(BaseModel):
     reasoning: str
 
 
+class BatchAnalyzeRequest(BaseModel):
+    lead_ids: Optional[List[int]] = Field(None, description="Leads to analyze; all non-promoted leads if omitted")
+    unscored_only: bool = Field(False, description="Skip leads that already have a match percentage")
+    top_n: Optional[int] = Field(None, ge=1, description="Only analyze the N selected leads with the highest prescore")
+    resume_id: Optional[int] = Field(None, description="Resume ID to use, or active resume if not specified")
+    force: bool = Field(False, description="Bypass the LLM result cache")
+
+
+class AnalyzeAllResumesRequest(BaseModel):
+    resume_ids: Optional[List[int]] = Field(None, description="Resumes to compare; all resumes if omitted")
+    force: bool = Field(False, description="Re-analyze resumes that already have a result for their current version")
+
+
+class ResumeMatch(BaseModel):
+    resume_id: int
+    file_name: Optional[str] = None
+    is_active: bool
+    status: str
+    match_percentage: Optional[float] = None
+    reasoning: Optional[str] = None
+    reused: bool = Field(False, description="Stored result for this resume version; no model call was made")
+    error: Optional[str] = None
+
+
+class ResumeMatchRanking(BaseModel):
+    lead_id: int
+    best_resume_id: Optional[int] = None
+    results: List[ResumeMatch]
+
+
 class PromoteLeadRequest(BaseModel):
     job_lead_id: int
 
@@ -137,3 +238,56 @@ class PromoteLeadRequest(BaseModel):
 class PromoteLeadResponse(BaseModel):
     job_application: JobApplication
     message: str
+
+
+# Search Schemas
+class SearchResult(BaseModel):
+    type: str
+    id: int
+    company_name: Optional[str] = None
+    role_name: Optional[str] = None
+    rank: float
+    snippet: str
+
+
+# Background AI Job Schemas
+class AIJob(BaseModel):
+    id: int
+    kind: str
+    status: AIJobStatus
+    payload: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+# Analytics Schemas
+class FunnelStats(BaseModel):
+    company_name: Optional[str] = None
+    applications: int
+    applied: int
+    in_progress: int
+    offer: int
+    rejected: int
+    no_answer: int
+    applied_to_in_progress: Optional[float] = None
+    in_progress_to_offer: Optional[float] = None
+    applied_to_offer: Optional[float] = None
+    no_answer_rate: Optional[float] = None
+
+
+class StageDuration(BaseModel):
+    stage: JobStage
+    transitions: int
+    avg_seconds: Optional[float] = None
+    median_seconds: Optional[float] = None
+    p90_seconds: Optional[float] = None
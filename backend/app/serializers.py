@@ -0,0 +1,42 @@
+"""
+Read-path serialization straight from column rows.
+
+List endpoints select exactly the columns of their response schema and return the
+rows as plain dicts through ORJSONResponse, so a page costs no ORM identity-map
+work or per-row Pydantic validation. Column lists are derived from the schemas,
+which keeps the two from drifting apart.
+"""
+from typing import Any, Dict, List, Type
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from app import models, schemas
+
+
+def schema_columns(model, schema: Type[BaseModel]) -> tuple:
+    """The model columns backing each field of schema, in the schema's field order"""
+    return tuple(getattr(model, name) for name in schema.model_fields)
+
+
+def rows_to_dicts(rows) -> List[Dict[str, Any]]:
+    return [row._asdict() for row in rows]
+
+
+LEAD_COLUMNS = schema_columns(models.JobLead, schemas.JobLead)
+LEAD_SUMMARY_COLUMNS = schema_columns(models.JobLead, schemas.JobLeadSummary)
+APPLICATION_COLUMNS = schema_columns(models.JobApplication, schemas.JobApplicationWithoutHistory)
+APPLICATION_SUMMARY_COLUMNS = schema_columns(models.JobApplication, schemas.JobApplicationSummary)
+STAGE_HISTORY_COLUMNS = schema_columns(models.StageHistory, schemas.StageHistory)
+
+
+def attach_stage_history(db: Session, applications: List[Dict[str, Any]]):
+    """Fill in stage_history for a page of applications with one query"""
+    by_id = {application["id"]: application for application in applications}
+    for application in applications:
+        application["stage_history"] = []
+    if not by_id:
+        return
+    rows = db.query(*STAGE_HISTORY_COLUMNS).filter(
+        models.StageHistory.job_application_id.in_(by_id)
+    ).order_by(models.StageHistory.job_application_id, models.StageHistory.id)
+    for row in rows:
+        by_id[row.job_application_id]["stage_history"].append(row._asdict())
@@ -0,0 +1,141 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.database import run_db
+from app import models
+from app.services.analytics import MATERIALIZED_VIEWS, refresh_views
+from app.services.leads import (
+    get_lead_or_raise,
+    load_analysis_inputs,
+    load_lead_ad,
+    promote_lead_to_application,
+    save_match_result,
+)
+from app.services.openrouter import OpenRouterService
+
+ANALYZE_LEAD = "analyze_lead"
+PROMOTE_LEAD = "promote_lead"
+REFRESH_ANALYTICS = "refresh_analytics"
+
+
+class PermanentJobError(Exception):
+    """Raised by a job handler when retrying cannot succeed"""
+
+
+def enqueue_job(db: Session, kind: str, payload: Dict[str, Any]) -> models.AIJob:
+    """Insert a pending job for the worker pool to pick up"""
+    job = models.AIJob(
+        kind=kind,
+        payload=payload,
+        max_attempts=get_settings().ai_job_max_attempts
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def claim_job(db: Session) -> Optional[Tuple[int, str, Dict[str, Any]]]:
+    """
+    Claim the next runnable job and mark it running.
+    Uses SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers never claim the same row.
+    Jobs whose heartbeat stopped for ai_job_stale_after_seconds, left running by a worker
+    that died, are picked up again; live workers keep theirs fresh with heartbeat_job.
+    """
+    settings = get_settings()
+    while True:
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=settings.ai_job_stale_after_seconds)
+        job = db.query(models.AIJob).filter(
+            or_(
+                and_(models.AIJob.status == models.AIJobStatus.PENDING, models.AIJob.run_after <= now),
+                and_(models.AIJob.status == models.AIJobStatus.RUNNING, models.AIJob.heartbeat_at < stale_before)
+            )
+        ).order_by(models.AIJob.run_after).with_for_update(skip_locked=True).first()
+        if job is None:
+            return None
+
+        if job.attempts >= job.max_attempts:
+            job.status = models.AIJobStatus.FAILED
+            job.error = job.error or "Worker stopped while running the job"
+            job.finished_at = now
+            db.commit()
+            continue
+
+        job.status = models.AIJobStatus.RUNNING
+        job.attempts += 1
+        job.started_at = now
+        job.heartbeat_at = now
+        claimed = (job.id, job.kind, dict(job.payload))
+        db.commit()
+        return claimed
+
+
+def heartbeat_job(db: Session, job_id: int):
+    """Mark a running job as alive so no other worker reclaims it as stale"""
+    db.query(models.AIJob).filter(
+        models.AIJob.id == job_id, models.AIJob.status == models.AIJobStatus.RUNNING
+    ).update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+
+def complete_job(db: Session, job_id: int, result: Dict[str, Any]):
+    job = db.query(models.AIJob).filter(models.AIJob.id == job_id).first()
+    job.status = models.AIJobStatus.SUCCEEDED
+    job.result = result
+    job.error = None
+    job.finished_at = datetime.utcnow()
+    db.commit()
+
+
+def fail_job(db: Session, job_id: int, error: str, retry: bool = True):
+    """Record a failed attempt, rescheduling with jittered exponential backoff if attempts remain"""
+    settings = get_settings()
+    job = db.query(models.AIJob).filter(models.AIJob.id == job_id).first()
+    job.error = error
+    now = datetime.utcnow()
+    if retry and job.attempts < job.max_attempts:
+        delay = settings.ai_job_retry_base_seconds * 2 ** (job.attempts - 1) * random.uniform(0.5, 1.5)
+        job.status = models.AIJobStatus.PENDING
+        job.run_after = now + timedelta(seconds=delay)
+    else:
+        job.status = models.AIJobStatus.FAILED
+        job.finished_at = now
+    db.commit()
+
+
+async def run_analyze_lead(openrouter: OpenRouterService, payload: Dict[str, Any]) -> Dict[str, Any]:
+    # No connection is held while waiting on the model
+    job_ad, resume_content = await run_db(load_analysis_inputs, payload["lead_id"], payload.get("resume_id"))
+    result = await openrouter.analyze_job_match(job_ad, resume_content, force=payload.get("force", False))
+    await run_db(save_match_result, payload["lead_id"], result)
+    return {"match_percentage": result["match_percentage"], "reasoning": result["reasoning"]}
+
+
+def _promote(db: Session, lead_id: int, extracted: Dict[str, Any]) -> Dict[str, Any]:
+    lead = get_lead_or_raise(db, lead_id)
+    application_id = promote_lead_to_application(db, lead, extracted).id
+    db.commit()
+    return {"job_application_id": application_id}
+
+
+async def run_promote_lead(openrouter: OpenRouterService, payload: Dict[str, Any]) -> Dict[str, Any]:
+    job_ad = await run_db(load_lead_ad, payload["lead_id"])
+    extracted = await openrouter.extract_job_application_fields(job_ad, force=payload.get("force", False))
+    return await run_db(_promote, payload["lead_id"], extracted)
+
+
+async def run_refresh_analytics(openrouter: OpenRouterService, payload: Dict[str, Any]) -> Dict[str, Any]:
+    # Queued by POST /api/analytics/refresh so no API connection is held for a whole refresh
+    await run_db(refresh_views)
+    return {"refreshed": list(MATERIALIZED_VIEWS)}
+
+
+JOB_HANDLERS = {
+    ANALYZE_LEAD: run_analyze_lead,
+    PROMOTE_LEAD: run_promote_lead,
+    REFRESH_ANALYTICS: run_refresh_analytics,
+}
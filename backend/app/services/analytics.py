@@ -0,0 +1,128 @@
+"""
+Pipeline analytics over the stage_transitions and application_funnel materialized views.
+
+The views are defined in Alembic migration 0006. They are refreshed with
+REFRESH MATERIALIZED VIEW CONCURRENTLY, which diffs the new result into the
+existing view so readers are never blocked, and only when applications or their
+history changed since the last refresh.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Boolean, Column, DateTime, Float, Integer, MetaData, String, Table, func, select, text
+from sqlalchemy import Enum as SQLEnum
+from sqlalchemy.orm import Session
+from app import models
+
+# Kept out of Base.metadata so Alembic autogenerate does not treat the views as tables
+views = MetaData()
+
+stage_transitions = Table(
+    "stage_transitions", views,
+    Column("id", Integer, primary_key=True),
+    Column("job_application_id", Integer),
+    Column("company_name", String),
+    Column("from_stage", SQLEnum(models.JobStage)),
+    Column("to_stage", SQLEnum(models.JobStage)),
+    Column("entered_at", DateTime),
+    Column("changed_at", DateTime),
+    Column("seconds_in_stage", Float),
+)
+
+application_funnel = Table(
+    "application_funnel", views,
+    Column("job_application_id", Integer, primary_key=True),
+    Column("company_name", String),
+    Column("current_stage", SQLEnum(models.JobStage)),
+    Column("reached_applied", Boolean),
+    Column("reached_in_progress", Boolean),
+    Column("reached_offer", Boolean),
+    Column("reached_rejected", Boolean),
+    Column("reached_no_answer", Boolean),
+)
+
+MATERIALIZED_VIEWS = ("stage_transitions", "application_funnel")
+
+
+def _rate(part: int, whole: int) -> Optional[float]:
+    return round(part / whole, 4) if whole else None
+
+
+def funnel(db: Session, company: Optional[str] = None, by_company: bool = False) -> List[Dict[str, Any]]:
+    """Applications reaching each stage and the conversion between stages, overall or per company"""
+    f = application_funnel.c
+    columns = [
+        func.count().label("applications"),
+        func.count().filter(f.reached_applied).label("applied"),
+        func.count().filter(f.reached_in_progress).label("in_progress"),
+        func.count().filter(f.reached_offer).label("offer"),
+        func.count().filter(f.reached_rejected).label("rejected"),
+        func.count().filter(f.reached_no_answer).label("no_answer"),
+    ]
+    query = select(f.company_name, *columns) if by_company else select(*columns)
+    if company:
+        query = query.where(f.company_name.ilike(f"%{company}%"))
+    if by_company:
+        query = query.group_by(f.company_name).order_by(func.count().desc(), f.company_name)
+
+    return [
+        {
+            "company_name": row.company_name if by_company else None,
+            "applications": row.applications,
+            "applied": row.applied,
+            "in_progress": row.in_progress,
+            "offer": row.offer,
+            "rejected": row.rejected,
+            "no_answer": row.no_answer,
+            "applied_to_in_progress": _rate(row.in_progress, row.applied),
+            "in_progress_to_offer": _rate(row.offer, row.in_progress),
+            "applied_to_offer": _rate(row.offer, row.applied),
+            "no_answer_rate": _rate(row.no_answer, row.applied),
+        }
+        for row in db.execute(query)
+    ]
+
+
+def stage_durations(db: Session, company: Optional[str] = None) -> List[Dict[str, Any]]:
+    """How long applications stayed in each stage before moving on"""
+    t = stage_transitions.c
+    query = select(
+        t.from_stage,
+        func.count().label("transitions"),
+        func.avg(t.seconds_in_stage).label("avg_seconds"),
+        func.percentile_cont(0.5).within_group(t.seconds_in_stage).label("median_seconds"),
+        func.percentile_cont(0.9).within_group(t.seconds_in_stage).label("p90_seconds"),
+    ).where(t.from_stage.isnot(None)).group_by(t.from_stage).order_by(t.from_stage)
+    if company:
+        query = query.where(t.company_name.ilike(f"%{company}%"))
+    return [
+        {
+            "stage": row.from_stage,
+            "transitions": row.transitions,
+            "avg_seconds": row.avg_seconds,
+            "median_seconds": row.median_seconds,
+            "p90_seconds": row.p90_seconds,
+        }
+        for row in db.execute(query)
+    ]
+
+
+def change_marker(db: Session) -> Tuple:
+    """Cheap fingerprint of the data the views are built from"""
+    applications = db.query(func.count(models.JobApplication.id), func.max(models.JobApplication.updated_at)).one()
+    history = db.query(func.count(models.StageHistory.id), func.max(models.StageHistory.id)).one()
+    return tuple(applications) + tuple(history)
+
+
+def refresh_views(db: Session):
+    # Refreshing a large view can outlast the API statement timeout
+    db.execute(text("SET LOCAL statement_timeout = 0"))
+    for view in MATERIALIZED_VIEWS:
+        db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+    db.commit()
+
+
+def refresh_if_changed(db: Session, last_marker: Optional[Tuple] = None) -> Tuple:
+    """Refresh the views unless nothing changed since last_marker; returns the new marker"""
+    marker = change_marker(db)
+    if marker != last_marker:
+        refresh_views(db)
+    return marker
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from app import models
+
+
+def bulk_change_stage(
+    db: Session,
+    new_stage: models.JobStage,
+    application_ids: Optional[List[int]] = None,
+    stage: Optional[models.JobStage] = None,
+    stage_date_before: Optional[datetime] = None,
+    company: Optional[str] = None
+) -> List[Tuple[int, models.JobStage]]:
+    """
+    Move every matching application to new_stage with one UPDATE and record the
+    transitions with one multi-row history insert. Applications already in new_stage
+    are left alone. Returns (id, previous stage) per application moved.
+    """
+    application = models.JobApplication
+    conditions = [application.stage != new_stage]
+    if application_ids is not None:
+        conditions.append(application.id.in_(application_ids))
+    if stage is not None:
+        conditions.append(application.stage == stage)
+    if stage_date_before is not None:
+        conditions.append(application.stage_date < stage_date_before)
+    if company:
+        conditions.append(application.company_name.ilike(f"%{company}%"))
+
+    # RETURNING only sees the new row, so the old stage comes from a locked self-join
+    old = select(application.id, application.stage).where(*conditions).with_for_update().subquery("old")
+    now = datetime.utcnow()
+    moved = db.execute(
+        update(application)
+        .where(application.id == old.c.id)
+        .values(stage=new_stage, stage_date=now, updated_at=now)
+        .returning(application.id, old.c.stage)
+    ).all()
+
+    if moved:
+        db.execute(insert(models.StageHistory), [
+            {
+                "job_application_id": application_id,
+                "previous_stage": previous_stage,
+                "new_stage": new_stage,
+                "changed_at": now,
+            }
+            for application_id, previous_stage in moved
+        ])
+    db.commit()
+    return [(application_id, previous_stage) for application_id, previous_stage in moved]
+
+
+def ghost_stale_applications(db: Session, after_days: int) -> int:
+    """Mark applications with no reply for after_days as no answer; returns how many moved"""
+    return len(bulk_change_stage(
+        db,
+        models.JobStage.NO_ANSWER,
+        stage=models.JobStage.APPLIED,
+        stage_date_before=datetime.utcnow() - timedelta(days=after_days)
+    ))
@@ -0,0 +1,120 @@
+import asyncio
+import anyio
+from typing import AsyncIterator, Dict, Any, List, Tuple
+from sqlalchemy.orm import Session
+from app.bulk import update_by_id
+from app.database import run_db
+from app import models
+from app.services.openrouter import OpenRouterService
+from app.services.rate_limit import TokenBucket
+
+
+def save_match_results(db: Session, results: List[Dict[str, Any]]):
+    """Write a batch of analysis results to their leads with one UPDATE"""
+    if not results:
+        return
+    update_by_id(db, models.JobLead, [
+        {
+            "id": result["lead_id"],
+            "match_percentage": result["match_percentage"],
+            "match_reasoning": result["reasoning"],
+        }
+        for result in results
+    ])
+    db.commit()
+
+
+async def analyze_leads(
+    openrouter: OpenRouterService,
+    resume: str,
+    leads: List[Tuple[int, str]],
+    concurrency: int,
+    limiter: TokenBucket,
+    commit_size: int,
+    force: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze (lead_id, job_ad_content) pairs against one resume.
+    At most `concurrency` LLM calls are in flight and calls are started no faster than
+    the limiter allows. A progress event is yielded per lead as soon as it finishes,
+    and successful results are committed every `commit_size` leads.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def analyze(lead_id: int, job_ad: str) -> Dict[str, Any]:
+        async with semaphore:
+            await limiter.acquire()
+            try:
+                result = await openrouter.analyze_job_match(job_ad, resume, force=force)
+            except Exception as e:
+                return {"lead_id": lead_id, "status": "error", "error": str(e)}
+            return {
+                "lead_id": lead_id,
+                "status": "ok",
+                "match_percentage": result["match_percentage"],
+                "reasoning": result["reasoning"],
+            }
+
+    tasks = [asyncio.create_task(analyze(lead_id, job_ad)) for lead_id, job_ad in leads]
+    pending: List[Dict[str, Any]] = []
+    succeeded = failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            event = await next_done
+            if event["status"] == "ok":
+                succeeded += 1
+                pending.append(event)
+                if len(pending) >= commit_size:
+                    await run_db(save_match_results, pending)
+                    pending = []
+            else:
+                failed += 1
+            yield event
+
+        await run_db(save_match_results, pending)
+        pending = []
+        yield {"status": "done", "total": len(leads), "succeeded": succeeded, "failed": failed}
+    finally:
+        # Client went away or something failed: keep what finished, stop the rest
+        for task in tasks:
+            task.cancel()
+        if pending:
+            # Shielded so the write still happens while the response is being cancelled
+            with anyio.CancelScope(shield=True):
+                await run_db(save_match_results, pending)
+
+
+async def analyze_against_resumes(
+    openrouter: OpenRouterService,
+    job_ad: str,
+    resumes: List[Dict[str, Any]],
+    concurrency: int,
+    force: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Analyze one job ad against several resumes concurrently, reusing stored results
+    for resumes unchanged since they were last analyzed. Returns results best match first.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def analyze(resume: Dict[str, Any]) -> Dict[str, Any]:
+        event = {"resume_id": resume["resume_id"], "file_name": resume["file_name"], "is_active": resume["is_active"]}
+        if resume["stored"] is not None and not force:
+            return {**event, "status": "ok", "reused": True, **resume["stored"]}
+        async with semaphore:
+            try:
+                result = await openrouter.analyze_job_match(job_ad, resume["content"], force=force)
+            except Exception as e:
+                return {**event, "status": "error", "error": str(e)}
+        return {
+            **event,
+            "status": "ok",
+            "reused": False,
+            "match_percentage": result["match_percentage"],
+            "reasoning": result["reasoning"],
+            "resume_content_hash": resume["content_hash"],
+        }
+
+    results = await asyncio.gather(*(analyze(resume) for resume in resumes))
+    # Failures last, then by score
+    return sorted(results, key=lambda result: (result["status"] != "ok", -(result.get("match_percentage") or 0)))
@@ -0,0 +1,207 @@
+"""
+Near-duplicate detection for job leads.
+
+Each ad is reduced to a set of word 3-gram shingles and summarized by a MinHash
+signature, whose positions agree with probability equal to the Jaccard similarity
+of the shingle sets. Signatures are split into LSH bands; leads sharing any band
+bucket are candidates, and only those are compared. Only canonical leads (those
+that are not themselves duplicates) are kept in the band index.
+
+Merging deletes the duplicate, so its match analysis moves to the original unless
+the original has its own.
+"""
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import Integer, column, func, insert, select, tuple_, values as values_list
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app import models
+from app.config import get_settings
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+BANDS = 32
+ROWS_PER_BAND = NUM_PERM // BANDS
+MAX_CANDIDATES = 50
+
+# Universal hashing (a * x + b) mod p over 32-bit shingle hashes; the seed must never change
+_PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(20240611)
+_A = _rng.integers(1, 2 ** 32, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2 ** 32, NUM_PERM, dtype=np.uint64)
+
+TOKEN_RE = re.compile(r"\w+")
+
+MERGE_FIELDS = ("company_name", "role_name", "job_url")
+# Carried over together, and only to an original that has not been analyzed
+ANALYSIS_FIELDS = ("match_percentage", "match_reasoning")
+
+
+class DuplicateLeadError(Exception):
+    """Raised when a new lead duplicates an existing one and the configured action is reject"""
+
+    def __init__(self, lead_id: int, similarity: float):
+        super().__init__(f"Duplicate of job lead {lead_id} ({similarity:.0%} similar)")
+        self.lead_id = lead_id
+        self.similarity = similarity
+
+
+def shingles(text: str) -> np.ndarray:
+    tokens = TOKEN_RE.findall((text or "").lower())
+    if len(tokens) < SHINGLE_SIZE:
+        grams = [" ".join(tokens)]
+    else:
+        grams = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64)
+
+
+def signature(text: str) -> np.ndarray:
+    """MinHash signature of a text as NUM_PERM uint32 values"""
+    hashed = (np.outer(shingles(text), _A) + _B) % _PRIME
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+def to_bytes(sig: np.ndarray) -> bytes:
+    return sig.astype(np.uint32, copy=False).tobytes()
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.uint32)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return float(np.mean(first == second))
+
+
+def band_buckets(sig: np.ndarray) -> List[Tuple[int, int]]:
+    """(band, bucket) pairs of a signature, each bucket a signed 64-bit hash of the band's rows"""
+    return [
+        (band, int.from_bytes(
+            hashlib.blake2b(sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes(), digest_size=8).digest(),
+            "big", signed=True
+        ))
+        for band in range(BANDS)
+    ]
+
+
+class LSHIndex:
+    """In-memory band index for passes over many leads without a query per lead"""
+
+    def __init__(self):
+        self.buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self.signatures: Dict[int, np.ndarray] = {}
+
+    def add(self, lead_id: int, sig: np.ndarray, buckets: List[Tuple[int, int]]):
+        self.signatures[lead_id] = sig
+        for key in buckets:
+            self.buckets[key].append(lead_id)
+
+    def best_match(self, sig: np.ndarray, buckets: List[Tuple[int, int]], threshold: float) -> Optional[Tuple[int, float]]:
+        candidates = {lead_id for key in buckets for lead_id in self.buckets.get(key, ())}
+        return _best(((lead_id, self.signatures[lead_id]) for lead_id in candidates), sig, threshold)
+
+
+def _best(candidates, sig: np.ndarray, threshold: float) -> Optional[Tuple[int, float]]:
+    best = None
+    for lead_id, candidate in candidates:
+        score = similarity(sig, candidate)
+        if score >= threshold and (best is None or score > best[1] or (score == best[1] and lead_id < best[0])):
+            best = (lead_id, score)
+    return best
+
+
+def find_duplicate(db: Session, sig: np.ndarray, threshold: float) -> Optional[Tuple[int, float]]:
+    """Return (lead_id, similarity) of the most similar canonical lead at or above threshold"""
+    buckets = band_buckets(sig)
+    candidate_ids = db.query(models.LeadLSHBand.lead_id).filter(
+        tuple_(models.LeadLSHBand.band, models.LeadLSHBand.bucket).in_(buckets)
+    ).group_by(models.LeadLSHBand.lead_id).order_by(
+        func.count().desc()
+    ).limit(MAX_CANDIDATES).all()
+    if not candidate_ids:
+        return None
+
+    rows = db.query(models.JobLead.id, models.JobLead.minhash).filter(
+        models.JobLead.id.in_([lead_id for lead_id, in candidate_ids]),
+        models.JobLead.minhash.isnot(None)
+    ).all()
+    return _best(((lead_id, from_bytes(data)) for lead_id, data in rows), sig, threshold)
+
+
+def index_lead(db: Session, lead_id: int, sig: np.ndarray):
+    db.execute(insert(models.LeadLSHBand), [
+        {"band": band, "bucket": bucket, "lead_id": lead_id} for band, bucket in band_buckets(sig)
+    ])
+
+
+def merge_into(original: models.JobLead, values: Dict):
+    """Fill fields the original lead is missing from a duplicate's values"""
+    for field in MERGE_FIELDS:
+        if getattr(original, field) is None and values.get(field) is not None:
+            setattr(original, field, values[field])
+    if original.match_percentage is None and values.get("match_percentage") is not None:
+        for field in ANALYSIS_FIELDS:
+            setattr(original, field, values.get(field))
+
+
+def carry_over_resume_matches(db: Session, merged: List[Tuple[int, int]]):
+    """
+    Copy the per-resume analyses of (duplicate id, original id) pairs to the originals
+    before the duplicates are deleted. An original keeps its own analysis for a resume;
+    between duplicates of one original the most recent analysis wins.
+    """
+    if not merged:
+        return
+    match = models.LeadResumeMatch
+    pairs = values_list(column("duplicate_id", Integer), column("original_id", Integer), name="merged").data(merged)
+    copied = ("resume_id", "match_percentage", "match_reasoning", "resume_content_hash", "analyzed_at")
+    db.execute(pg_insert(match).from_select(
+        ["lead_id", *copied],
+        select(pairs.c.original_id, *(getattr(match, name) for name in copied))
+        .join(pairs, match.lead_id == pairs.c.duplicate_id)
+        .order_by(match.analyzed_at.desc())
+    ).on_conflict_do_nothing(index_elements=[match.lead_id, match.resume_id]))
+
+
+def register_lead(db: Session, lead: models.JobLead) -> models.JobLead:
+    """
+    Add a new lead to the session, applying the configured duplicate action.
+    Returns the lead the caller should report: the new one, or the original for merge.
+    """
+    settings = get_settings()
+    sig = signature(lead.job_ad_content)
+    lead.minhash = to_bytes(sig)
+
+    match = None
+    if settings.lead_dedup_action != "off":
+        match = find_duplicate(db, sig, settings.lead_dedup_threshold)
+    if match:
+        original_id, score = match
+        if settings.lead_dedup_action == "reject":
+            raise DuplicateLeadError(original_id, score)
+        if settings.lead_dedup_action == "merge":
+            original = db.query(models.JobLead).filter(models.JobLead.id == original_id).first()
+            merge_into(original, {field: getattr(lead, field) for field in MERGE_FIELDS + ANALYSIS_FIELDS})
+            return original
+        lead.duplicate_of_id = original_id
+        db.add(lead)
+        return lead
+
+    db.add(lead)
+    db.flush()
+    index_lead(db, lead.id, sig)
+    return lead
+
+
+def reindex_lead(db: Session, lead: models.JobLead):
+    """Recompute a lead's signature after its ad changed"""
+    sig = signature(lead.job_ad_content)
+    lead.minhash = to_bytes(sig)
+    db.query(models.LeadLSHBand).filter(models.LeadLSHBand.lead_id == lead.id).delete(synchronize_session=False)
+    if lead.duplicate_of_id is None:
+        index_lead(db, lead.id, sig)
@@ -0,0 +1,178 @@
+"""
+Streaming table exports as CSV, NDJSON or Parquet.
+
+Rows are read through a server-side cursor one partition at a time and each
+partition is encoded and handed to the response before the next is fetched,
+so memory use depends on the chunk size, not the table size.
+"""
+import csv
+import enum
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import Boolean, DateTime, Enum, Float, Integer, LargeBinary, select
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from app import models
+from app.database import SessionLocal
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is unavailable without pyarrow
+    pa = pq = None
+
+EXPORTS = {
+    "leads": (models.JobLead, models.JobLead.updated_at),
+    "applications": (models.JobApplication, models.JobApplication.updated_at),
+    "history": (models.StageHistory, models.StageHistory.changed_at),
+}
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def export_columns(model) -> List:
+    """Every column except internal search and similarity data"""
+    return [
+        column for column in model.__table__.columns
+        if not isinstance(column.type, (LargeBinary, TSVECTOR))
+    ]
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _encode_csv(names: List[str], partitions) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for rows in partitions:
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    # The header alone when there are no rows
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(names: List[str], partitions) -> Iterator[bytes]:
+    for rows in partitions:
+        yield "".join(
+            json.dumps(dict(zip(names, (_plain(value) for value in row)))) + "\n" for row in rows
+        ).encode("utf-8")
+
+
+def _arrow_type(column):
+    if isinstance(column.type, Enum):
+        return pa.string()
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands over what was written since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # Parquet records absolute offsets in its footer, so this must not reset on drain
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _encode_parquet(columns: List, partitions, compression: str) -> Iterator[bytes]:
+    schema = pa.schema([(column.name, _arrow_type(column)) for column in columns])
+    sink = _ChunkSink()
+    # One row group per partition, flushed to the client as soon as it is written
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression=compression) as writer:
+        for rows in partitions:
+            values = list(zip(*rows))
+            writer.write_table(pa.table(
+                [pa.array([value.value if isinstance(value, enum.Enum) else value for value in column_values], type=field.type)
+                 for column_values, field in zip(values, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(
+    table: str,
+    fmt: str,
+    gzip: bool = False,
+    since: Optional[datetime] = None,
+    chunk_size: int = 1000
+) -> Iterator[bytes]:
+    """
+    Encode a whole table in id order. The generator owns its Session, since it is
+    consumed by the response after the request's dependencies have been closed.
+    """
+    model, changed_column = EXPORTS[table]
+    columns = export_columns(model)
+    query = select(*columns).order_by(model.id).execution_options(yield_per=chunk_size)
+    if since is not None:
+        query = query.where(changed_column >= since)
+
+    db = SessionLocal()
+    try:
+        partitions = db.execute(query).partitions()
+        if fmt == "parquet":
+            # Parquet compresses inside the file rather than being wrapped
+            yield from _encode_parquet(columns, partitions, "gzip" if gzip else "snappy")
+            return
+        encoded = _encode_csv([column.name for column in columns], partitions) if fmt == "csv" else \
+            _encode_ndjson([column.name for column in columns], partitions)
+        yield from _gzip(encoded) if gzip else encoded
+    finally:
+        db.close()
+
+
+def export_media_type(fmt: str, gzip: bool) -> str:
+    return "application/gzip" if gzip and fmt != "parquet" else MEDIA_TYPES[fmt]
+
+
+def export_headers(table: str, fmt: str, gzip: bool) -> Dict[str, str]:
+    filename = f"{table}.{fmt}" + (".gz" if gzip and fmt != "parquet" else "")
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
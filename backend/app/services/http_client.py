@@ -0,0 +1,22 @@
+import httpx
+from app.config import Settings
+
+
+def create_http_client(settings: Settings) -> httpx.AsyncClient:
+    """
+    Build the application-wide async HTTP client.
+    A single client is shared by all requests so connections to OpenRouter are
+    pooled and kept alive instead of paying TCP+TLS setup on every AI call.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.openrouter_max_connections,
+        max_keepalive_connections=settings.openrouter_max_keepalive_connections,
+        keepalive_expiry=settings.openrouter_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(
+        connect=settings.openrouter_connect_timeout,
+        read=settings.openrouter_read_timeout,
+        write=settings.openrouter_write_timeout,
+        pool=settings.openrouter_pool_timeout,
+    )
+    return httpx.AsyncClient(http2=settings.openrouter_http2, limits=limits, timeout=timeout)
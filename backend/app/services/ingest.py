@@ -0,0 +1,229 @@
+"""
+Bulk lead ingestion from NDJSON or CSV.
+
+Input is consumed as an iterator of byte chunks and parsed record by record, so
+neither the API nor the CLI ever holds a whole file. Valid rows are inserted in
+chunks with multi-row INSERTs, one transaction per chunk; invalid rows are
+reported by row number and skipped.
+"""
+import codecs
+import csv
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import BigInteger, SmallInteger, and_, column, func, insert, update, values as values_list
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.config import get_settings
+from app.services.dedup import LSHIndex, MERGE_FIELDS, band_buckets, from_bytes, signature, to_bytes
+from app.services.prescore import prescore_texts
+
+FORMATS = ("ndjson", "csv")
+
+
+class IngestFormatError(ValueError):
+    """The input cannot be parsed at all, e.g. a CSV without a header"""
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Split a stream of UTF-8 byte chunks into lines without their terminators"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def parse_ndjson(lines: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, object or error message) for each non-blank line"""
+    for row, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row, json.loads(line)
+        except ValueError as e:
+            yield row, f"Invalid JSON: {e}"
+
+
+def _csv_records(lines: Iterable[str]) -> Iterator[str]:
+    # A quoted field may span lines; a record is complete once its quotes balance
+    record = None
+    for line in lines:
+        record = line if record is None else record + "\n" + line
+        if record.count('"') % 2 == 0:
+            yield record
+            record = None
+    if record is not None:
+        yield record
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, dict or error message) for each data row, keyed by the header row"""
+    records = _csv_records(lines)
+    header = next(records, None)
+    if header is None:
+        return
+    columns = [name.strip() for name in next(csv.reader([header]))]
+    if "job_ad_content" not in columns:
+        raise IngestFormatError("CSV header must include a job_ad_content column")
+
+    for row, record in enumerate(records, start=1):
+        if not record.strip():
+            continue
+        try:
+            values = next(csv.reader([record]))
+        except csv.Error as e:
+            yield row, f"Invalid CSV: {e}"
+            continue
+        if len(values) > len(columns):
+            yield row, f"Expected {len(columns)} columns, got {len(values)}"
+            continue
+        yield row, {name: value or None for name, value in zip(columns, values)}
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}" for detail in error.errors()
+    )
+
+
+def _load_candidates(db: Session, buckets: List[Tuple[int, int]]) -> LSHIndex:
+    """Index the canonical leads sharing any of the given band buckets"""
+    index = LSHIndex()
+    if not buckets:
+        return index
+    # Joined against a VALUES list; a row-value IN list this long exhausts the planner's stack
+    probe = values_list(column("band", SmallInteger), column("bucket", BigInteger), name="probe").data(buckets)
+    lead_ids = [lead_id for lead_id, in db.query(models.LeadLSHBand.lead_id).join(
+        probe, and_(models.LeadLSHBand.band == probe.c.band, models.LeadLSHBand.bucket == probe.c.bucket)
+    ).distinct()]
+    if lead_ids:
+        rows = db.query(models.JobLead.id, models.JobLead.minhash).filter(
+            models.JobLead.id.in_(lead_ids),
+            models.JobLead.minhash.isnot(None)
+        )
+        for lead_id, data in rows:
+            sig = from_bytes(data)
+            index.add(lead_id, sig, band_buckets(sig))
+    return index
+
+
+class _Result:
+    def __init__(self, max_errors: int):
+        self.received = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.max_errors = max_errors
+
+    def error(self, row: int, message: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+def _insert_chunk(db: Session, chunk: List[Tuple[int, Dict[str, Any]]], result: _Result):
+    """Deduplicate, prescore and insert one chunk of validated rows, then commit"""
+    settings = get_settings()
+    action = settings.lead_dedup_action
+
+    signatures = [signature(values["job_ad_content"]) for _, values in chunk]
+    buckets = [band_buckets(sig) for sig in signatures]
+    index = _load_candidates(db, sorted({key for row_buckets in buckets for key in row_buckets}))
+
+    # New canonical rows are indexed under -(position) until they have an ID
+    canonical: List[int] = []
+    linked: List[Tuple[int, int]] = []
+    for position, ((row, values), sig, row_buckets) in enumerate(zip(chunk, signatures, buckets)):
+        values["minhash"] = to_bytes(sig)
+        match = index.best_match(sig, row_buckets, settings.lead_dedup_threshold) if action != "off" else None
+        if match is None:
+            index.add(-(position + 1), sig, row_buckets)
+            canonical.append(position)
+            continue
+
+        original, score = match
+        if action == "reject":
+            target = f"job lead {original}" if original > 0 else f"row {chunk[-original - 1][0]}"
+            result.error(row, f"Duplicate of {target} ({score:.0%} similar)")
+            continue
+        result.duplicates += 1
+        if action == "merge":
+            fill = {field: values[field] for field in MERGE_FIELDS if values.get(field) is not None}
+            if original < 0:
+                pending = chunk[-original - 1][1]
+                for field, value in fill.items():
+                    pending[field] = pending.get(field) or value
+            elif fill:
+                db.execute(update(models.JobLead).where(models.JobLead.id == original).values({
+                    field: func.coalesce(getattr(models.JobLead, field), value) for field, value in fill.items()
+                }))
+            continue
+        linked.append((position, original))
+
+    rows = [chunk[position][1] for position in canonical] + [chunk[position][1] for position, _ in linked]
+    for values, (vector, prescore) in zip(rows, prescore_texts(db, [values["job_ad_content"] for values in rows])):
+        values["prescore_vector"] = vector
+        values["prescore"] = prescore
+
+    new_ids: Dict[int, int] = {}
+    if canonical:
+        ids = db.execute(
+            insert(models.JobLead).returning(models.JobLead.id, sort_by_parameter_order=True),
+            [chunk[position][1] for position in canonical]
+        ).scalars().all()
+        new_ids = {-(position + 1): lead_id for position, lead_id in zip(canonical, ids)}
+        db.execute(insert(models.LeadLSHBand), [
+            {"band": band, "bucket": bucket, "lead_id": lead_id}
+            for position, lead_id in zip(canonical, ids)
+            for band, bucket in buckets[position]
+        ])
+    if linked:
+        db.execute(insert(models.JobLead), [
+            {**chunk[position][1], "duplicate_of_id": new_ids.get(original, original)}
+            for position, original in linked
+        ])
+    db.commit()
+    result.inserted += len(canonical) + len(linked)
+
+
+def ingest_leads(db: Session, lines: Iterable[str], fmt: str, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """Parse, validate and insert leads, returning counts and per-row errors"""
+    settings = get_settings()
+    chunk_size = chunk_size or settings.bulk_ingest_chunk_size
+    result = _Result(settings.bulk_ingest_max_errors)
+    records = parse_csv(lines) if fmt == "csv" else parse_ndjson(lines)
+
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+    for row, record in records:
+        result.received += 1
+        if isinstance(record, str):
+            result.error(row, record)
+            continue
+        try:
+            lead = schemas.JobLeadCreate.model_validate(record)
+        except ValidationError as e:
+            result.error(row, _validation_message(e))
+            continue
+        chunk.append((row, lead.model_dump()))
+        if len(chunk) >= chunk_size:
+            _insert_chunk(db, chunk, result)
+            chunk = []
+    if chunk:
+        _insert_chunk(db, chunk, result)
+    return result.as_dict()
@@ -0,0 +1,208 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app import models
+
+
+class NotFoundError(LookupError):
+    """A lead or resume needed by an operation does not exist"""
+
+
+def get_resume_for_analysis(db: Session, resume_id: Optional[int] = None) -> Optional[models.Resume]:
+    """Return the requested resume, or the active one if no ID is given"""
+    if resume_id:
+        return db.query(models.Resume).filter(models.Resume.id == resume_id).first()
+    return db.query(models.Resume).filter(models.Resume.is_active == True).first()
+
+
+def get_lead_or_raise(db: Session, lead_id: int) -> models.JobLead:
+    lead = db.query(models.JobLead).filter(models.JobLead.id == lead_id).first()
+    if not lead:
+        raise NotFoundError("Job lead not found")
+    return lead
+
+
+def get_resume_content(db: Session, resume_id: Optional[int] = None) -> str:
+    """Return the text of the requested or active resume"""
+    resume = get_resume_for_analysis(db, resume_id)
+    if not resume:
+        raise NotFoundError("Resume not found" if resume_id else "No active resume found")
+    return resume.content
+
+
+def load_analysis_inputs(db: Session, lead_id: int, resume_id: Optional[int] = None) -> Tuple[str, str]:
+    """Return (job_ad_content, resume_content) for analyzing a lead"""
+    lead = get_lead_or_raise(db, lead_id)
+    return lead.job_ad_content, get_resume_content(db, resume_id)
+
+
+def resume_content_hash(content: str) -> str:
+    """Version of a resume for stored match results; unlike updated_at it only changes with the text"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def load_resume_match_inputs(
+    db: Session,
+    lead_id: int,
+    resume_ids: Optional[List[int]] = None
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Return the lead's job ad and, per resume, its content and the stored match result
+    if one exists for the resume's current version.
+    """
+    lead = get_lead_or_raise(db, lead_id)
+    query = db.query(models.Resume)
+    if resume_ids is not None:
+        query = query.filter(models.Resume.id.in_(resume_ids))
+    resumes = query.order_by(models.Resume.id).all()
+    if resume_ids is not None:
+        missing = sorted(set(resume_ids) - {resume.id for resume in resumes})
+        if missing:
+            raise NotFoundError(f"Resumes not found: {', '.join(str(resume_id) for resume_id in missing)}")
+    if not resumes:
+        raise NotFoundError("No resumes found")
+
+    stored = {
+        match.resume_id: match
+        for match in db.query(models.LeadResumeMatch).filter(
+            models.LeadResumeMatch.lead_id == lead_id,
+            models.LeadResumeMatch.resume_id.in_([resume.id for resume in resumes])
+        )
+    }
+    inputs = []
+    for resume in resumes:
+        match = stored.get(resume.id)
+        content_hash = resume_content_hash(resume.content)
+        current = match is not None and match.resume_content_hash == content_hash
+        inputs.append({
+            "resume_id": resume.id,
+            "file_name": resume.file_name,
+            "is_active": bool(resume.is_active),
+            "content": resume.content,
+            "content_hash": content_hash,
+            "stored": {"match_percentage": match.match_percentage, "reasoning": match.match_reasoning} if current else None,
+        })
+    return lead.job_ad_content, inputs
+
+
+def save_resume_matches(db: Session, lead_id: int, results: List[Dict[str, Any]]):
+    """Upsert fresh per-resume results without touching the lead's own match fields"""
+    if not results:
+        return
+    now = datetime.utcnow()
+    stmt = pg_insert(models.LeadResumeMatch).values([
+        {
+            "lead_id": lead_id,
+            "resume_id": result["resume_id"],
+            "match_percentage": result["match_percentage"],
+            "match_reasoning": result["reasoning"],
+            "resume_content_hash": result["resume_content_hash"],
+            "analyzed_at": now,
+        }
+        for result in results
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[models.LeadResumeMatch.lead_id, models.LeadResumeMatch.resume_id],
+        set_={
+            "match_percentage": stmt.excluded.match_percentage,
+            "match_reasoning": stmt.excluded.match_reasoning,
+            "resume_content_hash": stmt.excluded.resume_content_hash,
+            "analyzed_at": stmt.excluded.analyzed_at,
+        }
+    ))
+    db.commit()
+
+
+def clear_resume_matches(db: Session, lead_id: int):
+    """Forget per-resume results once the job ad they were computed from changes"""
+    db.query(models.LeadResumeMatch).filter(
+        models.LeadResumeMatch.lead_id == lead_id
+    ).delete(synchronize_session=False)
+
+
+def load_lead_ad(db: Session, lead_id: int) -> str:
+    return get_lead_or_raise(db, lead_id).job_ad_content
+
+
+def select_leads_for_analysis(
+    db: Session,
+    lead_ids: Optional[List[int]] = None,
+    unscored_only: bool = False,
+    top_n: Optional[int] = None
+) -> List[Tuple[int, str]]:
+    """
+    Return (id, job_ad_content) pairs for the given leads, or all non-promoted leads.
+    With top_n, only the highest-prescored leads are returned so LLM calls go where they matter.
+    """
+    query = db.query(models.JobLead.id, models.JobLead.job_ad_content)
+    if lead_ids is not None:
+        query = query.filter(models.JobLead.id.in_(lead_ids))
+    else:
+        # Near-duplicates share their original's analysis, so they are not sent again
+        query = query.filter(models.JobLead.is_promoted == False, models.JobLead.duplicate_of_id.is_(None))
+    if unscored_only:
+        query = query.filter(models.JobLead.match_percentage.is_(None))
+    if top_n is not None:
+        query = query.order_by(models.score_sort_key(models.JobLead.prescore).desc(), models.JobLead.id.desc()).limit(top_n)
+    else:
+        query = query.order_by(models.JobLead.id)
+    return [(lead_id, job_ad) for lead_id, job_ad in query.all()]
+
+
+def apply_match_result(lead: models.JobLead, result: Dict[str, Any]):
+    """Copy an analyze_job_match result onto a lead"""
+    lead.match_percentage = result["match_percentage"]
+    lead.match_reasoning = result["reasoning"]
+
+
+def save_match_result(db: Session, lead_id: int, result: Dict[str, Any]):
+    lead = get_lead_or_raise(db, lead_id)
+    apply_match_result(lead, result)
+    db.commit()
+
+
+def promote_lead_to_application(db: Session, lead: models.JobLead, extracted: Dict[str, Any]) -> models.JobApplication:
+    """
+    Create a job application and its first stage history entry from a lead and
+    AI-extracted fields, and delete the lead. Flushed but not committed, so the caller
+    commits the whole promotion at once.
+    """
+    # Use extracted company name only if it's valid (not "Unknown" or empty)
+    extracted_company = extracted.get("company_name", "")
+    # Determine company_name with clear logic
+    if lead.company_name:
+        if not extracted_company or extracted_company == "Unknown":
+            company_name = lead.company_name
+        else:
+            company_name = extracted_company
+    elif extracted_company and extracted_company != "Unknown":
+        company_name = extracted_company
+    else:
+        company_name = "Unknown"
+
+    # Use extracted role name only if it's valid
+    extracted_role = extracted.get("role_name", "")
+    role_name = lead.role_name if lead.role_name and (not extracted_role or extracted_role == "Unknown") else extracted_role or "Unknown"
+
+    application_data = {
+        "company_name": company_name,
+        "role_name": role_name,
+        "stage": models.JobStage.NOT_STARTED,
+        "job_ad_content": lead.job_ad_content,
+        "match_percentage": lead.match_percentage,
+        "match_reasoning": lead.match_reasoning,
+    }
+
+    db_application = models.JobApplication(**application_data)
+    # Inserted with the application in the same flush
+    db_application.stage_history = [models.StageHistory(
+        previous_stage=None,
+        new_stage=models.JobStage.NOT_STARTED,
+        changed_at=datetime.utcnow()
+    )]
+    db.add(db_application)
+    db.delete(lead)
+    db.flush()
+    return db_application
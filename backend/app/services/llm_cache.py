@@ -0,0 +1,170 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Any, Optional
+from app.config import get_settings
+from app.database import SessionLocal
+from app import models
+
+
+class LLMResultCache:
+    """
+    Two-tier cache of LLM results keyed by a hash of everything that influences the output.
+    An in-process LRU sits in front of the persistent llm_cache table, which survives
+    restarts and is shared between replicas.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        max_entries: int,
+        memory_entries: int,
+        touch_interval_seconds: int = 3600,
+        evict_interval_seconds: float = 300.0
+    ):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.touch_interval = timedelta(seconds=touch_interval_seconds)
+        self.evict_interval = evict_interval_seconds
+        self._last_evicted: Optional[float] = None
+        self._memory: "OrderedDict[str, tuple[datetime, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.database_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, *parts: str) -> str:
+        """Hash the model, prompt template version and prompt inputs into a cache key"""
+        digest = hashlib.sha256()
+        for part in (model, prompt_version, *parts):
+            encoded = (part or "").encode("utf-8")
+            # Length-prefix each part so ("ab", "c") and ("a", "bc") never collide
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key, or None on a miss"""
+        now = datetime.utcnow()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                stored_at, result = cached
+                if now - stored_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return result
+                del self._memory[key]
+
+        entry_table = models.LLMCacheEntry
+        db = SessionLocal()
+        try:
+            entry = db.query(
+                entry_table.result, entry_table.created_at, entry_table.last_accessed_at
+            ).filter(entry_table.cache_key == key).first()
+            if entry is None:
+                result = None
+            elif now - entry.created_at > self.ttl:
+                db.query(entry_table).filter(entry_table.cache_key == key).delete(synchronize_session=False)
+                db.commit()
+                result = None
+            else:
+                stored_at = entry.created_at
+                result = json.loads(entry.result)
+                # Hits are reads; the access time only needs to be good enough for LRU
+                # eviction, so it is written at most once per touch interval
+                if now - entry.last_accessed_at > self.touch_interval:
+                    db.query(entry_table).filter(
+                        entry_table.cache_key == key,
+                        entry_table.last_accessed_at < now - self.touch_interval
+                    ).update(
+                        {"hit_count": entry_table.hit_count + 1, "last_accessed_at": now},
+                        synchronize_session=False
+                    )
+                    db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.database_hits += 1
+            self._remember(key, stored_at, result)
+        return result
+
+    def set(self, key: str, model: str, prompt_version: str, result: Dict[str, Any]):
+        """Store a result in both tiers, evicting expired or excess rows once per evict interval"""
+        now = datetime.utcnow()
+        with self._lock:
+            self._remember(key, now, result)
+            evict = self._last_evicted is None or time.monotonic() - self._last_evicted >= self.evict_interval
+            if evict:
+                self._last_evicted = time.monotonic()
+
+        db = SessionLocal()
+        try:
+            db.merge(models.LLMCacheEntry(
+                cache_key=key,
+                model=model,
+                prompt_version=prompt_version,
+                result=json.dumps(result),
+                hit_count=0,
+                created_at=now,
+                last_accessed_at=now
+            ))
+            if evict:
+                db.flush()
+                self._evict(db, now)
+            db.commit()
+        finally:
+            db.close()
+
+    def _remember(self, key: str, stored_at: datetime, result: Dict[str, Any]):
+        self._memory[key] = (stored_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, db, now: datetime):
+        """Drop expired rows, then the least recently used rows beyond max_entries"""
+        db.query(models.LLMCacheEntry).filter(
+            models.LLMCacheEntry.created_at < now - self.ttl
+        ).delete(synchronize_session=False)
+
+        overflow = db.query(models.LLMCacheEntry.cache_key).order_by(
+            models.LLMCacheEntry.last_accessed_at.desc()
+        ).offset(self.max_entries)
+        db.query(models.LLMCacheEntry).filter(
+            models.LLMCacheEntry.cache_key.in_(overflow.scalar_subquery())
+        ).delete(synchronize_session=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.database_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "database_hits": self.database_hits,
+                "misses": self.misses,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+@lru_cache()
+def get_llm_cache() -> LLMResultCache:
+    settings = get_settings()
+    return LLMResultCache(
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+        max_entries=settings.llm_cache_max_entries,
+        memory_entries=settings.llm_cache_memory_entries,
+        touch_interval_seconds=settings.llm_cache_touch_interval_seconds,
+        evict_interval_seconds=settings.llm_cache_evict_interval_seconds
+    )
@@ -0,0 +1,335 @@
+"""
+Tolerant parsing of JSON written by a model.
+
+Well-formed output is parsed once by orjson (or the standard library when orjson
+is not installed). Anything else gets a single lenient pass that skips prose and
+code fences around the JSON, keeps raw control characters inside strings,
+ignores trailing commas and closes whatever a truncated answer left open.
+StreamingFieldParser applies the same rules to output arriving in chunks.
+"""
+import json
+import re
+from typing import Any, Dict, Tuple
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library parser
+    orjson = None
+
+ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+_WHITESPACE = re.compile(r"\s*")
+_STRING_RUN = re.compile(r'[^"\\]*')
+_NUMBER = re.compile(r"-?(?:\d+)(?:\.\d*)?(?:[eE][+-]?\d*)?")
+_BARE_KEY = re.compile(r"[A-Za-z_$][\w$]*")
+_LITERALS = {"true": True, "false": False, "null": None}
+_SCALAR_START = set("-0123456789tfn")
+
+
+class ModelJSONError(ValueError):
+    """The model output holds no recognisable JSON value"""
+
+
+def fast_loads(data) -> Any:
+    """Strict parse of str or bytes, with orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def loads(text: str) -> Any:
+    """Parse model output, repairing it when it is not valid JSON"""
+    start = _value_start(text)
+    try:
+        return fast_loads(text if start == 0 else text[start:])
+    except ValueError:
+        pass
+    value, _ = _Parser(text).value(start)
+    return value
+
+
+def _value_start(text: str) -> int:
+    """Index of the JSON value, past any leading prose or an opening code fence"""
+    i = _WHITESPACE.match(text).end()
+    if _starts_value(text, i):
+        return i
+    fence = text.find("```", i)
+    if fence != -1:
+        # Skip the fence and its language tag, e.g. ```json
+        i = text.find("\n", fence)
+        i = _WHITESPACE.match(text, i).end() if i != -1 else len(text)
+        if _starts_value(text, i):
+            return i
+    candidates = [index for index in (text.find("{", i), text.find("[", i)) if index != -1]
+    if not candidates:
+        raise ModelJSONError("No JSON value in model output")
+    return min(candidates)
+
+
+def _starts_value(text: str, i: int) -> bool:
+    """
+    Whether a JSON value starts at i. A bare number or literal only counts when it is
+    the whole answer, so prose such as "the result: {...}" or "1. Parsed" is skipped.
+    """
+    if i >= len(text):
+        return False
+    if text[i] in "{[":
+        return True
+    if text[i] not in _SCALAR_START:
+        return False
+    match = _NUMBER.match(text, i)
+    if match:
+        end = match.end()
+    else:
+        literal = next((literal for literal in _LITERALS if text.startswith(literal, i)), None)
+        if literal is None:
+            return False
+        end = i + len(literal)
+    rest = text[end:].strip()
+    return not rest or rest.startswith("```")
+
+
+def _decode_unicode_escape(text: str, i: int) -> Tuple[str, int]:
+    """Decode the \\uXXXX escape whose hex digits start at i, joining surrogate pairs"""
+    try:
+        code = int(text[i:i + 4], 16)
+    except ValueError:
+        return "\ufffd", min(i + 4, len(text))
+    i += 4
+    if 0xD800 <= code < 0xDC00 and text[i:i + 2] == "\\u":
+        try:
+            low = int(text[i + 2:i + 6], 16)
+        except ValueError:
+            low = 0
+        if 0xDC00 <= low < 0xE000:
+            return chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)), i + 6
+    if 0xD800 <= code < 0xE000:
+        # A lone surrogate cannot be encoded as UTF-8 when the value is stored
+        return "\ufffd", i
+    return chr(code), i
+
+
+class _Parser:
+    """Recursive descent over the whole text; reaching the end closes every open value"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.end = len(text)
+
+    def skip(self, i: int) -> int:
+        return _WHITESPACE.match(self.text, i).end()
+
+    def value(self, i: int) -> Tuple[Any, int]:
+        i = self.skip(i)
+        if i >= self.end:
+            raise ModelJSONError("Model output ended before a value")
+        char = self.text[i]
+        if char == "{":
+            return self.object(i + 1)
+        if char == "[":
+            return self.array(i + 1)
+        if char == '"':
+            return self.string(i + 1)
+        match = _NUMBER.match(self.text, i)
+        if match:
+            raw = match.group().rstrip(".eE+-")
+            return (float(raw) if any(c in raw for c in ".eE") else int(raw)), match.end()
+        for literal, value in _LITERALS.items():
+            # A literal cut off at the end, e.g. "tr", still counts
+            if self.text.startswith(literal, i) or (
+                self.end - i < len(literal) and literal.startswith(self.text[i:])
+            ):
+                return value, min(i + len(literal), self.end)
+        raise ModelJSONError(f"Unexpected {char!r} at position {i} of model output")
+
+    def object(self, i: int) -> Tuple[Dict[str, Any], int]:
+        result: Dict[str, Any] = {}
+        while True:
+            i = self.skip(i)
+            if i >= self.end:
+                return result, i
+            char = self.text[i]
+            if char == "}":
+                return result, i + 1
+            if char == ",":
+                i += 1
+                continue
+            if char == '"':
+                key, i = self.string(i + 1)
+            else:
+                match = _BARE_KEY.match(self.text, i)
+                if not match:
+                    raise ModelJSONError(f"Unexpected {char!r} at position {i} of model output")
+                key, i = match.group(), match.end()
+            i = self.skip(i)
+            if i < self.end and self.text[i] == ":":
+                i = self.skip(i + 1)
+            if i >= self.end:
+                # Cut off before the value; drop the key rather than invent one
+                return result, i
+            result[key], i = self.value(i)
+
+    def array(self, i: int) -> Tuple[list, int]:
+        result = []
+        while True:
+            i = self.skip(i)
+            if i >= self.end:
+                return result, i
+            char = self.text[i]
+            if char == "]":
+                return result, i + 1
+            if char == ",":
+                i += 1
+                continue
+            value, i = self.value(i)
+            result.append(value)
+
+    def string(self, i: int) -> Tuple[str, int]:
+        # Raw control characters fall inside the runs and are kept as-is
+        parts = []
+        text = self.text
+        while True:
+            match = _STRING_RUN.match(text, i)
+            parts.append(match.group())
+            i = match.end()
+            if i >= self.end:
+                return "".join(parts), i
+            if text[i] == '"':
+                return "".join(parts), i + 1
+            escape = text[i + 1:i + 2]
+            if escape == "u":
+                char, i = _decode_unicode_escape(text, i + 2)
+                parts.append(char)
+            else:
+                # Unknown escapes such as \' keep the escaped character
+                parts.append(ESCAPES.get(escape, escape))
+                i += 2
+
+
+class StreamingFieldParser:
+    """
+    Incremental parser for a flat JSON object arriving in arbitrary text chunks.
+    Reports each top-level field once its value is complete, and the text of
+    string fields named in stream_fields as it arrives.
+    """
+
+    def __init__(self, stream_fields=()):
+        self.stream_fields = set(stream_fields)
+        self.values: Dict[str, Any] = {}
+        self._state = "start"
+        self._key = None
+        self._buffer = []
+        self._escape = None
+        self._high_surrogate = None
+        self._depth = 0
+
+    def feed(self, text: str) -> list:
+        """Consume a chunk, returning ("value", key, value) and ("delta", key, text) events"""
+        events = []
+        delta = []
+        for char in text:
+            state = self._state
+            if state == "start":
+                if char == "{":
+                    self._state = "key_or_end"
+            elif state in ("key_or_end", "after_value"):
+                if char == '"':
+                    self._state, self._buffer = "key", []
+                elif char == "}":
+                    self._state = "end"
+            elif state == "key":
+                if self._string_char(char):
+                    self._key = "".join(self._buffer)
+                    self._state = "colon"
+            elif state == "colon":
+                if char == ":":
+                    self._state = "value"
+            elif state == "value":
+                if char == '"':
+                    self._state, self._buffer = "string", []
+                elif not char.isspace():
+                    self._state, self._buffer, self._depth = "scalar", [], 0
+                    self._scalar_char(char, events)
+            elif state == "string":
+                before = len(self._buffer)
+                done = self._string_char(char)
+                if self._key in self.stream_fields and len(self._buffer) > before:
+                    delta.append("".join(self._buffer[before:]))
+                if done:
+                    if delta:
+                        events.append(("delta", self._key, "".join(delta)))
+                        delta = []
+                    self._finish("".join(self._buffer), events)
+            elif state == "scalar":
+                self._scalar_char(char, events)
+        if delta:
+            events.append(("delta", self._key, "".join(delta)))
+        return events
+
+    def close(self) -> list:
+        """Finish a value cut off by the end of the output, e.g. a truncated reasoning string"""
+        events = []
+        if self._state == "string":
+            self._finish("".join(self._buffer), events)
+        elif self._state == "scalar":
+            self._finish_scalar(events)
+        return events
+
+    def _string_char(self, char: str) -> bool:
+        """Add one character of a string body to the buffer; True when the closing quote is reached"""
+        if self._escape is not None:
+            self._escape += char
+            if self._escape[0] == "u":
+                if len(self._escape) < 5:
+                    return False
+                try:
+                    code = int(self._escape[1:], 16)
+                except ValueError:
+                    code = 0xFFFD
+                self._escape = None
+                if 0xD800 <= code < 0xDC00:
+                    self._high_surrogate = code
+                    return False
+                if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                    code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+                elif 0xD800 <= code < 0xE000:
+                    code = 0xFFFD
+                self._high_surrogate = None
+                self._buffer.append(chr(code))
+            else:
+                self._buffer.append(ESCAPES.get(self._escape, self._escape))
+                self._escape = None
+            return False
+        if char == "\\":
+            self._escape = ""
+            return False
+        if char == '"':
+            return True
+        # Raw control characters are kept as-is rather than rejected
+        self._buffer.append(char)
+        return False
+
+    def _scalar_char(self, char: str, events: list):
+        if self._depth == 0 and (char in ",}" or char.isspace()):
+            self._finish_scalar(events)
+            if char == "}":
+                self._state = "end"
+            return
+        if char in "[{":
+            self._depth += 1
+        elif char in "]}":
+            self._depth -= 1
+        self._buffer.append(char)
+
+    def _finish_scalar(self, events: list):
+        raw = "".join(self._buffer)
+        try:
+            value, _ = _Parser(raw).value(0)
+        except ModelJSONError:
+            value = raw
+        self._finish(value, events)
+
+    def _finish(self, value: Any, events: list):
+        self.values[self._key] = value
+        events.append(("value", self._key, value))
+        self._state = "after_value"
@@ -1,58 +1,182 @@
 import httpx
-import json
-import re
-from typing import Dict, Any
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
 from app.config import get_settings
+from app.services.llm_cache import LLMResultCache, get_llm_cache
+from app.services.model_json import StreamingFieldParser, fast_loads, loads
+from app.services.prompt_compaction import compact_job_ad, compact_match_inputs
+from app.services.resilience import ResiliencePolicy, UpstreamError
 
-
-def clean_json_string(json_str: str) -> str:
-    """
-    Clean a JSON string by removing/escaping control characters that can cause parsing errors.
-    This handles cases where AI models return unescaped control characters in JSON strings.
-    """
-    # First try to parse as-is
-    try:
-        json.loads(json_str)
-        return json_str
-    except json.JSONDecodeError:
-        pass
-
-    # If that fails, clean the string
-    # Replace common control characters with their escaped versions
-    # We need to be careful to only replace them inside string values, not in the JSON structure itself
-
-    # Strategy: Use regex to find string values and replace control characters within them
-    def replace_control_chars(match):
-        """Replace control characters in a matched JSON string value"""
-        string_content = match.group(1)
-        # Replace control characters with escaped versions
-        string_content = string_content.replace('\n', '\\n')
-        string_content = string_content.replace('\r', '\\r')
-        string_content = string_content.replace('\t', '\\t')
-        string_content = string_content.replace('\b', '\\b')
-        string_content = string_content.replace('\f', '\\f')
-        return f'"{string_content}"'
-
-    # Match JSON string values (quoted strings, handling escaped quotes)
-    # This regex matches: " followed by any chars (including escaped quotes) followed by "
-    cleaned = re.sub(r'"([^"\\]*(?:\\.[^"\\]*)*)"', replace_control_chars, json_str)
-
-    return cleaned
+# Bump when a prompt template changes so cached results from the old prompt are not reused
+ANALYZE_PROMPT_VERSION = "1"
+EXTRACT_PROMPT_VERSION = "1"
 
 
 class OpenRouterService:
-    def __init__(self):
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        cache: Optional[LLMResultCache] = None,
+        resilience: Optional[ResiliencePolicy] = None
+    ):
         self.settings = get_settings()
+        self.client = client
+        self.cache = cache
+        self.resilience = resilience or ResiliencePolicy(self.settings)
         self.base_url = self.settings.openrouter_base_url
         self.api_key = self.settings.openrouter_api_key
         self.model = self.settings.openrouter_model
+        self.models = list(dict.fromkeys([self.model, *self.settings.openrouter_fallback_models]))
+
+    def _request(self, prompt: str, model: str, stream: bool = False) -> httpx.Request:
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+        payload = {
+            "model": model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.3,
+            "response_format": {"type": "json_object"}
+        }
+        if stream:
+            payload["stream"] = True
+
+        return self.client.build_request("POST", f"{self.base_url}/chat/completions", headers=headers, json=payload)
+
+    async def _send(self, prompt: str, stream: bool = False) -> Tuple[str, httpx.Response]:
+        """Send the prompt with retries, rate limiting and model fallback; returns the model that answered"""
+        return await self.resilience.send(
+            self.client, lambda model: self._request(prompt, model, stream), self.models, stream=stream
+        )
+
+    async def _chat_completion(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        """Send a single-prompt chat completion and return the model that answered and the parsed JSON content"""
+        model, response = await self._send(prompt)
+        result = fast_loads(response.content)
+
+        content = result["choices"][0]["message"]["content"]
+
+        # Models wrap answers in fences, leave control characters in strings and get cut off
+        return model, loads(content)
+
+    async def _stream_chat_completion(self, response: httpx.Response, parser: StreamingFieldParser) -> AsyncIterator[tuple]:
+        """Read a streamed chat completion over SSE, yielding parser events as content tokens arrive"""
+        try:
+            async for line in response.aiter_lines():
+                # Skip blank separators and ": OPENROUTER PROCESSING" keep-alive comments
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = fast_loads(data)
+                if "error" in chunk:
+                    raise UpstreamError(f"OpenRouter stream failed: {chunk['error'].get('message', 'unknown error')}")
+                choices = chunk.get("choices") or [{}]
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    for event in parser.feed(content):
+                        yield event
+        finally:
+            await response.aclose()
+        for event in parser.close():
+            yield event
+
+    async def _stream_cached(
+        self,
+        prompt_version: str,
+        parts: tuple,
+        force: bool,
+        prompt: str,
+        stream_fields: tuple,
+        finalize
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield {"field", "value"} and {"field", "delta"} events while the model writes its answer,
+        then {"status": "done", **result}. Cached results are replayed as a single burst; as in
+        _cached, answers from a fallback model are not stored.
+        """
+        key = self.cache.make_key(self.model, prompt_version, *parts) if self.cache is not None else None
+        if key is not None and not force:
+            cached = await run_in_threadpool(self.cache.get, key)
+            if cached is not None:
+                for field, value in cached.items():
+                    yield {"field": field, "delta" if field in stream_fields else "value": value}
+                yield {"status": "done", **cached}
+                return
+
+        parser = StreamingFieldParser(stream_fields)
+        model, response = await self._send(prompt, stream=True)
+        async for kind, field, value in self._stream_chat_completion(response, parser):
+            yield {"field": field, kind: value}
+
+        result = finalize(parser.values)
+        if key is not None and model == self.model:
+            await run_in_threadpool(self.cache.set, key, model, prompt_version, result)
+        yield {"status": "done", **result}
+
+    async def _cached(self, prompt_version: str, parts: tuple, force: bool, compute) -> Dict[str, Any]:
+        """
+        Return a cached result for the prompt inputs, or compute and store it. compute
+        returns (model, result); answers from a fallback model are not cached, so they
+        are not served in the primary model's name once it recovers.
+        """
+        if self.cache is None:
+            return (await compute())[1]
+
+        key = self.cache.make_key(self.model, prompt_version, *parts)
+        if not force:
+            cached = await run_in_threadpool(self.cache.get, key)
+            if cached is not None:
+                return cached
 
-    async def analyze_job_match(self, job_ad: str, resume: str) -> Dict[str, Any]:
+        model, result = await compute()
+        if model == self.model:
+            await run_in_threadpool(self.cache.set, key, model, prompt_version, result)
+        return result
+
+    async def analyze_job_match(self, job_ad: str, resume: str, force: bool = False) -> Dict[str, Any]:
         """
         Analyze how well a job posting matches a resume.
         Returns a dictionary with match_percentage and reasoning.
+        Results are served from the LLM cache unless force is set.
         """
-        prompt = f"""You are a professional career advisor. Analyze how well this job posting matches the candidate's resume.
+        job_ad, resume = compact_match_inputs(job_ad, resume)
+        return await self._cached(
+            ANALYZE_PROMPT_VERSION, (job_ad, resume), force,
+            lambda: self._analyze_job_match(job_ad, resume)
+        )
+
+    def stream_job_match(self, job_ad: str, resume: str, force: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Like analyze_job_match, but yields match_percentage as soon as it is known and reasoning as it is written"""
+        job_ad, resume = compact_match_inputs(job_ad, resume)
+        return self._stream_cached(
+            ANALYZE_PROMPT_VERSION, (job_ad, resume), force,
+            self._analyze_prompt(job_ad, resume), ("reasoning",), self._match_result
+        )
+
+    async def _analyze_job_match(self, job_ad: str, resume: str) -> Tuple[str, Dict[str, Any]]:
+        model, analysis = await self._chat_completion(self._analyze_prompt(job_ad, resume))
+        return model, self._match_result(analysis)
+
+    @staticmethod
+    def _match_result(analysis: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "match_percentage": float(analysis["match_percentage"]),
+            "reasoning": analysis["reasoning"]
+        }
+
+    @staticmethod
+    def _analyze_prompt(job_ad: str, resume: str) -> str:
+        return f"""You are a professional career advisor. Analyze how well this job posting matches the candidate's resume.
 
 Job Posting:
 {job_ad}
@@ -72,48 +196,31 @@ Format your response EXACTLY as JSON:
   "reasoning": "<detailed explanation with \\n for line breaks>"
 }}"""
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
-        payload = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.3,
-            "response_format": {"type": "json_object"}
-        }
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            result = response.json()
-
-            content = result["choices"][0]["message"]["content"]
-
-            # Parse the JSON response, cleaning control characters first
-            cleaned_content = clean_json_string(content)
-            analysis = json.loads(cleaned_content)
-
-            return {
-                "match_percentage": float(analysis["match_percentage"]),
-                "reasoning": analysis["reasoning"]
-            }
-
-    async def extract_job_application_fields(self, job_ad: str) -> Dict[str, Any]:
+    async def extract_job_application_fields(self, job_ad: str, force: bool = False) -> Dict[str, Any]:
         """
         Extract structured information from a job posting to populate job application fields.
+        Results are served from the LLM cache unless force is set.
         """
-        prompt = f"""Extract structured information from this job posting.
+        job_ad = compact_job_ad(job_ad)
+        return await self._cached(
+            EXTRACT_PROMPT_VERSION, (job_ad,), force,
+            lambda: self._extract_job_application_fields(job_ad)
+        )
+
+    def stream_job_application_fields(self, job_ad: str, force: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Like extract_job_application_fields, but yields each field as the model writes it"""
+        job_ad = compact_job_ad(job_ad)
+        return self._stream_cached(
+            EXTRACT_PROMPT_VERSION, (job_ad,), force,
+            self._extract_prompt(job_ad), ("extracted_content",), dict
+        )
+
+    async def _extract_job_application_fields(self, job_ad: str) -> Tuple[str, Dict[str, Any]]:
+        return await self._chat_completion(self._extract_prompt(job_ad))
+
+    @staticmethod
+    def _extract_prompt(job_ad: str) -> str:
+        return f"""Extract structured information from this job posting.
 
 Job Posting:
 {job_ad}
@@ -130,36 +237,8 @@ Format your response EXACTLY as JSON:
   "extracted_content": "<cleaned and formatted job posting content>"
 }}"""
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
-        payload = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.3,
-            "response_format": {"type": "json_object"}
-        }
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            result = response.json()
-
-            content = result["choices"][0]["message"]["content"]
-
-            # Parse the JSON response, cleaning control characters first
-            cleaned_content = clean_json_string(content)
-            extracted = json.loads(cleaned_content)
 
-            return extracted
+def get_openrouter_service(request: Request) -> OpenRouterService:
+    """Dependency providing an OpenRouterService bound to the app-lifetime HTTP client"""
+    cache = get_llm_cache() if get_settings().llm_cache_enabled else None
+    return OpenRouterService(request.app.state.http_client, cache, request.app.state.openrouter_resilience)
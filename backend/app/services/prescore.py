@@ -0,0 +1,140 @@
+"""
+Cheap local pre-screening of leads against the active resume.
+
+Texts are embedded with the hashing trick (unigrams and bigrams hashed into a fixed
+number of signed buckets, sublinear term frequency, L2-normalized) and stored as
+float32 bytes. Scoring every lead is then a single matrix-vector product, which lets
+us rank thousands of ads before spending any LLM calls on them.
+"""
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app import models
+from app.bulk import update_by_id
+
+DIMENSIONS = 1024
+DTYPE = np.float32
+CHUNK_SIZE = 2000
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = frozenset("""
+a about above after all also am an and any are as at be because been being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers
+him his how i if in into is it its itself just me more most my no nor not now of off on once only or
+other our ours out over own same she should so some such than that the their theirs them then there
+these they this those through to too under until up very was we were what when where which while who
+whom why will with would you your yours
+""".split())
+
+
+def _tokens(text: str) -> list:
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def embed(text: str) -> np.ndarray:
+    """Return the unit-length hashed term vector of a text"""
+    tokens = _tokens(text or "")
+    terms = Counter(tokens)
+    terms.update(f"{first} {second}" for first, second in zip(tokens, tokens[1:]))
+
+    vector = np.zeros(DIMENSIONS, dtype=DTYPE)
+    for term, count in terms.items():
+        digest = zlib.crc32(term.encode("utf-8"))
+        # Low bits pick the bucket, one high bit picks the sign to cancel out collisions
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % DIMENSIONS] += sign * (1.0 + math.log(count))
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def to_bytes(vector: np.ndarray) -> bytes:
+    return vector.astype(DTYPE, copy=False).tobytes()
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=DTYPE)
+
+
+def score(lead_vectors: np.ndarray, resume_vector: np.ndarray) -> np.ndarray:
+    """Cosine similarity of each row with the resume, as a 0-100 score"""
+    return np.clip(lead_vectors @ resume_vector, 0.0, 1.0) * 100.0
+
+
+def active_resume_vector(db: Session) -> Optional[np.ndarray]:
+    """Vector of the active resume, filling it in (uncommitted) if it is missing"""
+    resume = db.query(models.Resume).filter(models.Resume.is_active == True).first()
+    if not resume:
+        return None
+    if resume.prescore_vector is None:
+        resume.prescore_vector = to_bytes(embed(resume.content))
+    return from_bytes(resume.prescore_vector)
+
+
+def apply_prescore(db: Session, lead: models.JobLead):
+    """Embed a lead's ad and score it against the active resume"""
+    vector = embed(lead.job_ad_content)
+    lead.prescore_vector = to_bytes(vector)
+    resume_vector = active_resume_vector(db)
+    lead.prescore = float(score(vector[np.newaxis, :], resume_vector)[0]) if resume_vector is not None else None
+
+
+def prescore_texts(db: Session, texts: List[str]) -> List[Tuple[bytes, Optional[float]]]:
+    """(vector bytes, prescore) for many ads at once, scored in one matrix product"""
+    if not texts:
+        return []
+    vectors = np.vstack([embed(text) for text in texts])
+    resume_vector = active_resume_vector(db)
+    scores = score(vectors, resume_vector).tolist() if resume_vector is not None else [None] * len(texts)
+    return [(to_bytes(vector), value) for vector, value in zip(vectors, scores)]
+
+
+def _rescore_chunk(db: Session, rows: Iterable, resume_vector: Optional[np.ndarray]):
+    updates, vectors = [], []
+    for lead_id, job_ad, vector_bytes in rows:
+        # Stored vectors are not sent back; None keeps them
+        row = {"id": lead_id, "prescore": None, "prescore_vector": None}
+        if vector_bytes is None:
+            vector = embed(job_ad)
+            row["prescore_vector"] = to_bytes(vector)
+        else:
+            vector = from_bytes(vector_bytes)
+        updates.append(row)
+        vectors.append(vector)
+
+    if resume_vector is not None:
+        for row, value in zip(updates, score(np.vstack(vectors), resume_vector)):
+            row["prescore"] = float(value)
+    # One statement per chunk, so the statement triggers fire once per chunk rather than per lead
+    update_by_id(db, models.JobLead, updates, keep_when_null=("prescore_vector",))
+
+
+def refresh_prescores(db: Session) -> int:
+    """
+    Re-score every lead against the active resume, embedding leads that have no vector yet.
+    Leads are processed in keyset-ordered chunks so memory stays bounded on large tables.
+    """
+    resume_vector = active_resume_vector(db)
+    db.commit()
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            models.JobLead.id,
+            models.JobLead.job_ad_content,
+            models.JobLead.prescore_vector
+        ).filter(models.JobLead.id > last_id).order_by(models.JobLead.id).limit(CHUNK_SIZE).all()
+        if not rows:
+            break
+        _rescore_chunk(db, rows, resume_vector)
+        db.commit()
+        total += len(rows)
+        last_id = rows[-1][0]
+    return total
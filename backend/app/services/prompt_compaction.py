@@ -0,0 +1,200 @@
+"""
+Shrinking job ads and resumes before they are pasted into a prompt.
+
+Text is normalized (HTML tags and entities, odd whitespace), boilerplate such as
+EEO statements, benefits sections and page chrome is dropped, repeated lines are
+removed, and whatever is still over the configured token budget is cut in the
+middle, keeping the start and the end where requirements usually are.
+"""
+import html
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Tuple
+from app.config import get_settings
+
+TRUNCATION_MARKER = "\n[...]\n"
+
+_TAG = re.compile(r"<[^>]{1,200}>")
+_INVISIBLE = re.compile("[\u200b-\u200f\u2060\ufeff]")
+_SPACES = re.compile(r"[^\S\n]+")
+_HEADING_MARKUP = re.compile(r"^[#*_\s]+|[*_:\s]+$")
+_BULLET = re.compile(r"([-•*·▪]|\d+[.)])\s")
+
+# Lines that carry no information about fit
+_BOILERPLATE = re.compile(
+    r"equal (employment )?opportunity|affirmative action|without regard to|regardless of (race|age|gender)"
+    r"|reasonable accommodation|protected veteran|e-verify|privacy (policy|notice)|cookie (policy|settings)"
+    r"|all rights reserved|^(apply( now)?|apply for this job|easy apply|share( this job)?|save( job)?|sign in"
+    r"|log in|back to (search|jobs|results)|report (this )?job|similar jobs|show (more|less)|see more)$",
+    re.IGNORECASE
+)
+
+# Sections dropped up to the next heading
+_SKIPPED_SECTIONS = re.compile(
+    r"^(benefits|perks|perks (and|&) benefits|benefits (and|&) perks|what we offer|what you('ll| will) get"
+    r"|why (join|work for|work with) us|our benefits|compensation (and|&) benefits|eeo statement"
+    r"|equal opportunity( employer)?|about the benefits)$",
+    re.IGNORECASE
+)
+
+
+class Compacted(NamedTuple):
+    text: str
+    original_tokens: int
+    tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly four characters per token for English prose with common BPE tokenizers"""
+    return (len(text) + 3) // 4
+
+
+def normalize(text: str) -> str:
+    text = _TAG.sub(" ", html.unescape(text))
+    text = _INVISIBLE.sub("", unicodedata.normalize("NFKC", text))
+    return "\n".join(_SPACES.sub(" ", line).strip() for line in text.splitlines())
+
+
+def _heading(line: str, after_blank: bool) -> str:
+    """The heading text if the line looks like a section heading, else an empty string"""
+    if len(line) > 60 or line[-1] in ".!?" or _BULLET.match(line):
+        return ""
+    text = _HEADING_MARKUP.sub("", line)
+    if line.startswith(("#", "**")) or line.endswith(":") or line.isupper():
+        return text
+    # A short capitalised line on its own, e.g. "Benefits" scraped without markup
+    if after_blank and line[0].isupper() and len(text.split()) <= 4:
+        return text
+    return ""
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drop boilerplate lines and sections, repeated lines and blocks, and extra blank lines"""
+    kept = []
+    skipping = False
+    after_blank = True
+    for line in text.split("\n"):
+        if not line:
+            if kept and kept[-1]:
+                kept.append("")
+            after_blank = True
+            continue
+        # Inside a skipped section any heading-like line ends it, so an unmarked
+        # "Your profile" right after the benefits is not swallowed with them
+        heading = _heading(line, after_blank or skipping)
+        after_blank = False
+        if heading:
+            skipping = bool(_SKIPPED_SECTIONS.match(heading))
+        if skipping or _BOILERPLATE.search(line):
+            continue
+        # Scrapes often print the same line twice in a row
+        if kept and kept[-1].lower() == line.lower():
+            continue
+        kept.append(line)
+    return _drop_repeated_blocks(kept)
+
+
+def _drop_repeated_blocks(lines: List[str]) -> str:
+    """
+    Drop paragraphs that repeat an earlier one in full, e.g. a whole section printed
+    twice. Single lines that look like headings are kept, since a resume repeats
+    "Responsibilities:" under every employer.
+    """
+    blocks = []
+    seen = set()
+    for block in "\n".join(lines).strip().split("\n\n"):
+        block_lines = block.split("\n")
+        key = block.lower()
+        if key in seen and (len(block_lines) > 1 or not _heading(block_lines[0], True)):
+            continue
+        seen.add(key)
+        blocks.append(block)
+    return "\n\n".join(blocks)
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Cut the middle out of text so it fits max_tokens, at line breaks where possible"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max(0, max_tokens * 4 - len(TRUNCATION_MARKER))
+    head_size = budget * 2 // 3
+    tail_size = budget - head_size
+
+    head = text[:head_size]
+    cut = head.rfind("\n")
+    if cut > head_size // 2:
+        head = head[:cut]
+    tail = text[len(text) - tail_size:] if tail_size else ""
+    cut = tail.find("\n")
+    if 0 <= cut < tail_size // 2:
+        tail = tail[cut + 1:]
+    return head.rstrip() + TRUNCATION_MARKER + tail.lstrip()
+
+
+def compact(text: str, max_tokens: int) -> Compacted:
+    original_tokens = estimate_tokens(text)
+    compacted = truncate(strip_boilerplate(normalize(text)), max_tokens)
+    return Compacted(compacted, original_tokens, estimate_tokens(compacted))
+
+
+@lru_cache(maxsize=32)
+def compact_resume(content: str, max_tokens: int) -> Compacted:
+    """Keyed by content, so each resume revision is compacted once rather than on every call"""
+    return compact(content, max_tokens)
+
+
+class CompactionStats:
+    """Process-wide counters of estimated prompt tokens before and after compaction"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.truncated = 0
+        self.original_tokens = 0
+        self.tokens = 0
+
+    def record(self, *parts: Compacted):
+        with self._lock:
+            self.calls += 1
+            self.truncated += any(TRUNCATION_MARKER in part.text for part in parts)
+            self.original_tokens += sum(part.original_tokens for part in parts)
+            self.tokens += sum(part.tokens for part in parts)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            saved = self.original_tokens - self.tokens
+            return {
+                "calls": self.calls,
+                "truncated_calls": self.truncated,
+                "original_tokens": self.original_tokens,
+                "prompt_tokens": self.tokens,
+                "tokens_saved": saved,
+                "tokens_saved_per_call": saved / self.calls if self.calls else 0.0,
+                "saved_ratio": saved / self.original_tokens if self.original_tokens else 0.0,
+            }
+
+
+compaction_stats = CompactionStats()
+
+
+def compact_job_ad(job_ad: str) -> str:
+    """Job ad as it should appear in an extraction prompt"""
+    settings = get_settings()
+    if not settings.prompt_compaction_enabled:
+        return job_ad
+    ad = compact(job_ad, settings.prompt_job_ad_token_budget)
+    compaction_stats.record(ad)
+    return ad.text
+
+
+def compact_match_inputs(job_ad: str, resume: str) -> Tuple[str, str]:
+    """Job ad and resume as they should appear in a match prompt"""
+    settings = get_settings()
+    if not settings.prompt_compaction_enabled:
+        return job_ad, resume
+    ad = compact(job_ad, settings.prompt_job_ad_token_budget)
+    cv = compact_resume(resume, settings.prompt_resume_token_budget)
+    compaction_stats.record(ad, cv)
+    return ad.text, cv.text
@@ -0,0 +1,165 @@
+"""
+Retry, rate limiting, circuit breaking and model fallback for OpenRouter calls.
+
+One ResiliencePolicy is shared by every request in a process (it lives on
+app.state next to the HTTP client), so the token bucket enforces our quota
+across concurrent requests and the breakers see every failure.
+"""
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import httpx
+from app.config import Settings
+from app.services.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Rate limited, or the upstream (or the provider behind it) is struggling
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """OpenRouter rejected the request; retrying will not help"""
+    status_code = 502
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UpstreamUnavailableError(UpstreamError):
+    """OpenRouter is down, overloaded or rate limiting us, even after retries and fallbacks"""
+    status_code = 503
+
+
+class CircuitBreaker:
+    """
+    Fails fast after failure_threshold consecutive failures. Once reset_seconds have
+    passed calls are let through again; one more failure re-opens it, a success closes it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        return self.opened_at is None or time.monotonic() - self.opened_at >= self.reset_seconds
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.allow() else "open"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header holding either seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ResiliencePolicy:
+    def __init__(self, settings: Settings):
+        self.max_retries = settings.openrouter_max_retries
+        self.retry_base_seconds = settings.openrouter_retry_base_seconds
+        self.retry_max_seconds = settings.openrouter_retry_max_seconds
+        self.failure_threshold = settings.openrouter_circuit_failure_threshold
+        self.reset_seconds = settings.openrouter_circuit_reset_seconds
+        self.limiter = TokenBucket(settings.openrouter_rate_per_second, settings.openrouter_rate_burst)
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        # Per model, so one provider's outage does not block the fallbacks
+        if model not in self.breakers:
+            self.breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+        return self.breakers[model]
+
+    def backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never sooner than the server asked for"""
+        delay = random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    async def send(
+        self,
+        client: httpx.AsyncClient,
+        build_request: Callable[[str], httpx.Request],
+        models: List[str],
+        stream: bool = False
+    ) -> Tuple[str, httpx.Response]:
+        """
+        Send build_request(model) for each model in turn until one succeeds, retrying
+        retryable failures with backoff. Returns the model that answered and its response;
+        the caller must close a streamed response.
+        """
+        last_error: Optional[UpstreamError] = None
+        for model in models:
+            breaker = self.breaker(model)
+            for attempt in range(self.max_retries + 1):
+                if not breaker.allow():
+                    last_error = UpstreamUnavailableError(
+                        f"Circuit open for {model} after repeated failures", breaker.retry_after()
+                    )
+                    break
+
+                await self.limiter.acquire()
+                retry_after = None
+                try:
+                    response = await client.send(build_request(model), stream=stream)
+                except httpx.TransportError as e:
+                    breaker.record_failure()
+                    last_error = UpstreamUnavailableError(f"Could not reach OpenRouter: {e!r}")
+                else:
+                    if response.status_code < 400:
+                        breaker.record_success()
+                        return model, response
+
+                    detail = (await response.aread()).decode("utf-8", "replace")[:500]
+                    await response.aclose()
+                    if response.status_code not in RETRYABLE_STATUSES:
+                        raise UpstreamError(f"OpenRouter returned {response.status_code}: {detail}")
+                    # Being rate limited says nothing about the upstream's health
+                    if response.status_code != 429:
+                        breaker.record_failure()
+                    retry_after = parse_retry_after(response.headers.get("retry-after"))
+                    last_error = UpstreamUnavailableError(
+                        f"OpenRouter returned {response.status_code}: {detail}", retry_after
+                    )
+
+                if attempt == self.max_retries:
+                    break
+                if retry_after is not None and retry_after > self.retry_max_seconds:
+                    # Not worth holding the request for; try the next model instead
+                    break
+                delay = self.backoff(attempt, retry_after)
+                logger.warning("OpenRouter call to %s failed (%s), retrying in %.1fs", model, last_error, delay)
+                await asyncio.sleep(delay)
+
+            logger.warning("Giving up on %s: %s", model, last_error)
+        raise last_error
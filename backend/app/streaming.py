@@ -0,0 +1,4 @@
+"""Shared settings for responses that are streamed to the client as they are produced."""
+
+# Tell nginx not to buffer so progress and events reach the browser as they happen
+STREAM_HEADERS = {"X-Accel-Buffering": "no"}
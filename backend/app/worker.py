@@ -0,0 +1,154 @@
+"""
+Background worker pool for queued AI jobs.
+
+Run with: python -m app.worker
+"""
+import asyncio
+import logging
+import signal
+from app.config import get_settings
+from app.database import run_db
+from app.http_cache import fold_table_changes
+from app.services.ai_jobs import JOB_HANDLERS, PermanentJobError, claim_job, complete_job, fail_job, heartbeat_job
+from app.services.analytics import refresh_if_changed
+from app.services.applications import ghost_stale_applications
+from app.services.leads import NotFoundError
+from app.services.http_client import create_http_client
+from app.services.llm_cache import get_llm_cache
+from app.services.openrouter import OpenRouterService
+from app.services.resilience import ResiliencePolicy, UpstreamError, UpstreamUnavailableError
+
+logger = logging.getLogger("app.worker")
+
+
+async def keep_alive(job_id: int):
+    """Refresh a running job's heartbeat until cancelled"""
+    interval = get_settings().ai_job_heartbeat_seconds
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_db(heartbeat_job, job_id)
+        except Exception:
+            logger.exception("Could not refresh the heartbeat of job %s", job_id)
+
+
+async def run_job(handler, openrouter: OpenRouterService, payload, job_id: int):
+    """Run a job handler, heartbeating so a slow job is not claimed again while it runs"""
+    heartbeat = asyncio.create_task(keep_alive(job_id))
+    try:
+        return await handler(openrouter, payload)
+    finally:
+        heartbeat.cancel()
+
+
+async def worker_loop(openrouter: OpenRouterService, stop: asyncio.Event):
+    """Claim and run jobs one at a time until asked to stop"""
+    settings = get_settings()
+    while not stop.is_set():
+        try:
+            claimed = await run_db(claim_job)
+        except Exception:
+            # Database unavailable or not migrated yet; back off and try again
+            logger.exception("Could not claim a job")
+            claimed = None
+        if claimed is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.ai_worker_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        job_id, kind, payload = claimed
+        handler = JOB_HANDLERS.get(kind)
+        if handler is None:
+            await run_db(fail_job, job_id, f"Unknown job kind: {kind}", False)
+            continue
+
+        try:
+            result = await run_job(handler, openrouter, payload, job_id)
+        except (PermanentJobError, NotFoundError) as e:
+            logger.warning("Job %s (%s) failed permanently: %s", job_id, kind, e)
+            await run_db(fail_job, job_id, str(e), False)
+        except UpstreamError as e:
+            # Outages are retried later; a request OpenRouter rejected outright is not
+            logger.warning("Job %s (%s) failed upstream: %s", job_id, kind, e)
+            await run_db(fail_job, job_id, str(e), isinstance(e, UpstreamUnavailableError))
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, kind)
+            await run_db(fail_job, job_id, str(e))
+        else:
+            await run_db(complete_job, job_id, result)
+
+
+async def analytics_loop(stop: asyncio.Event):
+    """Keep the analytics materialized views current, refreshing only after data changed"""
+    settings = get_settings()
+    marker = None
+    while not stop.is_set():
+        try:
+            marker = await run_db(refresh_if_changed, marker)
+        except Exception:
+            logger.exception("Could not refresh analytics views")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.analytics_refresh_interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def table_changes_loop(stop: asyncio.Event):
+    """Keep the table change log behind ETags short by folding it into the counters"""
+    settings = get_settings()
+    while not stop.is_set():
+        try:
+            await run_db(fold_table_changes)
+        except Exception:
+            logger.exception("Could not fold the table change log")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.table_changes_fold_interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def ghosting_loop(stop: asyncio.Event):
+    """Periodically mark applications that never got a reply as no answer"""
+    settings = get_settings()
+    while not stop.is_set():
+        try:
+            ghosted = await run_db(ghost_stale_applications, settings.auto_ghost_after_days)
+            if ghosted:
+                logger.info("Marked %d stale applications as no answer", ghosted)
+        except Exception:
+            logger.exception("Could not mark stale applications as no answer")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.auto_ghost_interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main():
+    settings = get_settings()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        # Finish in-flight jobs, then exit
+        loop.add_signal_handler(sig, stop.set)
+
+    client = create_http_client(settings)
+    cache = get_llm_cache() if settings.llm_cache_enabled else None
+    openrouter = OpenRouterService(client, cache, ResiliencePolicy(settings))
+    logger.info("Starting %d AI job workers", settings.ai_worker_concurrency)
+    try:
+        loops = [analytics_loop(stop), table_changes_loop(stop)]
+        if settings.auto_ghost_after_days > 0:
+            loops.append(ghosting_loop(stop))
+        await asyncio.gather(
+            *loops,
+            *(worker_loop(openrouter, stop) for _ in range(settings.ai_worker_concurrency))
+        )
+    finally:
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+import os
+from contextlib import contextmanager
+import pytest
+
+# Database tests run against TEST_DATABASE_URL, a scratch Postgres database migrated
+# with `alembic upgrade head`; each test runs in a transaction that is rolled back
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+
+@pytest.fixture
+def db():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from sqlalchemy.orm import Session
+    from app.database import engine
+
+    connection = engine.connect()
+    transaction = connection.begin()
+    # Commits in the code under test only release a savepoint
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def count_statements(db):
+    """Context manager collecting the SQL statements db sends while it is open"""
+    from sqlalchemy import event
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            # Savepoints stand in for the test's outer transaction and are not counted
+            if not statement.startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")):
+                statements.append(statement)
+
+        connection = db.connection()
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+    return counting
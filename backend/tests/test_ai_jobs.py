@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta
+from app import models, worker
+from app.config import get_settings
+from app.services.ai_jobs import claim_job, heartbeat_job
+
+
+def _running_job(db, started_ago: float, heartbeat_ago: float) -> models.AIJob:
+    now = datetime.utcnow()
+    job = models.AIJob(
+        kind="analyze_lead", payload={"lead_id": 1}, status=models.AIJobStatus.RUNNING, attempts=1,
+        run_after=now - timedelta(seconds=started_ago),
+        started_at=now - timedelta(seconds=started_ago),
+        heartbeat_at=now - timedelta(seconds=heartbeat_ago),
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def _claimed_ids(db):
+    ids = []
+    while (claimed := claim_job(db)) is not None:
+        ids.append(claimed[0])
+    return ids
+
+
+def test_a_slow_job_with_a_fresh_heartbeat_is_not_claimed_again(db):
+    stale_after = get_settings().ai_job_stale_after_seconds
+    slow = _running_job(db, started_ago=stale_after * 10, heartbeat_ago=1)
+    dead = _running_job(db, started_ago=stale_after * 10, heartbeat_ago=stale_after + 1)
+
+    claimed = _claimed_ids(db)
+    assert dead.id in claimed
+    assert slow.id not in claimed
+    db.refresh(dead)
+    assert dead.attempts == 2 and dead.heartbeat_at > datetime.utcnow() - timedelta(seconds=5)
+
+
+def test_heartbeat_refreshes_only_running_jobs(db):
+    stale_after = get_settings().ai_job_stale_after_seconds
+    job = _running_job(db, started_ago=stale_after * 2, heartbeat_ago=stale_after * 2)
+    heartbeat_job(db, job.id)
+    db.refresh(job)
+    assert job.heartbeat_at > datetime.utcnow() - timedelta(seconds=5)
+
+    job.status = models.AIJobStatus.SUCCEEDED
+    job.heartbeat_at = None
+    db.flush()
+    heartbeat_job(db, job.id)
+    db.refresh(job)
+    assert job.heartbeat_at is None
+
+
+def test_run_job_heartbeats_until_the_handler_returns(monkeypatch):
+    beats = []
+
+    async def fake_run_db(func, *args):
+        assert func is heartbeat_job
+        beats.append(args)
+
+    async def handler(openrouter, payload):
+        await asyncio.sleep(0.05)
+        return {"done": payload["lead_id"]}
+
+    monkeypatch.setattr(worker, "run_db", fake_run_db)
+    monkeypatch.setattr(get_settings(), "ai_job_heartbeat_seconds", 0.01)
+
+    async def scenario():
+        result = await worker.run_job(handler, None, {"lead_id": 7}, 42)
+        count = len(beats)
+        await asyncio.sleep(0.03)
+        return result, count
+
+    result, count = asyncio.run(scenario())
+    assert result == {"done": 7}
+    assert count >= 2 and set(beats) == {(42,)}
+    # Stopped with the handler
+    assert len(beats) == count
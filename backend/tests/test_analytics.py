@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from app import models
+from app.routers.analytics import refresh_analytics
+from app.services import ai_jobs, analytics
+
+COMPANY = "Analytics Test Co"
+DAY = 86400.0
+STAGE = models.JobStage
+
+
+@pytest.fixture
+def history(db):
+    """Four applications whose stages changed on the given days"""
+    start = datetime(2026, 9, 1)
+    paths = [
+        [(STAGE.NOT_STARTED, 0), (STAGE.APPLIED, 1), (STAGE.IN_PROGRESS, 3), (STAGE.OFFER, 10)],
+        [(STAGE.NOT_STARTED, 0), (STAGE.APPLIED, 2), (STAGE.REJECTED, 4)],
+        [(STAGE.NOT_STARTED, 0), (STAGE.APPLIED, 1), (STAGE.NO_ANSWER, 31)],
+        [(STAGE.NOT_STARTED, 0)],
+    ]
+    for i, path in enumerate(paths):
+        application = models.JobApplication(
+            company_name=f"{COMPANY} {i % 2}", role_name="Engineer", stage=path[-1][0],
+            stage_date=start + timedelta(days=path[-1][1])
+        )
+        previous = None
+        for stage, day in path:
+            application.stage_history.append(models.StageHistory(
+                previous_stage=previous, new_stage=stage, changed_at=start + timedelta(days=day)
+            ))
+            previous = stage
+        db.add(application)
+    db.commit()
+    analytics.refresh_views(db)
+
+
+def test_funnel_counts_and_conversion_rates(db, history):
+    assert analytics.funnel(db, COMPANY) == [{
+        "company_name": None,
+        "applications": 4,
+        "applied": 3,
+        "in_progress": 1,
+        "offer": 1,
+        "rejected": 1,
+        "no_answer": 1,
+        "applied_to_in_progress": 0.3333,
+        "in_progress_to_offer": 1.0,
+        "applied_to_offer": 0.3333,
+        "no_answer_rate": 0.3333,
+    }]
+
+
+def test_funnel_by_company(db, history):
+    rows = analytics.funnel(db, COMPANY, by_company=True)
+    assert [(row["company_name"], row["applications"], row["applied"]) for row in rows] == [
+        (f"{COMPANY} 0", 2, 2), (f"{COMPANY} 1", 2, 1)
+    ]
+
+
+def test_stage_durations(db, history):
+    rows = {row["stage"]: row for row in analytics.stage_durations(db, COMPANY)}
+    assert set(rows) == {STAGE.NOT_STARTED, STAGE.APPLIED, STAGE.IN_PROGRESS}
+
+    # Days spent before moving on: not started 1, 2, 1; applied 2, 2, 30; in progress 7
+    expected = {
+        STAGE.NOT_STARTED: (3, 4 / 3, 1, 1.8),
+        STAGE.APPLIED: (3, 34 / 3, 2, 24.4),
+        STAGE.IN_PROGRESS: (1, 7, 7, 7),
+    }
+    for stage, (transitions, avg, median, p90) in expected.items():
+        row = rows[stage]
+        assert row["transitions"] == transitions
+        assert row["avg_seconds"] == pytest.approx(avg * DAY)
+        assert row["median_seconds"] == pytest.approx(median * DAY)
+        assert row["p90_seconds"] == pytest.approx(p90 * DAY)
+
+
+def test_refresh_endpoint_queues_one_job_instead_of_refreshing(db, count_statements):
+    with count_statements() as statements:
+        job = refresh_analytics(db)
+        again = refresh_analytics(db)
+    assert not any("REFRESH" in statement for statement in statements)
+    assert (job.kind, job.status) == (ai_jobs.REFRESH_ANALYTICS, models.AIJobStatus.PENDING)
+    # Pending refreshes are shared until one starts
+    assert again.id == job.id
+
+
+def test_worker_handler_refreshes_the_views(monkeypatch):
+    calls = []
+
+    async def fake_run_db(func, *args):
+        calls.append(func)
+
+    monkeypatch.setattr(ai_jobs, "run_db", fake_run_db)
+    handler = ai_jobs.JOB_HANDLERS[ai_jobs.REFRESH_ANALYTICS]
+    result = asyncio.run(handler(None, {}))
+    assert calls == [analytics.refresh_views]
+    assert result == {"refreshed": list(analytics.MATERIALIZED_VIEWS)}
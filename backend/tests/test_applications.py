@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from app import models, schemas
+from app.routers.job_applications import bulk_change_application_stage
+from app.services.applications import bulk_change_stage, ghost_stale_applications
+
+COMPANY = "Bulk Stage Test Co"
+STAGE = models.JobStage
+
+
+def _application(db, stage, days_ago=0, company=COMPANY):
+    changed = datetime.utcnow() - timedelta(days=days_ago)
+    application = models.JobApplication(company_name=company, role_name="Engineer", stage=stage, stage_date=changed)
+    application.stage_history = [models.StageHistory(new_stage=stage, changed_at=changed)]
+    db.add(application)
+    db.flush()
+    return application
+
+
+def _history(db, application_id):
+    return [
+        (entry.previous_stage, entry.new_stage)
+        for entry in db.query(models.StageHistory)
+        .filter(models.StageHistory.job_application_id == application_id)
+        .order_by(models.StageHistory.id)
+    ]
+
+
+def test_bulk_change_is_one_update_and_one_history_insert(db, count_statements):
+    applications = [_application(db, STAGE.APPLIED) for _ in range(4)]
+    ids = [application.id for application in applications]
+    db.commit()
+
+    with count_statements() as statements:
+        moved = bulk_change_stage(db, STAGE.IN_PROGRESS, application_ids=ids)
+
+    assert sorted(moved) == [(application_id, STAGE.APPLIED) for application_id in ids]
+    assert len(statements) == 2
+    update, history = statements
+    assert update.startswith("UPDATE job_applications") and "RETURNING" in update
+    # All four history rows go out in the one INSERT
+    assert history.startswith("INSERT INTO stage_history") and history.count("VALUES") == 1
+    for application_id in ids:
+        assert _history(db, application_id) == [(None, STAGE.APPLIED), (STAGE.APPLIED, STAGE.IN_PROGRESS)]
+
+
+def test_applications_already_in_the_target_stage_are_skipped(db, count_statements):
+    applied = _application(db, STAGE.APPLIED)
+    offer = _application(db, STAGE.OFFER)
+    db.commit()
+
+    moved = bulk_change_stage(db, STAGE.OFFER, application_ids=[applied.id, offer.id])
+    assert moved == [(applied.id, STAGE.APPLIED)]
+    assert _history(db, offer.id) == [(None, STAGE.OFFER)]
+
+    # Nothing left to move: no history insert at all
+    with count_statements() as statements:
+        assert bulk_change_stage(db, STAGE.OFFER, application_ids=[applied.id, offer.id]) == []
+    assert [statement.split()[0] for statement in statements] == ["UPDATE"]
+
+
+def test_filters_are_combined(db):
+    match = _application(db, STAGE.APPLIED, days_ago=20)
+    recent = _application(db, STAGE.APPLIED, days_ago=1)
+    other_stage = _application(db, STAGE.IN_PROGRESS, days_ago=20)
+    other_company = _application(db, STAGE.APPLIED, days_ago=20, company="Someone Else Inc")
+    db.commit()
+
+    change = schemas.BulkStageChangeRequest(
+        new_stage=STAGE.REJECTED, stage=STAGE.APPLIED, stale_days=10, company="bulk stage test"
+    )
+    result = bulk_change_application_stage(change, db)
+    assert [transition.job_application_id for transition in result.transitions] == [match.id]
+
+    db.expire_all()
+    assert match.stage == STAGE.REJECTED
+    assert (recent.stage, other_stage.stage, other_company.stage) == (STAGE.APPLIED, STAGE.IN_PROGRESS, STAGE.APPLIED)
+
+
+def test_router_requires_ids_or_a_filter(db):
+    with pytest.raises(HTTPException) as error:
+        bulk_change_application_stage(schemas.BulkStageChangeRequest(new_stage=STAGE.REJECTED), db)
+    assert error.value.status_code == 400
+
+
+def test_ghosting_only_touches_stale_applied_applications(db):
+    stale = _application(db, STAGE.APPLIED, days_ago=30)
+    fresh = _application(db, STAGE.APPLIED, days_ago=5)
+    stale_in_progress = _application(db, STAGE.IN_PROGRESS, days_ago=30)
+    stale_not_started = _application(db, STAGE.NOT_STARTED, days_ago=30)
+    db.commit()
+    # Rows left in the test database by other fixtures count towards the total too
+    expected = db.query(models.JobApplication).filter(
+        models.JobApplication.stage == STAGE.APPLIED,
+        models.JobApplication.stage_date < datetime.utcnow() - timedelta(days=14)
+    ).count()
+
+    assert ghost_stale_applications(db, 14) == expected
+
+    db.expire_all()
+    assert stale.stage == STAGE.NO_ANSWER
+    assert _history(db, stale.id)[-1] == (STAGE.APPLIED, STAGE.NO_ANSWER)
+    assert (fresh.stage, stale_in_progress.stage, stale_not_started.stage) == (
+        STAGE.APPLIED, STAGE.IN_PROGRESS, STAGE.NOT_STARTED
+    )
+    assert len(_history(db, fresh.id)) == 1
@@ -0,0 +1,121 @@
+import asyncio
+import anyio
+import pytest
+from sqlalchemy import func
+from app import models
+from app.services import batch_analysis
+from app.services.batch_analysis import analyze_leads, save_match_results
+from app.services.rate_limit import TokenBucket
+
+
+class FakeOpenRouter:
+    """Answers after a delay encoded in the job ad ("<seconds> ..."); ads containing "fail" raise"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def analyze_job_match(self, job_ad, resume, force=False):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(float(job_ad.split()[0]))
+            if "fail" in job_ad:
+                raise RuntimeError("model unavailable")
+            return {"match_percentage": 50.0, "reasoning": f"for {job_ad}"}
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    batches = []
+
+    async def fake_run_db(func, *args):
+        assert func is save_match_results
+        # Yields to the loop, so an unshielded save would be cancelled with the response
+        await asyncio.sleep(0)
+        batches.append([result["lead_id"] for result in args[0]])
+
+    monkeypatch.setattr(batch_analysis, "run_db", fake_run_db)
+    return batches
+
+
+def _run(leads, concurrency=2, commit_size=100, openrouter=None):
+    openrouter = openrouter or FakeOpenRouter()
+
+    async def collect():
+        return [event async for event in analyze_leads(
+            openrouter, "Resume", leads, concurrency, TokenBucket(0), commit_size
+        )]
+
+    return asyncio.run(collect()), openrouter
+
+
+def test_concurrency_cap_is_respected(saved):
+    events, openrouter = _run([(i, "0.01 ad") for i in range(10)], concurrency=3)
+    assert openrouter.max_in_flight == 3
+    assert events[-1] == {"status": "done", "total": 10, "succeeded": 10, "failed": 0}
+
+
+def test_progress_is_streamed_in_completion_order(saved):
+    events, _ = _run([(1, "0.06 slow"), (2, "0.01 fast"), (3, "0.03 medium")], concurrency=3)
+    assert [event["lead_id"] for event in events[:-1]] == [2, 3, 1]
+
+
+def test_failed_leads_do_not_abort_the_batch(saved):
+    events, _ = _run([(1, "0.01 ad"), (2, "0.01 fail"), (3, "0.02 ad")], commit_size=2)
+    by_lead = {event["lead_id"]: event for event in events[:-1]}
+    assert by_lead[2] == {"lead_id": 2, "status": "error", "error": "model unavailable"}
+    assert by_lead[1]["status"] == by_lead[3]["status"] == "ok"
+    assert events[-1] == {"status": "done", "total": 3, "succeeded": 2, "failed": 1}
+    assert sorted(lead for batch in saved for lead in batch) == [1, 3]
+
+
+def test_results_are_committed_every_commit_size_leads(saved):
+    _run([(i, f"0.0{i} ad") for i in range(1, 6)], concurrency=5, commit_size=2)
+    assert saved == [[1, 2], [3, 4], [5]]
+
+
+def test_finished_results_are_saved_when_the_client_disconnects(saved):
+    leads = [(1, "0.01 ad"), (2, "0.02 ad"), (3, "5 never finishes")]
+
+    async def disconnect():
+        received = []
+
+        async def consume():
+            async for event in analyze_leads(FakeOpenRouter(), "Resume", leads, 3, TokenBucket(0), 100):
+                received.append(event)
+
+        # Starlette cancels the response's task group when the client goes away, which
+        # cancels every await inside it until the group exits
+        async with anyio.create_task_group() as group:
+            group.start_soon(consume)
+            while len(received) < 2:
+                await asyncio.sleep(0.005)
+            group.cancel_scope.cancel()
+        return received
+
+    received = asyncio.run(disconnect())
+    assert [event["lead_id"] for event in received] == [1, 2]
+    assert saved == [[1, 2]]
+
+
+def test_save_writes_a_batch_with_one_update(db, count_statements):
+    leads = [models.JobLead(job_ad_content=f"batch ad {i}") for i in range(3)]
+    db.add_all(leads)
+    db.commit()
+    before = db.query(func.count()).select_from(models.TableChange).scalar()
+
+    results = [
+        {"lead_id": lead.id, "match_percentage": 60.0 + i, "reasoning": f"reason {i}"}
+        for i, lead in enumerate(leads)
+    ]
+    with count_statements() as statements:
+        save_match_results(db, results)
+
+    assert [statement.split()[0] for statement in statements] == ["UPDATE"]
+    assert db.query(func.count()).select_from(models.TableChange).scalar() - before == 1
+    for i, lead in enumerate(leads):
+        db.refresh(lead)
+        assert (lead.match_percentage, lead.match_reasoning) == (60.0 + i, f"reason {i}")
@@ -0,0 +1,95 @@
+import json
+import select
+import pytest
+from sqlalchemy import text
+from app.change_feed import _connect
+
+
+@pytest.fixture
+def listener(db):
+    from app.config import get_settings
+    conn = _connect(get_settings().database_url)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def writer(db):
+    # NOTIFY is only delivered on commit, so these writes are committed and cleaned up after
+    from app.database import engine
+    with engine.connect() as connection:
+        yield connection
+        with connection.begin():
+            connection.execute(text("DELETE FROM stage_history WHERE job_application_id IN "
+                                    "(SELECT id FROM job_applications WHERE company_name = 'Notify Co')"))
+            connection.execute(text("DELETE FROM job_applications WHERE company_name = 'Notify Co'"))
+            connection.execute(text("DELETE FROM job_leads WHERE company_name = 'Notify Co'"))
+
+
+def _received(conn):
+    select.select([conn], [], [], 0.5)
+    conn.poll()
+    payloads = [json.loads(notify.payload) for notify in conn.notifies]
+    conn.notifies.clear()
+    return payloads
+
+
+def _insert_leads(writer, count):
+    with writer.begin():
+        return writer.execute(text(
+            "INSERT INTO job_leads (company_name, job_ad_content, is_promoted) "
+            "SELECT 'Notify Co', 'ad ' || n, false FROM generate_series(1, :count) n RETURNING id"
+        ), {"count": count}).scalars().all()
+
+
+def test_one_notification_per_statement(listener, writer):
+    ids = _insert_leads(writer, 3)
+    assert _received(listener) == [
+        {"type": "change", "table": "job_leads", "op": "insert", "count": 3, "ids": sorted(ids)}
+    ]
+
+    with writer.begin():
+        writer.execute(text("UPDATE job_leads SET role_name = 'Engineer' WHERE id = ANY(:ids)"), {"ids": ids})
+    assert _received(listener) == [
+        {"type": "change", "table": "job_leads", "op": "update", "count": 3, "ids": sorted(ids)}
+    ]
+
+
+def test_prescore_and_minhash_updates_are_not_sent(listener, writer):
+    ids = _insert_leads(writer, 2)
+    _received(listener)
+    with writer.begin():
+        writer.execute(text(
+            "UPDATE job_leads SET prescore = 50, prescore_vector = '\\x00', minhash = '\\x01', "
+            "updated_at = now() WHERE id = ANY(:ids)"
+        ), {"ids": ids})
+        # Only the rows that changed otherwise are listed
+        writer.execute(text(
+            "UPDATE job_leads SET prescore = 60, role_name = CASE WHEN id = :first THEN 'Engineer' ELSE role_name END "
+            "WHERE id = ANY(:ids)"
+        ), {"ids": ids, "first": ids[0]})
+    assert _received(listener) == [
+        {"type": "change", "table": "job_leads", "op": "update", "count": 1, "ids": [ids[0]]}
+    ]
+
+
+def test_large_statements_send_only_the_count(listener, writer):
+    _insert_leads(writer, 250)
+    assert _received(listener) == [{"type": "change", "table": "job_leads", "op": "insert", "count": 250}]
+
+
+def test_stage_history_lists_applications_by_stage(listener, writer):
+    with writer.begin():
+        application_ids = writer.execute(text(
+            "INSERT INTO job_applications (company_name, role_name, stage, stage_date) "
+            "VALUES ('Notify Co', 'A', 'APPLIED', now()), ('Notify Co', 'B', 'APPLIED', now()) RETURNING id"
+        )).scalars().all()
+        history_ids = writer.execute(text(
+            "INSERT INTO stage_history (job_application_id, new_stage, changed_at) "
+            "SELECT id, 'APPLIED', now() FROM job_applications WHERE id = ANY(:ids) RETURNING id"
+        ), {"ids": application_ids}).scalars().all()
+    events = _received(listener)
+    assert events[-1] == {
+        "type": "change", "table": "stage_history", "op": "insert", "count": 2,
+        "ids": sorted(history_ids), "stages": {"applied": sorted(application_ids)}
+    }
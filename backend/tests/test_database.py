@@ -0,0 +1,93 @@
+from sqlalchemy.pool import NullPool, QueuePool
+from app import database
+from app.config import get_settings
+from app.database import _engine_options, create_db_engine, pool_status
+
+POSTGRES_URL = "postgresql://prospector:secret@db:5432/prospector"
+
+
+def _settings(**values):
+    return get_settings().model_copy(update={"database_url": POSTGRES_URL, **values})
+
+
+def test_pool_settings_flow_into_the_engine():
+    settings = _settings(
+        db_pool_size=7, db_max_overflow=3, db_pool_timeout=4.5, db_pool_recycle=600,
+        db_pool_pre_ping=False, db_statement_timeout_ms=2500, db_pgbouncer_mode=False
+    )
+    assert _engine_options(settings) == {
+        "pool_pre_ping": False,
+        "pool_size": 7,
+        "max_overflow": 3,
+        "pool_timeout": 4.5,
+        "pool_recycle": 600,
+        "connect_args": {"options": "-c statement_timeout=2500"},
+    }
+
+    engine = create_db_engine(settings)
+    assert isinstance(engine.pool, QueuePool)
+    assert (engine.pool.size(), engine.pool._max_overflow, engine.pool._timeout, engine.pool._recycle) == (7, 3, 4.5, 600)
+    assert not engine.dispatch.begin
+
+
+def test_statement_timeout_is_left_out_when_disabled_or_not_postgres():
+    assert "connect_args" not in _engine_options(_settings(db_statement_timeout_ms=0))
+    assert "connect_args" not in _engine_options(_settings(database_url="sqlite://"))
+
+
+def test_pgbouncer_mode_uses_no_pool_and_sets_the_timeout_per_transaction():
+    settings = _settings(db_pgbouncer_mode=True, db_statement_timeout_ms=2500, db_pool_size=7)
+    # No startup options: PgBouncer rejects them
+    assert _engine_options(settings) == {"pool_pre_ping": settings.db_pool_pre_ping, "poolclass": NullPool}
+
+    engine = create_db_engine(settings)
+    assert isinstance(engine.pool, NullPool)
+    assert len(engine.dispatch.begin) == 1
+
+    executed = []
+
+    class Connection:
+        def exec_driver_sql(self, statement):
+            executed.append(statement)
+
+    for listener in engine.dispatch.begin:
+        listener(Connection())
+    assert executed == ["SET LOCAL statement_timeout = 2500"]
+
+    assert not create_db_engine(_settings(db_pgbouncer_mode=True, db_statement_timeout_ms=0)).dispatch.begin
+
+
+def test_pool_status(monkeypatch):
+    settings = _settings(db_pool_size=4, db_max_overflow=2, db_pgbouncer_mode=False)
+    monkeypatch.setattr(database, "settings", settings)
+    monkeypatch.setattr(database, "engine", create_db_engine(settings))
+    assert pool_status() == {
+        "pool_class": "QueuePool", "size": 4, "checked_out": 0, "idle": 0, "overflow": 0, "max_overflow": 2
+    }
+
+    monkeypatch.setattr(database, "engine", create_db_engine(_settings(db_pgbouncer_mode=True)))
+    assert pool_status() == {"pool_class": "NullPool"}
+
+
+def test_pool_status_counts_checked_out_connections(db, monkeypatch):
+    settings = get_settings().model_copy(update={"db_pool_size": 2, "db_max_overflow": 1, "db_pgbouncer_mode": False})
+    engine = create_db_engine(settings)
+    monkeypatch.setattr(database, "engine", engine)
+    try:
+        with engine.connect(), engine.connect(), engine.connect():
+            status = pool_status()
+            assert (status["checked_out"], status["overflow"]) == (3, 1)
+        status = pool_status()
+        assert (status["checked_out"], status["idle"]) == (0, 2)
+    finally:
+        engine.dispose()
+
+
+def test_pgbouncer_timeout_applies_inside_each_transaction(db):
+    settings = get_settings().model_copy(update={"db_pgbouncer_mode": True, "db_statement_timeout_ms": 2500})
+    engine = create_db_engine(settings)
+    try:
+        with engine.begin() as connection:
+            assert connection.exec_driver_sql("SHOW statement_timeout").scalar() == "2500ms"
+    finally:
+        engine.dispose()
@@ -0,0 +1,148 @@
+import pytest
+from sqlalchemy import func
+from app import models
+from app.config import get_settings
+from app.dedup import dedupe_leads
+from app.services.dedup import (
+    DuplicateLeadError, LSHIndex, band_buckets, find_duplicate, merge_into, register_lead, signature, similarity
+)
+
+AD = (
+    "Dedup test posting: we are hiring a senior backend engineer to build data pipelines in Python "
+    "and PostgreSQL, own our FastAPI services end to end, mentor two junior engineers, review designs, "
+    "run the on call rotation with the platform team and improve observability across every service we "
+    "ship, working remotely from any European timezone with a yearly team offsite in Lisbon"
+)
+# One word changed: most shingles, and so most bands, are shared
+EDITED_AD = AD.replace("Lisbon", "Porto")
+OTHER_AD = "Dedup test posting: frontend developer for a design agency, React and TypeScript, on site in Berlin"
+
+
+def test_similar_ads_meet_in_a_band_and_others_do_not():
+    sig, edited, other = signature(AD), signature(EDITED_AD), signature(OTHER_AD)
+    assert similarity(sig, edited) >= 0.85
+    assert similarity(sig, other) < 0.2
+    assert set(band_buckets(sig)) & set(band_buckets(edited))
+    assert not set(band_buckets(sig)) & set(band_buckets(other))
+
+    index = LSHIndex()
+    index.add(1, sig, band_buckets(sig))
+    assert index.best_match(edited, band_buckets(edited), 0.85)[0] == 1
+    assert index.best_match(other, band_buckets(other), 0.85) is None
+
+
+def test_merge_carries_the_analysis_only_to_an_unanalyzed_original():
+    original = models.JobLead(job_ad_content=AD, role_name="Engineer")
+    merge_into(original, {"company_name": "Acme", "role_name": "Other", "match_percentage": 70.0, "match_reasoning": "fits"})
+    assert (original.company_name, original.role_name) == ("Acme", "Engineer")
+    assert (original.match_percentage, original.match_reasoning) == (70.0, "fits")
+
+    merge_into(original, {"match_percentage": 10.0, "match_reasoning": "does not fit"})
+    assert (original.match_percentage, original.match_reasoning) == (70.0, "fits")
+
+
+@pytest.fixture
+def dedup_action(monkeypatch):
+    def set_action(action):
+        monkeypatch.setattr(get_settings(), "lead_dedup_action", action)
+    return set_action
+
+
+@pytest.fixture
+def original(db, dedup_action):
+    dedup_action("link")
+    lead = register_lead(db, models.JobLead(job_ad_content=AD, role_name="Engineer"))
+    db.flush()
+    return lead
+
+
+def _bands(db, lead_id):
+    return db.query(func.count()).select_from(models.LeadLSHBand).filter(models.LeadLSHBand.lead_id == lead_id).scalar()
+
+
+def test_band_lookup_finds_the_original(db, original):
+    assert _bands(db, original.id) > 0
+    lead_id, score = find_duplicate(db, signature(EDITED_AD), 0.85)
+    assert lead_id == original.id and score >= 0.85
+    assert find_duplicate(db, signature(OTHER_AD), 0.85) is None
+
+
+def test_link_keeps_the_copy_out_of_the_index(db, original):
+    lead = register_lead(db, models.JobLead(job_ad_content=EDITED_AD))
+    db.flush()
+    assert lead.duplicate_of_id == original.id
+    assert _bands(db, lead.id) == 0
+
+
+def test_merge_fills_the_original_and_drops_the_copy(db, original, dedup_action):
+    dedup_action("merge")
+    before = db.query(models.JobLead).count()
+    lead = register_lead(db, models.JobLead(job_ad_content=EDITED_AD, company_name="Acme", role_name="Other"))
+    db.flush()
+    assert lead is original
+    assert (original.company_name, original.role_name) == ("Acme", "Engineer")
+    assert db.query(models.JobLead).count() == before
+
+
+def test_reject_names_the_original(db, original, dedup_action):
+    dedup_action("reject")
+    with pytest.raises(DuplicateLeadError) as error:
+        register_lead(db, models.JobLead(job_ad_content=EDITED_AD))
+    assert error.value.lead_id == original.id
+
+
+def test_off_indexes_without_looking(db, original, dedup_action):
+    dedup_action("off")
+    lead = register_lead(db, models.JobLead(job_ad_content=EDITED_AD))
+    db.flush()
+    assert lead.duplicate_of_id is None
+    assert _bands(db, lead.id) > 0
+
+
+@pytest.fixture
+def committed(db):
+    # The CLI opens its own sessions, so its leads are committed and deleted afterwards
+    from app.database import SessionLocal
+    session = SessionLocal()
+    created = {"leads": [], "resumes": []}
+    yield session, created
+    session.rollback()
+    session.query(models.JobLead).filter(models.JobLead.id.in_(created["leads"])).delete(synchronize_session=False)
+    session.query(models.Resume).filter(models.Resume.id.in_(created["resumes"])).delete(synchronize_session=False)
+    session.commit()
+    session.close()
+
+
+def test_cli_merge_keeps_the_duplicates_analysis(committed):
+    session, created = committed
+    first, second = models.Resume(content="resume one", is_active=False), models.Resume(content="resume two", is_active=False)
+    unanalyzed = models.JobLead(job_ad_content=AD)
+    analyzed_copy = models.JobLead(job_ad_content=EDITED_AD, company_name="Acme", match_percentage=70.0, match_reasoning="copy fits")
+    analyzed = models.JobLead(job_ad_content=OTHER_AD, match_percentage=20.0, match_reasoning="original fits")
+    other_copy = models.JobLead(job_ad_content=OTHER_AD + " ", match_percentage=80.0, match_reasoning="other copy fits")
+    # Added one at a time so the originals get the lower ids
+    for row in (first, second, unanalyzed, analyzed, analyzed_copy, other_copy):
+        session.add(row)
+        session.flush()
+    session.add_all([
+        models.LeadResumeMatch(lead_id=unanalyzed.id, resume_id=first.id, match_percentage=40.0, match_reasoning="own"),
+        models.LeadResumeMatch(lead_id=analyzed_copy.id, resume_id=first.id, match_percentage=90.0, match_reasoning="copy"),
+        models.LeadResumeMatch(lead_id=analyzed_copy.id, resume_id=second.id, match_percentage=75.0, match_reasoning="copy"),
+    ])
+    session.commit()
+    created["leads"] = [unanalyzed.id, analyzed.id, analyzed_copy.id, other_copy.id]
+    created["resumes"] = [first.id, second.id]
+
+    dedupe_leads("merge", 0.85)
+
+    session.expire_all()
+    remaining = session.query(models.JobLead).filter(models.JobLead.id.in_(created["leads"])).order_by(models.JobLead.id).all()
+    assert remaining == [unanalyzed, analyzed]
+    assert (unanalyzed.company_name, unanalyzed.match_percentage, unanalyzed.match_reasoning) == ("Acme", 70.0, "copy fits")
+    assert (analyzed.match_percentage, analyzed.match_reasoning) == (20.0, "original fits")
+
+    matches = session.query(models.LeadResumeMatch.lead_id, models.LeadResumeMatch.resume_id, models.LeadResumeMatch.match_reasoning).filter(
+        models.LeadResumeMatch.resume_id.in_(created["resumes"])
+    ).order_by(models.LeadResumeMatch.resume_id).all()
+    # The original keeps its own analysis for the first resume and gains the copy's for the second
+    assert matches == [(unanalyzed.id, first.id, "own"), (unanalyzed.id, second.id, "copy")]
@@ -0,0 +1,118 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+import pytest
+from sqlalchemy.orm import Session
+from app import models
+from app.services import export
+from app.services.export import stream_export
+
+COMPANY = "Export Test Co"
+
+
+@pytest.fixture
+def sessions(db, monkeypatch):
+    """Export sessions share the test's connection, so they see its uncommitted rows"""
+    opened = []
+
+    def session_local():
+        session = Session(bind=db.connection(), join_transaction_mode="create_savepoint")
+        session.closed = False
+        close = session.close
+
+        def tracked_close():
+            session.closed = True
+            close()
+
+        session.close = tracked_close
+        opened.append(session)
+        return session
+
+    monkeypatch.setattr(export, "SessionLocal", session_local)
+    return opened
+
+
+@pytest.fixture
+def leads(db):
+    created = [
+        models.JobLead(
+            company_name=COMPANY, role_name=f"Role, \"{i}\"", job_ad_content=f"Ad {i}\nsecond line — ünïcode",
+            match_percentage=50.0 + i if i % 2 else None, prescore_vector=b"\x00\x01",
+            created_at=datetime(2026, 10, 1, 12, i), updated_at=datetime(2026, 10, 1, 12, i)
+        )
+        for i in range(5)
+    ]
+    db.add_all(created)
+    db.flush()
+    return created
+
+
+def _ours(records, leads):
+    ids = {lead.id for lead in leads}
+    return [record for record in records if int(record["id"]) in ids]
+
+
+def _expected(leads):
+    return [
+        {
+            "id": lead.id, "company_name": COMPANY, "role_name": lead.role_name, "job_ad_content": lead.job_ad_content,
+            "match_percentage": lead.match_percentage, "created_at": lead.created_at.isoformat(),
+        }
+        for lead in leads
+    ]
+
+
+def _subset(records, keys=("id", "company_name", "role_name", "job_ad_content", "match_percentage", "created_at")):
+    return [{key: record[key] for key in keys} for record in records]
+
+
+def test_ndjson_round_trip(sessions, leads):
+    body = b"".join(stream_export("leads", "ndjson", chunk_size=2))
+    records = _ours([json.loads(line) for line in body.decode("utf-8").splitlines()], leads)
+    assert _subset(records) == _expected(leads)
+    # Similarity and search data stay internal
+    assert not {"prescore_vector", "minhash", "search_vector"} & set(records[0])
+
+
+def test_csv_round_trip(sessions, leads):
+    body = b"".join(stream_export("leads", "csv", chunk_size=2))
+    records = _ours(list(csv.DictReader(io.StringIO(body.decode("utf-8"), newline=""))), leads)
+    expected = [
+        {**record, "id": str(record["id"]), "match_percentage": "" if record["match_percentage"] is None else str(record["match_percentage"])}
+        for record in _expected(leads)
+    ]
+    assert _subset(records) == expected
+
+
+def test_parquet_round_trip(sessions, leads):
+    pq = pytest.importorskip("pyarrow.parquet")
+    chunks = list(stream_export("leads", "parquet", chunk_size=2))
+    table = pq.read_table(io.BytesIO(b"".join(chunks)))
+    records = _ours(table.to_pylist(), leads)
+    assert _subset(records) == [{**record, "created_at": lead.created_at} for record, lead in zip(_expected(leads), leads)]
+    assert table.schema.field("is_promoted").type == "bool"
+
+
+def test_gzip_stream_decompresses_to_the_plain_export(sessions, leads):
+    plain = b"".join(stream_export("leads", "ndjson", chunk_size=2))
+    chunks = list(stream_export("leads", "ndjson", gzip=True, chunk_size=2))
+    # Compressed output is streamed as it is produced, not buffered to the end
+    assert len(chunks) > 1
+    assert gzip.decompress(b"".join(chunks)) == plain
+
+
+def test_since_limits_rows_by_update_time(sessions, leads):
+    body = b"".join(stream_export("leads", "ndjson", since=datetime(2026, 10, 1, 12, 3)))
+    records = _ours([json.loads(line) for line in body.decode("utf-8").splitlines()], leads)
+    assert [record["id"] for record in records] == [lead.id for lead in leads[3:]]
+
+
+def test_the_generator_closes_its_session_when_the_client_disconnects(sessions, leads):
+    stream = stream_export("leads", "csv", chunk_size=1)
+    next(stream)
+    assert len(sessions) == 1 and not sessions[0].closed
+    # A disconnected client abandons the body iterator; closing it, or collecting it, must release the session
+    stream.close()
+    assert sessions[0].closed
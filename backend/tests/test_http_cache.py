@@ -0,0 +1,73 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app import models
+from app.http_cache import ConditionalGetMiddleware, fold_table_changes, get_response_cache, read_versions
+
+
+def _fill(cache, key="/api/leads?"):
+    cache.put(key, 'W/"x"', b"[]", {}, cache.generation)
+    assert cache.fresh(key) is not None
+
+
+def test_streamed_write_clears_the_cache_once_its_body_is_sent():
+    cache = get_response_cache()
+    app = FastAPI()
+    app.add_middleware(ConditionalGetMiddleware)
+
+    @app.post("/api/leads/analyze-batch")
+    def analyze_batch():
+        def body():
+            yield b"started\n"
+            # A read between the headers and the commit refills the cache with old data
+            _fill(cache)
+            yield b"done\n"
+        return StreamingResponse(body())
+
+    assert TestClient(app).post("/api/leads/analyze-batch").text == "started\ndone\n"
+    assert cache.fresh("/api/leads?") is None
+
+
+def test_commits_clear_the_cache(db):
+    from app.database import SessionLocal
+    cache = get_response_cache()
+    _fill(cache)
+    with SessionLocal() as session:
+        session.execute(text("SELECT 1"))
+        session.commit()
+    assert cache.fresh("/api/leads?") is None
+
+
+def test_versions_move_on_commit_and_survive_folding(db):
+    from app.database import SessionLocal
+    with SessionLocal() as session:
+        before, _ = read_versions(session, ("job_leads", "resumes"))
+        lead = models.JobLead(job_ad_content="version test")
+        session.add(lead)
+        session.commit()
+        after, changed_at = read_versions(session, ("job_leads", "resumes"))
+        fold_table_changes(session)
+        folded, _ = read_versions(session, ("job_leads", "resumes"))
+        session.delete(lead)
+        session.commit()
+    assert after == (before[0] + 1, before[1])
+    assert folded == after
+    assert changed_at is not None
+
+
+def test_concurrent_writers_do_not_wait_on_each_other(db):
+    from app.database import engine
+    with engine.connect() as first, engine.connect() as second:
+        first.begin()
+        first.execute(text("INSERT INTO job_leads (job_ad_content, is_promoted) VALUES ('first writer', false)"))
+        # Updating a shared counter row would block here until the first writer finished
+        with second.begin():
+            second.execute(text("SET LOCAL lock_timeout = '1s'"))
+            lead_id = second.execute(text(
+                "INSERT INTO job_leads (job_ad_content, is_promoted) VALUES ('second writer', false) RETURNING id"
+            )).scalar()
+        first.rollback()
+        with second.begin():
+            second.execute(text("DELETE FROM job_leads WHERE id = :id"), {"id": lead_id})
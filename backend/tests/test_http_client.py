@@ -0,0 +1,147 @@
+import asyncio
+import json
+import httpx
+from fastapi import FastAPI
+from starlette.requests import Request
+from app.config import Settings, get_settings
+from app.main import lifespan
+from app.services.http_client import create_http_client
+from app.services.openrouter import OpenRouterService, get_openrouter_service
+from app.services.resilience import ResiliencePolicy
+
+
+def test_client_is_built_from_the_settings():
+    settings = Settings(
+        openrouter_max_connections=7,
+        openrouter_max_keepalive_connections=3,
+        openrouter_keepalive_expiry=11.0,
+        openrouter_connect_timeout=1.0,
+        openrouter_read_timeout=2.0,
+        openrouter_write_timeout=3.0,
+        openrouter_pool_timeout=4.0,
+    )
+    client = create_http_client(settings)
+    try:
+        assert client.timeout == httpx.Timeout(connect=1.0, read=2.0, write=3.0, pool=4.0)
+        pool = client._transport._pool
+        assert (pool._max_connections, pool._max_keepalive_connections, pool._keepalive_expiry) == (7, 3, 11.0)
+    finally:
+        asyncio.run(client.aclose())
+
+
+def test_lifespan_shares_one_client_and_closes_it(monkeypatch):
+    monkeypatch.setattr(get_settings(), "change_feed_enabled", False)
+    monkeypatch.setattr(get_settings(), "llm_cache_enabled", False)
+    app = FastAPI()
+
+    def request():
+        return Request({"type": "http", "app": app, "headers": []})
+
+    async def scenario():
+        async with lifespan(app):
+            client = app.state.http_client
+            first, second = get_openrouter_service(request()), get_openrouter_service(request())
+            assert first.client is client and second.client is client
+            assert first.resilience is second.resilience
+            assert not client.is_closed
+        return client
+
+    assert asyncio.run(scenario()).is_closed
+
+
+class StubOpenRouter:
+    """Minimal HTTP/1.1 keep-alive server answering chat completions; counts TCP connections"""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        content = json.dumps({"match_percentage": 70, "reasoning": "Stub"})
+        body = json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode("latin-1").split("\r\n"):
+                    name, _, value = line.partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                self.requests += 1
+                # Slow enough that the calls overlap
+                await asyncio.sleep(self.delay)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def _analyze_concurrently(monkeypatch, shared: bool, calls: int = 40, pool: int = 5):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "openrouter_max_connections", pool)
+    monkeypatch.setattr(settings, "openrouter_max_keepalive_connections", pool)
+    monkeypatch.setattr(settings, "openrouter_rate_per_second", 0)
+    monkeypatch.setattr(settings, "openrouter_fallback_models", [])
+    monkeypatch.setattr(settings, "openrouter_api_key", "test-key")
+
+    async def scenario():
+        async with StubOpenRouter() as stub:
+            monkeypatch.setattr(settings, "openrouter_base_url", stub.base_url)
+            resilience = ResiliencePolicy(settings)
+
+            async def analyze(client, i):
+                service = OpenRouterService(client, None, resilience)
+                return await service.analyze_job_match(f"Job ad {i}", "Resume")
+
+            async def per_call(i):
+                async with create_http_client(settings) as client:
+                    return await analyze(client, i)
+
+            if shared:
+                client = create_http_client(settings)
+                try:
+                    # Two waves, as when analyses keep arriving over the app's lifetime
+                    for _ in range(2):
+                        results = await asyncio.gather(*(analyze(client, i) for i in range(calls)))
+                finally:
+                    await client.aclose()
+            else:
+                results = await asyncio.gather(*(per_call(i) for i in range(calls)))
+            assert all(result["match_percentage"] == 70 for result in results)
+            return stub.connections, stub.requests
+
+    return asyncio.run(scenario())
+
+
+def test_concurrent_analyses_reuse_the_shared_clients_connections(monkeypatch):
+    connections, requests = _analyze_concurrently(monkeypatch, shared=True)
+    assert requests == 80
+    assert connections <= get_settings().openrouter_max_keepalive_connections
+
+
+def test_a_client_per_call_opens_a_connection_per_call(monkeypatch):
+    # What the shared client replaced; shows the stub really counts connections
+    connections, requests = _analyze_concurrently(monkeypatch, shared=False)
+    assert connections == requests == 40
@@ -0,0 +1,133 @@
+import json
+import pytest
+from sqlalchemy import text
+from app import models
+from app.config import get_settings
+from app.services.dedup import register_lead
+from app.services.ingest import IngestFormatError, ingest_leads, iter_lines, parse_csv, parse_ndjson
+
+NDJSON = (
+    '{"company_name": "Zürich Analytics", "job_ad_content": "Data engineer — Python, dbt, Snowflake 🚀"}\r\n'
+    "\n"
+    '{"company_name": "Açaí Labs", "job_ad_content": "Backend engineer, Go and Postgres"}\n'
+).encode("utf-8")
+
+CSV = (
+    "﻿company_name,role_name,job_ad_content\r\n"
+    'Müller GmbH,Engineer,"Python backend\nacross two lines, with ""quotes"""\r\n'
+    "Café Co,,Frontend — React\n"
+).encode("utf-8")
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", range(1, 12))
+def test_ndjson_survives_any_chunk_boundary(size):
+    # Small chunk sizes split the multi-byte characters and the CRLF between reads
+    records = list(parse_ndjson(iter_lines(_chunks(NDJSON, size))))
+    assert records == [
+        (1, {"company_name": "Zürich Analytics", "job_ad_content": "Data engineer — Python, dbt, Snowflake 🚀"}),
+        (3, {"company_name": "Açaí Labs", "job_ad_content": "Backend engineer, Go and Postgres"}),
+    ]
+
+
+@pytest.mark.parametrize("size", range(1, 12))
+def test_csv_survives_any_chunk_boundary(size):
+    records = list(parse_csv(iter_lines(_chunks(CSV, size))))
+    assert records == [
+        (1, {"company_name": "Müller GmbH", "role_name": "Engineer", "job_ad_content": 'Python backend\nacross two lines, with "quotes"'}),
+        (2, {"company_name": "Café Co", "role_name": None, "job_ad_content": "Frontend — React"}),
+    ]
+
+
+def test_bad_rows_are_reported_by_row_number():
+    assert list(parse_ndjson(['{"job_ad_content": "ok"}', "{not json"]))[1][0] == 2
+    assert list(parse_csv(["job_ad_content", "one,two"])) == [(1, "Expected 1 columns, got 2")]
+    with pytest.raises(IngestFormatError):
+        list(parse_csv(["company_name,role_name", "Acme,Engineer"]))
+
+
+@pytest.fixture
+def resume(db):
+    db.execute(text("UPDATE resumes SET is_active = false"))
+    db.add(models.Resume(content="Python backend engineer: PostgreSQL, FastAPI", is_active=True))
+    db.commit()
+
+
+@pytest.fixture
+def dedup_action(monkeypatch):
+    def set_action(action):
+        monkeypatch.setattr(get_settings(), "lead_dedup_action", action)
+    set_action("link")
+    return set_action
+
+
+def _ad(n):
+    return f"Ingest test posting {n}: " + " ".join(f"requirement{n}x{i}" for i in range(30))
+
+
+def _ndjson(records):
+    return [json.dumps(record) for record in records]
+
+
+def _inserted(db, marker="Ingest test posting"):
+    return db.query(models.JobLead).filter(models.JobLead.job_ad_content.like(f"{marker}%")).order_by(models.JobLead.id).all()
+
+
+def test_invalid_rows_do_not_abort_the_batch(db, resume, dedup_action):
+    lines = _ndjson([{"job_ad_content": _ad(1)}, {"company_name": "No ad"}]) + ["{broken"] + _ndjson([
+        {"job_ad_content": _ad(2), "job_url": 12}, {"job_ad_content": _ad(3)}
+    ])
+    result = ingest_leads(db, lines, "ndjson", chunk_size=2)
+
+    assert (result["received"], result["inserted"], result["failed"]) == (5, 2, 3)
+    assert [error["row"] for error in result["errors"]] == [2, 3, 4]
+    assert "job_ad_content" in result["errors"][0]["error"]
+    assert result["errors"][1]["error"].startswith("Invalid JSON")
+    assert [lead.job_ad_content for lead in _inserted(db)] == [_ad(1), _ad(3)]
+
+
+def test_each_chunk_is_one_insert_returning(db, resume, dedup_action, count_statements):
+    lines = _ndjson([{"job_ad_content": _ad(n)} for n in range(5)])
+    with count_statements() as statements:
+        result = ingest_leads(db, lines, "ndjson", chunk_size=2)
+
+    assert result["inserted"] == 5
+    inserts = [statement for statement in statements if statement.startswith("INSERT INTO job_leads")]
+    assert len(inserts) == 3
+    assert all("RETURNING" in statement for statement in inserts)
+    assert sum(statement.startswith("INSERT INTO lead_lsh_bands") for statement in statements) == 3
+
+
+def test_ingested_rows_are_prescored_and_deduplicated(db, resume, dedup_action):
+    existing = register_lead(db, models.JobLead(job_ad_content=_ad(1)))
+    db.commit()
+    # A copy of a stored lead, a new ad, and a copy of that new ad within the same chunk
+    lines = _ndjson([{"job_ad_content": _ad(1)}, {"job_ad_content": _ad(2)}, {"job_ad_content": _ad(2) + " "}])
+    result = ingest_leads(db, lines, "ndjson", chunk_size=10)
+
+    assert (result["inserted"], result["duplicates"]) == (3, 2)
+    # Canonical rows are inserted before the copies that link to them
+    new, copy, new_copy = _inserted(db)[1:]
+    assert (copy.job_ad_content, new.job_ad_content) == (_ad(1), _ad(2))
+    assert all(lead.prescore is not None and lead.prescore_vector is not None for lead in (copy, new, new_copy))
+    assert copy.duplicate_of_id == existing.id
+    assert new.duplicate_of_id is None
+    assert new_copy.duplicate_of_id == new.id
+
+
+@pytest.mark.parametrize("action, inserted, failed", [("merge", 1, 0), ("reject", 1, 1), ("off", 2, 0)])
+def test_dedup_action_applies_to_ingested_rows(db, resume, dedup_action, action, inserted, failed):
+    dedup_action(action)
+    lines = _ndjson([{"job_ad_content": _ad(1)}, {"job_ad_content": _ad(1), "company_name": "Filled In"}])
+    result = ingest_leads(db, lines, "ndjson", chunk_size=10)
+
+    assert (result["inserted"], result["failed"]) == (inserted, failed)
+    leads = _inserted(db)
+    assert len(leads) == inserted
+    if action == "merge":
+        assert leads[0].company_name == "Filled In"
+    if action == "reject":
+        assert result["errors"] == [{"row": 2, "error": "Duplicate of row 1 (100% similar)"}]
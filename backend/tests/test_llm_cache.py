@@ -0,0 +1,68 @@
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from app import models
+from app.database import SessionLocal
+from app.services.llm_cache import LLMResultCache
+
+
+@pytest.fixture
+def cache(db):
+    # LLMResultCache opens its own sessions and commits, so its rows are removed by key afterwards
+    cache = LLMResultCache(ttl_seconds=3600, max_entries=1000, memory_entries=0, touch_interval_seconds=60)
+    cache.keys = []
+    yield cache
+    with SessionLocal() as session:
+        session.query(models.LLMCacheEntry).filter(
+            models.LLMCacheEntry.cache_key.in_(cache.keys)
+        ).delete(synchronize_session=False)
+        session.commit()
+
+
+def _store(cache: LLMResultCache, result) -> str:
+    key = cache.make_key("test-model", "1", uuid.uuid4().hex)
+    cache.keys.append(key)
+    cache.set(key, "test-model", "1", result)
+    return key
+
+
+def _entry(key: str) -> models.LLMCacheEntry:
+    with SessionLocal() as session:
+        return session.get(models.LLMCacheEntry, key)
+
+
+def test_database_hit_within_touch_interval_does_not_write(cache):
+    key = _store(cache, {"match_percentage": 50.0})
+    before = _entry(key)
+
+    assert cache.get(key) == {"match_percentage": 50.0}
+
+    after = _entry(key)
+    assert (after.last_accessed_at, after.hit_count) == (before.last_accessed_at, before.hit_count)
+    assert cache.database_hits == 1
+
+
+def test_database_hit_after_touch_interval_refreshes_access_time(cache):
+    key = _store(cache, {"match_percentage": 50.0})
+    stale = datetime.utcnow() - timedelta(hours=1)
+    with SessionLocal() as session:
+        session.get(models.LLMCacheEntry, key).last_accessed_at = stale
+        session.commit()
+
+    cache.get(key)
+
+    entry = _entry(key)
+    assert entry.last_accessed_at > stale
+    assert entry.hit_count == 1
+
+
+def test_eviction_runs_once_per_interval(cache, monkeypatch):
+    evictions = []
+    monkeypatch.setattr(cache, "_evict", lambda db, now: evictions.append(now))
+    for _ in range(5):
+        _store(cache, {"n": 1})
+    assert len(evictions) == 1
+
+    cache.evict_interval = 0
+    _store(cache, {"n": 2})
+    assert len(evictions) == 2
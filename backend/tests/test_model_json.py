@@ -0,0 +1,98 @@
+import json
+import time
+import pytest
+from app.services.model_json import ModelJSONError, StreamingFieldParser, fast_loads, loads
+
+# Shapes of malformed answers seen from models, with what they should parse to
+MALFORMED_OUTPUTS = [
+    ('{"match_percentage": 80, "reasoning": "ok"}', {"match_percentage": 80, "reasoning": "ok"}),
+    ('```json\n{"match_percentage": 80}\n```', {"match_percentage": 80}),
+    ('```\n{"a": 1}\n```\nLet me know if you need more.', {"a": 1}),
+    ('Here is the analysis:\n{"a": 1}', {"a": 1}),
+    ('the result: {"a": 1}', {"a": 1}),
+    ('1. Parsed fields: {"a": 1}', {"a": 1}),
+    ('nice match! {"a": true}', {"a": True}),
+    ('{"reasoning": "line one\nline two\ttabbed"}', {"reasoning": "line one\nline two\ttabbed"}),
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+    ("{match_percentage: 70, reasoning: \"bare keys\"}", {"match_percentage": 70, "reasoning": "bare keys"}),
+    ('{"a": 1, "reasoning": "cut off mid sent', {"a": 1, "reasoning": "cut off mid sent"}),
+    ('{"a": [1, 2, {"b": "c', {"a": [1, 2, {"b": "c"}]}),
+    ('{"a": 1, "b":', {"a": 1}),
+    ('{"done": tr', {"done": True}),
+    ('{"score": 7.', {"score": 7.0}),
+    ('{"quote": "it\\\'s fine"}', {"quote": "it's fine"}),
+    ('{"emoji": "\\ud83d\\ude00", "lone": "\\ud83d"}', {"emoji": "\U0001F600", "lone": "�"}),
+    ('[{"id": 1}, {"id": 2}]', [{"id": 1}, {"id": 2}]),
+    ("42", 42),
+    ("  false\n", False),
+    ("```json\nnull\n```", None),
+]
+
+
+@pytest.mark.parametrize("text, expected", MALFORMED_OUTPUTS)
+def test_malformed_outputs(text, expected):
+    assert loads(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", "   ", "not json", "the model refused to answer", "```\nsorry\n```"])
+def test_outputs_without_json_raise(text):
+    with pytest.raises(ModelJSONError):
+        loads(text)
+
+
+def test_model_json_error_is_a_value_error():
+    with pytest.raises(ValueError):
+        loads("no json here")
+
+
+def test_streaming_parser_reports_values_and_deltas():
+    parser = StreamingFieldParser(stream_fields=("reasoning",))
+    events = []
+    answer = '{"match_percentage": 85, "reasoning": "Strong \\"Python\\" fit\\n", "extra": [1, {"a": 2}]}'
+    for start in range(0, len(answer), 7):
+        events.extend(parser.feed(answer[start:start + 7]))
+    events.extend(parser.close())
+    assert "".join(text for kind, key, text in events if kind == "delta") == 'Strong "Python" fit\n'
+    assert parser.values == json.loads(answer)
+
+
+def test_streaming_parser_closes_truncated_string():
+    parser = StreamingFieldParser()
+    parser.feed('{"match_percentage": 60, "reasoning": "half an ans')
+    parser.close()
+    assert parser.values == {"match_percentage": 60, "reasoning": "half an ans"}
+
+
+def _large_answer(items: int) -> str:
+    return json.dumps({
+        "match_percentage": 77,
+        "reasoning": "Solid overlap in backend work. " * items,
+        "skills": [{"name": f"skill {i}", "years": i % 10, "required": i % 2 == 0} for i in range(items)],
+    })
+
+
+def _best_of(func, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def test_benchmark_valid_output_takes_the_fast_path():
+    text = _large_answer(5000)
+    assert loads(text) == fast_loads(text)
+    # One strict parse plus a whitespace scan; far below the lenient parser's cost
+    assert _best_of(lambda: loads(text)) < 0.1
+
+
+def test_benchmark_lenient_parse_is_linear():
+    # Fenced, with a trailing comma and cut off, so every call takes the lenient path
+    small = "```json\n" + _large_answer(500)[:-2] + ","
+    large = "```json\n" + _large_answer(5000)[:-2] + ","
+    small_time = _best_of(lambda: loads(small))
+    large_time = _best_of(lambda: loads(large))
+    assert large_time < 1.0
+    # Ten times the input may cost ten times the time, with slack for noise, not a hundred
+    assert large_time < small_time * 30
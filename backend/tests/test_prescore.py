@@ -0,0 +1,57 @@
+import math
+import numpy as np
+import pytest
+from sqlalchemy import func, text
+from app import models
+from app.services import prescore
+from app.services.prescore import embed, from_bytes, refresh_prescores, to_bytes
+
+RESUME = "Python backend engineer: PostgreSQL, FastAPI, data pipelines"
+
+
+@pytest.fixture
+def leads(db):
+    db.execute(text("UPDATE resumes SET is_active = false"))
+    db.add(models.Resume(content=RESUME, is_active=True))
+    stored = embed("Stored vector for a frontend role")
+    leads = [
+        models.JobLead(job_ad_content=f"Python backend engineer with PostgreSQL, opening {i}")
+        for i in range(4)
+    ]
+    # A vector that does not match the ad shows whether a stored vector is kept or recomputed
+    leads.append(models.JobLead(job_ad_content="Python backend engineer", prescore_vector=to_bytes(stored)))
+    db.add_all(leads)
+    db.commit()
+    return leads, stored
+
+
+def _changes(db) -> int:
+    return db.query(func.count()).select_from(models.TableChange).filter(
+        models.TableChange.table_name == "job_leads"
+    ).scalar()
+
+
+def test_refresh_writes_one_statement_per_chunk(db, leads, monkeypatch, count_statements):
+    monkeypatch.setattr(prescore, "CHUNK_SIZE", 2)
+    before = _changes(db)
+    with count_statements() as statements:
+        total = refresh_prescores(db)
+
+    chunks = math.ceil(total / 2)
+    assert total >= len(leads[0])
+    assert sum(statement.startswith("UPDATE job_leads") for statement in statements) == chunks
+    # One change log row per chunk; executemany logged one per lead
+    assert _changes(db) - before == chunks
+
+
+def test_refresh_scores_leads_and_keeps_stored_vectors(db, leads, monkeypatch):
+    monkeypatch.setattr(prescore, "CHUNK_SIZE", 2)
+    created, stored = leads
+    refresh_prescores(db)
+
+    for lead in created:
+        db.refresh(lead)
+    assert all(lead.prescore is not None and lead.prescore_vector is not None for lead in created)
+    assert np.array_equal(from_bytes(created[0].prescore_vector), embed(created[0].job_ad_content))
+    assert np.array_equal(from_bytes(created[-1].prescore_vector), stored)
+    assert created[0].prescore > created[-1].prescore
@@ -0,0 +1,47 @@
+import pytest
+from app import models
+from app.routers.job_leads import _promote
+
+AD = "Promote Test Co is hiring a backend engineer"
+EXTRACTED = {"company_name": "Promote Test Co", "role_name": "Backend Engineer"}
+
+
+@pytest.fixture
+def lead(db):
+    lead = models.JobLead(job_ad_content=AD, match_percentage=80.0, match_reasoning="Good fit")
+    db.add(lead)
+    db.commit()
+    return lead
+
+
+def _applications(db):
+    return db.query(models.JobApplication).filter(models.JobApplication.job_ad_content == AD).all()
+
+
+def test_promotion_moves_the_lead_into_an_application(db, lead):
+    lead_id = lead.id
+    application = _promote(db, lead_id, EXTRACTED)
+
+    assert (application.company_name, application.role_name) == ("Promote Test Co", "Backend Engineer")
+    assert application.match_percentage == 80.0
+    assert [entry.new_stage for entry in application.stage_history] == [models.JobStage.NOT_STARTED]
+    assert db.get(models.JobLead, lead_id) is None
+    assert [row.id for row in _applications(db)] == [application.id]
+
+
+def test_failed_commit_leaves_the_lead_and_no_application(db, lead, monkeypatch):
+    lead_id = lead.id
+
+    def fail():
+        raise RuntimeError("connection lost during commit")
+
+    monkeypatch.setattr(db, "commit", fail)
+    with pytest.raises(RuntimeError):
+        _promote(db, lead_id, EXTRACTED)
+    db.rollback()
+
+    assert db.get(models.JobLead, lead_id) is not None
+    assert _applications(db) == []
+    assert db.query(models.StageHistory).join(models.JobApplication).filter(
+        models.JobApplication.job_ad_content == AD
+    ).count() == 0
@@ -0,0 +1,98 @@
+from app.services.prompt_compaction import (
+    TRUNCATION_MARKER, compact, estimate_tokens, normalize, strip_boilerplate, truncate
+)
+
+JOB_AD = """<h1>Senior Backend Engineer</h1>
+Berlin &amp; Remote
+Senior Backend Engineer
+
+About us
+We build payroll software for 4,000 small businesses.
+
+What we offer:
+- Health insurance
+- 30 days vacation
+- Yearly learning budget
+Your profile
+- 5+ years of Python
+- Experience with PostgreSQL and query tuning
+Tech stack
+Python, FastAPI, Kubernetes, Terraform
+
+Apply now
+We are an equal opportunity employer and value diversity. All qualified applicants will receive consideration without regard to race or religion.
+Share this job
+"""
+
+RESUME = """Jane Doe
+Backend developer
+
+Experience
+
+Acme Corp, 2019-2023
+Responsibilities:
+- Built REST APIs in Python
+- Owned the CI pipeline
+
+Globex, 2016-2019
+Responsibilities:
+- Built REST APIs in Python
+- Ran the on-call rotation
+
+Skills
+Python, PostgreSQL, Docker
+"""
+
+
+def test_requirements_after_skipped_section_are_kept():
+    text = strip_boilerplate(normalize(JOB_AD))
+    assert "- 5+ years of Python" in text
+    assert "- Experience with PostgreSQL and query tuning" in text
+    assert "Python, FastAPI, Kubernetes, Terraform" in text
+    assert "We build payroll software for 4,000 small businesses." in text
+
+
+def test_benefits_eeo_and_page_chrome_are_dropped():
+    text = strip_boilerplate(normalize(JOB_AD))
+    assert "Health insurance" not in text
+    assert "30 days vacation" not in text
+    assert "equal opportunity" not in text
+    assert "Apply now" not in text
+    assert "Share this job" not in text
+
+
+def test_html_is_normalized():
+    text = normalize(JOB_AD)
+    assert "<h1>" not in text
+    assert "Berlin & Remote" in text
+
+
+def test_repeated_resume_bullets_under_other_employers_are_kept():
+    text = strip_boilerplate(normalize(RESUME))
+    assert text.count("Responsibilities:") == 2
+    assert text.count("- Built REST APIs in Python") == 2
+    assert "- Ran the on-call rotation" in text
+
+
+def test_consecutive_and_whole_block_repeats_are_dropped():
+    section = "Requirements:\n- Go or Rust\n- Distributed systems"
+    text = strip_boilerplate(f"Platform Engineer\nPlatform Engineer\n\n{section}\n\n{section}")
+    assert text == f"Platform Engineer\n\n{section}"
+
+
+def test_compaction_is_deterministic():
+    # The LLM result cache is keyed by the compacted text
+    assert compact(JOB_AD, 1500) == compact(JOB_AD, 1500)
+
+
+def test_truncate_keeps_start_and_end_within_budget():
+    text = "\n".join(f"Requirement number {i}" for i in range(400))
+    cut = truncate(text, 200)
+    assert TRUNCATION_MARKER in cut
+    assert cut.startswith("Requirement number 0")
+    assert cut.endswith("Requirement number 399")
+    assert estimate_tokens(cut) <= 200
+
+
+def test_short_text_is_untouched_by_truncate():
+    assert truncate("Python developer", 100) == "Python developer"
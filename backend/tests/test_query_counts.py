@@ -0,0 +1,132 @@
+"""
+Statements each router endpoint sends, counted with the count_statements fixture.
+
+Counts are checked against pages or batches of different sizes, so a query issued
+per row (N+1) fails here rather than in production.
+"""
+import json
+from datetime import datetime, timedelta
+import pytest
+from app import models, schemas
+from app.routers.job_applications import bulk_change_application_stage, create_application, get_application, list_applications
+from app.routers.job_leads import _promote, list_leads
+
+COMPANY = "Query Count Test Co"
+
+
+def _kinds(statements):
+    return [statement.split()[0] for statement in statements]
+
+
+def _seed_applications(db, count):
+    # Scoped to one company so rows already in the test database do not interfere
+    now = datetime.utcnow()
+    created = []
+    for i in range(count):
+        application = models.JobApplication(
+            company_name=COMPANY, role_name=f"Role {i}", stage=models.JobStage.APPLIED,
+            stage_date=now, created_at=now - timedelta(minutes=i)
+        )
+        application.stage_history = [
+            models.StageHistory(new_stage=models.JobStage.NOT_STARTED, changed_at=now),
+            models.StageHistory(previous_stage=models.JobStage.NOT_STARTED, new_stage=models.JobStage.APPLIED, changed_at=now),
+        ]
+        created.append(application)
+    db.add_all(created)
+    db.flush()
+    db.expire_all()
+    return created
+
+
+@pytest.fixture
+def applications(db):
+    return _seed_applications(db, 5)
+
+
+def _list(db, count_statements, **params):
+    with count_statements() as statements:
+        response = list_applications(**{
+            "skip": 0, "limit": 100, "cursor": None, "stage": None, "company": COMPANY,
+            "fields": "full", "include_history": True, "db": db, **params
+        })
+    return json.loads(response.body), len(statements)
+
+
+@pytest.mark.parametrize("params, queries", [
+    ({}, 2),
+    ({"include_history": False}, 1),
+    ({"fields": "summary"}, 1),
+])
+def test_history_costs_one_query_per_page_not_per_row(db, applications, count_statements, params, queries):
+    items, count = _list(db, count_statements, **params)
+    assert len(items) == len(applications)
+    assert count == queries
+    if queries == 2:
+        assert all(len(item["stage_history"]) == 2 for item in items)
+    else:
+        assert all("stage_history" not in item for item in items)
+
+
+def test_history_stays_with_its_application(db, applications, count_statements):
+    items, _ = _list(db, count_statements, limit=2)
+    assert len(items) == 2
+    for item in items:
+        assert {entry["job_application_id"] for entry in item["stage_history"]} == {item["id"]}
+        assert [entry["new_stage"] for entry in item["stage_history"]] == ["not_started", "applied"]
+
+
+@pytest.mark.parametrize("size", [1, 6])
+@pytest.mark.parametrize("fields", ["full", "summary"])
+def test_lead_list_is_one_query(db, count_statements, size, fields):
+    db.add_all(models.JobLead(company_name=COMPANY, job_ad_content=f"ad {i}") for i in range(size))
+    db.flush()
+    with count_statements() as statements:
+        response = list_leads(
+            skip=0, limit=100, cursor=None, sort_by="created_at", sort_by_match=False, company=COMPANY,
+            promoted=None, include_duplicates=True, fields=fields, db=db
+        )
+    assert len(json.loads(response.body)) == size
+    assert _kinds(statements) == ["SELECT"]
+
+
+def test_application_detail_loads_history_with_one_query(db, applications, count_statements):
+    application_id = applications[0].id
+    db.expire_all()
+    with count_statements() as statements:
+        # Serialized as FastAPI does with the response model, which loads stage_history
+        detail = schemas.JobApplication.model_validate(get_application(application_id, db))
+    assert len(detail.stage_history) == 2
+    assert _kinds(statements) == ["SELECT", "SELECT"]
+
+
+def test_create_application_is_one_flush(db, count_statements):
+    application = schemas.JobApplicationCreate(company_name=COMPANY, role_name="Engineer")
+    with count_statements() as statements:
+        created = create_application(application, db)
+    assert created.stage_history[0].new_stage == models.JobStage.NOT_STARTED
+    # The application and its first history row; no reload after the commit
+    assert _kinds(statements) == ["INSERT", "INSERT"]
+
+
+def test_promote_is_one_read_and_one_flush(db, count_statements):
+    lead = models.JobLead(company_name=COMPANY, job_ad_content="ad to promote", match_percentage=80.0)
+    db.add(lead)
+    db.commit()
+    lead_id = lead.id
+    db.expire_all()
+    with count_statements() as statements:
+        _promote(db, lead_id, {"company_name": COMPANY, "role_name": "Engineer"})
+    # Load the lead, then one flush for the application, the lead and the history row;
+    # the old commit-and-refresh sequence took 11 round trips, commits included
+    assert _kinds(statements) == ["SELECT", "INSERT", "DELETE", "INSERT"]
+
+
+@pytest.mark.parametrize("size", [1, 5])
+def test_bulk_stage_change_is_two_statements_whatever_the_batch_size(db, count_statements, size):
+    ids = [application.id for application in _seed_applications(db, size)]
+    change = schemas.BulkStageChangeRequest(new_stage=models.JobStage.IN_PROGRESS, application_ids=ids)
+    with count_statements() as statements:
+        result = bulk_change_application_stage(change, db)
+    assert result.updated == size
+    # UPDATE ... RETURNING, then one multi-row history insert
+    assert _kinds(statements) == ["UPDATE", "INSERT"]
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import httpx
+import pytest
+from app.config import Settings
+from app.services.openrouter import OpenRouterService
+from app.services.resilience import (
+    CircuitBreaker, ResiliencePolicy, UpstreamError, UpstreamUnavailableError, parse_retry_after
+)
+
+
+def _settings(**overrides) -> Settings:
+    values = dict(
+        openrouter_max_retries=2,
+        openrouter_retry_base_seconds=0.0,
+        openrouter_retry_max_seconds=1.0,
+        openrouter_rate_per_second=0,
+        openrouter_circuit_failure_threshold=3,
+        openrouter_circuit_reset_seconds=30.0,
+    )
+    values.update(overrides)
+    return Settings(**values)
+
+
+class FakeUpstream:
+    """Answers each request with the next scripted status (or exception) for its model"""
+
+    def __init__(self, script):
+        self.script = {model: list(steps) for model, steps in script.items()}
+        self.calls = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        model = json.loads(request.content)["model"]
+        self.calls.append(model)
+        step = self.script[model].pop(0) if self.script[model] else 200
+        if isinstance(step, Exception):
+            raise step
+        status, headers = step if isinstance(step, tuple) else (step, {})
+        if status == 200:
+            content = json.dumps({"match_percentage": 70, "reasoning": f"from {model}"})
+            return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+        return httpx.Response(status, headers=headers, text="upstream says no")
+
+
+def _send(policy: ResiliencePolicy, upstream: FakeUpstream, models):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as client:
+            def build(model):
+                return client.build_request("POST", "https://openrouter.test/chat", json={"model": model})
+            return await policy.send(client, build, models)
+    return asyncio.run(run())
+
+
+def test_retries_retryable_statuses_then_succeeds():
+    upstream = FakeUpstream({"primary": [503, 429, 200]})
+    model, response = _send(ResiliencePolicy(_settings()), upstream, ["primary"])
+    assert (model, response.status_code) == ("primary", 200)
+    assert upstream.calls == ["primary"] * 3
+
+
+def test_non_retryable_status_raises_at_once():
+    upstream = FakeUpstream({"primary": [400], "fallback": []})
+    with pytest.raises(UpstreamError) as error:
+        _send(ResiliencePolicy(_settings()), upstream, ["primary", "fallback"])
+    assert not isinstance(error.value, UpstreamUnavailableError)
+    assert upstream.calls == ["primary"]
+
+
+def test_falls_back_after_retries_are_exhausted():
+    upstream = FakeUpstream({"primary": [502, 502, 502], "fallback": [200]})
+    model, _ = _send(ResiliencePolicy(_settings()), upstream, ["primary", "fallback"])
+    assert model == "fallback"
+    assert upstream.calls == ["primary"] * 3 + ["fallback"]
+
+
+def test_transport_errors_are_retried_and_reported_as_unavailable():
+    upstream = FakeUpstream({"primary": [httpx.ConnectError("refused")] * 3})
+    with pytest.raises(UpstreamUnavailableError):
+        _send(ResiliencePolicy(_settings()), upstream, ["primary"])
+    assert len(upstream.calls) == 3
+
+
+def test_long_retry_after_moves_on_to_the_next_model():
+    upstream = FakeUpstream({"primary": [(503, {"Retry-After": "120"})], "fallback": [200]})
+    model, _ = _send(ResiliencePolicy(_settings()), upstream, ["primary", "fallback"])
+    assert model == "fallback"
+    assert upstream.calls == ["primary", "fallback"]
+
+
+def test_open_circuit_fails_fast_and_rate_limits_do_not_trip_it():
+    policy = ResiliencePolicy(_settings(openrouter_max_retries=0))
+    for _ in range(3):
+        with pytest.raises(UpstreamUnavailableError):
+            _send(policy, FakeUpstream({"primary": [429]}), ["primary"])
+    assert policy.breaker("primary").state == "closed"
+
+    for _ in range(3):
+        with pytest.raises(UpstreamUnavailableError):
+            _send(policy, FakeUpstream({"primary": [500]}), ["primary"])
+    assert policy.breaker("primary").state == "open"
+
+    upstream = FakeUpstream({"primary": []})
+    with pytest.raises(UpstreamUnavailableError) as error:
+        _send(policy, upstream, ["primary"])
+    assert upstream.calls == []
+    assert 0 < error.value.retry_after <= 30
+
+
+def test_circuit_breaker_half_opens_and_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.0)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    breaker.reset_seconds = 60.0
+    assert breaker.state == "open" and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_backoff_is_capped_and_honors_retry_after():
+    policy = ResiliencePolicy(_settings(openrouter_retry_base_seconds=0.5, openrouter_retry_max_seconds=2.0))
+    assert all(0 <= policy.backoff(attempt, None) <= 2.0 for attempt in range(10))
+    assert policy.backoff(0, 5.0) == 5.0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+class RecordingCache:
+    def __init__(self):
+        self.stored = {}
+
+    make_key = staticmethod(lambda model, version, *parts: "|".join((model, version, *parts)))
+
+    def get(self, key):
+        return self.stored.get(key)
+
+    def set(self, key, model, prompt_version, result):
+        self.stored[key] = (model, result)
+
+
+def _service(upstream: FakeUpstream, cache: RecordingCache):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as client:
+            service = OpenRouterService(client, cache, ResiliencePolicy(_settings(openrouter_max_retries=0)))
+            service.model, service.models = "primary", ["primary", "fallback"]
+            return await service.analyze_job_match("Python developer wanted", "Python developer")
+    return asyncio.run(run())
+
+
+def test_answers_from_the_primary_model_are_cached():
+    cache = RecordingCache()
+    result = _service(FakeUpstream({"primary": [200]}), cache)
+    assert result["reasoning"] == "from primary"
+    assert [model for model, _ in cache.stored.values()] == ["primary"]
+
+
+def test_answers_from_a_fallback_model_are_not_cached():
+    cache = RecordingCache()
+    result = _service(FakeUpstream({"primary": [503], "fallback": [200]}), cache)
+    assert result["reasoning"] == "from fallback"
+    assert cache.stored == {}
@@ -0,0 +1,54 @@
+from fastapi import BackgroundTasks
+from app import models, schemas
+from app.routers import resumes
+from app.services.leads import load_resume_match_inputs, resume_content_hash, save_resume_matches
+
+
+def _stored_match(db, lead_id: int, resume_id: int):
+    _, inputs = load_resume_match_inputs(db, lead_id, [resume_id])
+    return inputs[0]["stored"]
+
+
+def _lead_with_match(db):
+    resume = resumes.create_resume(schemas.ResumeCreate(content="Python developer"), BackgroundTasks(), db)
+    lead = models.JobLead(job_ad_content="Hiring a Python developer")
+    db.add(lead)
+    db.commit()
+    save_resume_matches(db, lead.id, [{
+        "resume_id": resume.id,
+        "match_percentage": 81.0,
+        "reasoning": "Good fit",
+        "resume_content_hash": resume_content_hash(resume.content),
+    }])
+    return lead, resume
+
+
+def test_creating_another_resume_keeps_stored_matches(db):
+    lead, resume = _lead_with_match(db)
+    updated_at = resume.updated_at
+
+    resumes.create_resume(schemas.ResumeCreate(content="Go developer"), BackgroundTasks(), db)
+
+    db.refresh(resume)
+    assert resume.is_active is False
+    assert resume.updated_at == updated_at
+    assert _stored_match(db, lead.id, resume.id) == {"match_percentage": 81.0, "reasoning": "Good fit"}
+
+
+def test_activating_a_resume_keeps_stored_matches(db):
+    lead, resume = _lead_with_match(db)
+    other = resumes.create_resume(schemas.ResumeCreate(content="Go developer"), BackgroundTasks(), db)
+
+    resumes.update_resume(resume.id, schemas.ResumeUpdate(is_active=True), BackgroundTasks(), db)
+
+    db.refresh(other)
+    assert other.is_active is False
+    assert _stored_match(db, lead.id, resume.id) is not None
+
+
+def test_editing_resume_content_invalidates_stored_matches(db):
+    lead, resume = _lead_with_match(db)
+
+    resumes.update_resume(resume.id, schemas.ResumeUpdate(content="Rust developer"), BackgroundTasks(), db)
+
+    assert _stored_match(db, lead.id, resume.id) is None
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+import pytest
+from app import database
+from app.database import run_db
+
+
+class FakeSession:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    created = []
+
+    def factory():
+        created.append(FakeSession())
+        return created[-1]
+
+    monkeypatch.setattr(database, "SessionLocal", factory)
+    return created
+
+
+def test_runs_in_the_threadpool_with_its_own_session(sessions):
+    def query(db, lead_id, force=False):
+        return db, threading.get_ident(), lead_id, force
+
+    async def scenario():
+        return threading.get_ident(), await run_db(query, 7, force=True)
+
+    loop_thread, (db, thread, lead_id, force) = asyncio.run(scenario())
+    assert thread != loop_thread
+    assert (lead_id, force) == (7, True)
+    assert sessions == [db] and db.closed
+
+
+def test_closes_the_session_when_the_call_fails(sessions):
+    def query(db):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run_db(query))
+    assert sessions[0].closed
+
+
+def test_slow_queries_do_not_block_the_event_loop(sessions):
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await asyncio.gather(*(run_db(lambda db: time.sleep(0.2)) for _ in range(3)))
+        task.cancel()
+        return ticks
+
+    started = time.monotonic()
+    ticks = asyncio.run(scenario())
+    # The three calls overlap, and the loop kept running meanwhile
+    assert time.monotonic() - started < 0.5
+    assert ticks >= 5
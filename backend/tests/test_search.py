@@ -0,0 +1,93 @@
+from fastapi import Response
+import pytest
+from app import models
+from app.pagination import NEXT_CURSOR_HEADER
+from app.routers import search as search_router
+
+# A made-up word keeps rows already in the test database out of the results
+WORD = "quokkaware"
+
+
+@pytest.fixture
+def documents(db):
+    leads = [
+        models.JobLead(company_name=f"{WORD} Labs", role_name="Backend Engineer", job_ad_content="Python services"),
+        models.JobLead(company_name="Acme", role_name="Data Engineer", job_ad_content=f"We use {WORD} and Python daily"),
+        models.JobLead(company_name="Initech", role_name="Frontend Engineer", job_ad_content=f"{WORD} with React, no Python"),
+    ]
+    applications = [
+        models.JobApplication(company_name="Globex", role_name=f"{WORD} Platform Lead", job_ad_content="Rust and Python"),
+        models.JobApplication(company_name="Hooli", role_name="SRE", job_ad_content="On call", notes=f"Referred by the {WORD} team"),
+    ]
+    db.add_all(leads + applications)
+    db.commit()
+    return leads, applications
+
+
+def _search(db, q, kind=None, limit=20, cursor=None):
+    response = Response()
+    results = search_router.search(response=response, q=q, kind=kind, limit=limit, cursor=cursor, db=db)
+    return results, response.headers.get(NEXT_CURSOR_HEADER)
+
+
+def _hits(results):
+    return [(result.type, result.id) for result in results]
+
+
+def test_websearch_syntax(db, documents):
+    leads, applications = documents
+    python = {("lead", lead.id) for lead in leads} | {("application", applications[0].id)}
+
+    assert set(_hits(_search(db, f"{WORD} python")[0])) == python
+    assert set(_hits(_search(db, f"{WORD} -react python")[0])) == python - {("lead", leads[2].id)}
+    assert _hits(_search(db, f'"{WORD} labs"')[0]) == [("lead", leads[0].id)]
+    assert set(_hits(_search(db, f"{WORD} rust OR hooli")[0])) == {
+        ("application", applications[0].id), ("application", applications[1].id)
+    }
+    assert _hits(_search(db, f"{WORD} python", kind="application")[0]) == [("application", applications[0].id)]
+
+
+def test_leads_and_applications_are_ranked_together(db, documents):
+    leads, applications = documents
+    results, cursor = _search(db, WORD)
+
+    assert cursor is None
+    assert len(results) == 5
+    assert [result.rank for result in results] == sorted((result.rank for result in results), reverse=True)
+    # Company and role carry the most weight, then notes, then the job ad
+    top = set(_hits(results[:2]))
+    assert top == {("lead", leads[0].id), ("application", applications[0].id)}
+    assert _hits(results[2:]) == [("application", applications[1].id), ("lead", leads[2].id), ("lead", leads[1].id)]
+    # Snippets come from the ad and notes, not from the company and role
+    snippets = {hit: result.snippet for hit, result in zip(_hits(results), results)}
+    assert f"<mark>{WORD}</mark>" in snippets[("lead", leads[1].id)]
+    assert f"<mark>{WORD}</mark>" in snippets[("application", applications[1].id)]
+    assert "<mark>" not in snippets[("lead", leads[0].id)]
+
+
+def test_headlines_are_only_built_for_the_returned_page(db, documents, monkeypatch):
+    highlighted = []
+    snippets = search_router._snippets
+
+    def recording_snippets(db, model, ids, tsquery):
+        highlighted.extend((model, id) for id in ids)
+        return snippets(db, model, ids, tsquery)
+
+    monkeypatch.setattr(search_router, "_snippets", recording_snippets)
+    results, _ = _search(db, WORD, limit=2)
+
+    assert len(highlighted) == 2
+    assert {(search_router.SEARCHABLE[result.type], result.id) for result in results} == set(highlighted)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_cursor_pages_have_no_duplicates_or_gaps(db, documents, limit):
+    everything, _ = _search(db, WORD, limit=100)
+    seen, cursor = [], None
+    while True:
+        page, cursor = _search(db, WORD, limit=limit, cursor=cursor)
+        assert len(page) <= limit
+        seen.extend(_hits(page))
+        if cursor is None:
+            break
+    assert seen == _hits(everything)
@@ -13,6 +13,42 @@ const apiClient = axios.create({
 
 export default apiClient;
 
+// POST to an endpoint that answers with server-sent events, calling onEvent for each
+// event as it arrives. Resolves with the final "done" event, rejects on an "error" event.
+const postEventStream = async (path, params, onEvent) => {
+  const query = new URLSearchParams(
+    Object.entries(params || {}).filter(([, value]) => value !== undefined && value !== null)
+  );
+  const response = await fetch(`${API_URL}${path}${query.toString() ? `?${query}` : ''}`, {
+    method: 'POST',
+    headers: { Accept: 'text/event-stream' },
+  });
+  if (!response.ok) {
+    throw new Error(`Request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let done = null;
+  for (;;) {
+    const { value, done: finished } = await reader.read();
+    if (finished) break;
+    buffer += decoder.decode(value, { stream: true });
+    const messages = buffer.split('\n\n');
+    buffer = messages.pop();
+    for (const message of messages) {
+      const data = message.split('\n').filter((line) => line.startsWith('data:')).map((line) => line.slice(5)).join('\n');
+      if (!data) continue;
+      const event = JSON.parse(data);
+      if (event.status === 'error') throw new Error(event.error);
+      if (event.status === 'done') done = event;
+      onEvent(event);
+    }
+  }
+  return done;
+};
+
 // Resumes API
 export const resumesApi = {
   getAll: () => apiClient.get('/api/resumes/'),
@@ -43,5 +79,6 @@ export const leadsApi = {
   analyze: (id, resumeId) => apiClient.post(`/api/leads/${id}/analyze`, null, {
     params: { resume_id: resumeId }
   }),
+  analyzeStream: (id, resumeId, onEvent) => postEventStream(`/api/leads/${id}/analyze`, { resume_id: resumeId }, onEvent),
   promote: (id) => apiClient.post(`/api/leads/${id}/promote`),
 };
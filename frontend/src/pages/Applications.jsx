@@ -37,7 +37,7 @@ function Applications() {
 
   const loadApplications = async () => {
     try {
-      const response = await applicationsApi.getAll();
+      const response = await applicationsApi.getAll({ include_history: false });
       setApplications(response.data);
     } catch (error) {
       console.error('Error loading applications:', error);
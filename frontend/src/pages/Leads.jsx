@@ -93,12 +93,24 @@ function Leads() {
     }
 
     setAnalyzing(leadId);
+    // Show the score and reasoning as the model writes them
+    const updateLead = (changes) => setLeads((current) => current.map(
+      (lead) => (lead.id === leadId ? { ...lead, ...changes(lead) } : lead)
+    ));
+    updateLead(() => ({ match_reasoning: '' }));
     try {
-      await leadsApi.analyze(leadId);
+      await leadsApi.analyzeStream(leadId, undefined, (event) => {
+        if (event.field === 'match_percentage' && event.value !== undefined) {
+          updateLead(() => ({ match_percentage: Number(event.value) }));
+        } else if (event.field === 'reasoning' && event.delta !== undefined) {
+          updateLead((lead) => ({ match_reasoning: (lead.match_reasoning || '') + event.delta }));
+        }
+      });
       loadLeads();
       showToast('Lead analyzed successfully!', 'success');
     } catch (error) {
       console.error('Error analyzing lead:', error);
+      loadLeads();
       showToast('Error analyzing lead. Please check your OpenRouter API configuration.', 'error');
     } finally {
       setAnalyzing(null);